@@ -7,17 +7,62 @@ Provides FPS stats, camera health, zone transitions, and track summaries.
 Author: [Your Name]
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Any
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Any, Optional
 import uvicorn
 import os
 import json
+import time
+import base64
 from datetime import datetime
-from collections import defaultdict
-from global_id_service.cache_instance import redis_cache
+from global_id_service.clients import get_async_redis_cache
+from global_id_service.config import ACTIVE_TRACK_WINDOW_SECONDS, CAMERA_CONFIG_PATH, TRANSITION_RETENTION_DAYS
+from global_id_service import transitions
+from app.zone_scheduler import load_shard_layout
+from app.latency import read_snapshots
+from app.topology import get_topology
+from api.fps_index import FpsIndex, rows_to_samples
+from api.response_cache import ResponseCache
+from api.live_hub import LiveHub, TOPICS
+from api.downsample import downsample, METHODS as DOWNSAMPLE_METHODS
+
+LOGS_DIR = "/opt/nvidia/deepstream/deepstream-7.1/MCT/logs"
 
 app = FastAPI(title="MCT Dashboard API", version="1.0")
+fps_index = FpsIndex(LOGS_DIR)
+redis_cache = get_async_redis_cache()
+
+HEALTH_HEARTBEAT_STALE_SECONDS = float(os.getenv("HEALTH_HEARTBEAT_STALE_SECONDS", 5.0))  # zone stopped reporting
+HEALTH_FRAME_STALE_SECONDS = float(os.getenv("HEALTH_FRAME_STALE_SECONDS", 5.0))  # camera stopped delivering frames
+# DEGRADED below this share of the target FPS, LIVE again only at or above HEALTH_RECOVER_RATIO of it
+HEALTH_DEGRADED_RATIO = float(os.getenv("HEALTH_DEGRADED_RATIO", 0.9))
+HEALTH_RECOVER_RATIO = float(os.getenv("HEALTH_RECOVER_RATIO", 0.95))
+# Heartbeats of cameras gone from the topology are dropped once stale, any others after this long
+HEALTH_HEARTBEAT_RETENTION_SECONDS = float(os.getenv("HEALTH_HEARTBEAT_RETENTION_SECONDS", 86400.0))
+FPS_DEFAULT_POINTS = int(os.getenv("FPS_DEFAULT_POINTS", 1000))  # chart points per /api/fps response
+GLOBAL_ID_FIELDS = ("global_id", "camera_id", "track_id", "zone", "timestamp", "last_seen")
+GLOBAL_ID_SCAN_ROUNDS = 5  # index reads per page before returning a short page (expired/filtered entries)
+
+# === Response Cache ===
+# Seconds each view stays fresh; registered before CORS so CORS headers are added per request
+RESPONSE_TTLS = {
+    "/api/zones": 30,
+    "/api/cameras": 5,
+    "/api/fps": 2,
+    "/api/latency": 5,
+    "/api/health": 1,
+    "/api/health/cameras": 2,
+    "/api/shards": 5,
+    "/api/tracking/summary": 2,
+    "/api/global_ids": 2,
+    "/api/track_ids": 5,
+    "/api/zone_transitions": 30,
+}
+response_cache = ResponseCache(RESPONSE_TTLS)
+app.middleware("http")(response_cache)
 
 # === CORS Middleware ===
 app.add_middleware(
@@ -29,27 +74,141 @@ app.add_middleware(
 )
 
 # === Helper ===
-def parse_fps_log(log_path: str) -> Dict[str, List[Dict[str, Any]]]:
-    if not os.path.exists(log_path):
-        raise FileNotFoundError(f"Log file not found: {log_path}")
-
-    camera_fps = defaultdict(list)
-    with open(log_path, 'r') as f:
-        for line in f:
-            if '**PERF:' in line and '{' in line:
-                try:
-                    json_start = line.index('{')
-                    payload = eval(line[json_start:])
-                    time_str = payload.get("Time")
-                    timestamp = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S").timestamp()
-                    for cam, fps in payload.items():
-                        if cam != "Time":
-                            camera_fps[cam].append({"time": timestamp, "fps": fps})
-                except Exception:
-                    continue
-    return camera_fps
+def list_latency_snapshots() -> List[str]:
+    """Per-shard latency snapshots (latency_*.json) written by the zone pipelines."""
+    return [
+        os.path.join(LOGS_DIR, f) for f in os.listdir(LOGS_DIR)
+        if f.startswith("latency_") and f.endswith(".json")
+    ]
+
+def choose_resolution(start: Optional[float], end: Optional[float]) -> str:
+    """Raw samples up to 2 h, 1-minute rollups up to 7 days, hourly beyond."""
+    if start is None:
+        return "1s"
+    span = (end or datetime.now().timestamp()) - start
+    if span <= 2 * 3600:
+        return "1s"
+    if span <= 7 * 86400:
+        return "1m"
+    return "1h"
+
+def encode_cursor(position: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        last_seen, cam_id, track_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(last_seen), str(cam_id), str(track_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def load_topology():
+    """Shared CameraTopology of the camera config, re-parsed only when the YAML changes."""
+    return get_topology(CAMERA_CONFIG_PATH)
+
+def cameras_in_zone(zone: str) -> List[str]:
+    return list(load_topology().cameras_in_zone(zone))
+
+def camera_zone(cam_id: str) -> Optional[str]:
+    """Zone of a camera in the topology; None when unknown or the config is unreadable."""
+    try:
+        return load_topology().zone_of(cam_id)
+    except Exception:
+        return None
+
+def mapping_item(cam_id: str, track_id: str, last_seen: Optional[float], mapping: tuple) -> Dict[str, Any]:
+    """API row of an unpacked (global_id, first_seen) mapping; the zone comes from the topology."""
+    global_id, first_seen = mapping
+    return {
+        "global_id": global_id,
+        "camera_id": cam_id,
+        "track_id": track_id,
+        "zone": camera_zone(cam_id) or "unknown",
+        "timestamp": first_seen,
+        "last_seen": last_seen,
+    }
+
+def heartbeat_status(beat: Optional[Dict[str, Any]], target_fps: Optional[float], now: float,
+                     previous: Optional[str] = None) -> str:
+    """
+    DEAD when the zone or the stream went quiet, DEGRADED well below the camera's target FPS, else LIVE.
+
+    A DEGRADED camera (`previous` status) only turns LIVE again once it
+    reaches HEALTH_RECOVER_RATIO of its target, so FPS jitter around the
+    threshold does not flip the status on every heartbeat.
+    """
+    if not beat or now - beat.get("time", 0) > HEALTH_HEARTBEAT_STALE_SECONDS:
+        return "DEAD"
+    last_frame = beat.get("last_frame")
+    if last_frame is None or now - last_frame > HEALTH_FRAME_STALE_SECONDS:
+        return "DEAD"
+    if target_fps:
+        ratio = HEALTH_RECOVER_RATIO if previous == "DEGRADED" else HEALTH_DEGRADED_RATIO
+        if beat.get("fps", 0.0) < target_fps * ratio:
+            return "DEGRADED"
+    return "LIVE"
+
+# camera → last computed status, for the DEGRADED hysteresis
+_camera_status: Dict[str, str] = {}
+
+async def prune_heartbeats(heartbeats: Dict[str, Dict[str, Any]], topology, now: float) -> None:
+    """HDEL heartbeats of cameras removed from the topology (once stale) or unseen for the retention window."""
+    expired = [
+        cam_id for cam_id, beat in heartbeats.items()
+        if now - beat.get("time", 0) > (HEALTH_HEARTBEAT_STALE_SECONDS if topology.zone_of(cam_id) is None
+                                         else HEALTH_HEARTBEAT_RETENTION_SECONDS)
+    ]
+    if not expired:
+        return
+    try:
+        await redis_cache.delete_camera_heartbeats(expired)
+    except Exception as e:
+        print(f"[WARN] Failed to prune heartbeats of {expired}: {e}")
+        return
+    for cam_id in expired:
+        heartbeats.pop(cam_id)
+
+async def camera_health_details() -> Dict[str, Dict[str, Any]]:
+    """Health of every configured or reporting camera, from the Redis heartbeat hash."""
+    heartbeats = await redis_cache.camera_heartbeats()
+    topology = await run_in_threadpool(load_topology)
+    now = time.time()
+    await prune_heartbeats(heartbeats, topology, now)
+    details = {}
+    for cam_id in dict.fromkeys([*topology.cameras, *heartbeats]):
+        beat = heartbeats.get(cam_id)
+        target_fps = topology.target_fps(cam_id)
+        last_frame = beat.get("last_frame") if beat else None
+        _camera_status[cam_id] = status = heartbeat_status(beat, target_fps, now, _camera_status.get(cam_id))
+        details[cam_id] = {
+            "status": status,
+            "fps": beat.get("fps") if beat else None,
+            "target_fps": target_fps,
+            "zone": beat.get("zone") if beat else topology.zone_of(cam_id),
+            "heartbeat_age": round(now - beat["time"], 2) if beat and "time" in beat else None,
+            "last_frame_age": round(now - last_frame, 2) if last_frame is not None else None,
+        }
+    for cam_id in _camera_status.keys() - details.keys():
+        del _camera_status[cam_id]
+    return details
+
+async def compute_camera_health() -> Dict[str, str]:
+    return {cam_id: detail["status"] for cam_id, detail in (await camera_health_details()).items()}
+
+live_hub = LiveHub(fps_index, compute_camera_health, redis_cache, ACTIVE_TRACK_WINDOW_SECONDS, zone_of=camera_zone)
 
 # === API Endpoints ===
+@app.on_event("startup")
+async def start_background_tasks():
+    await run_in_threadpool(fps_index.start)
+    live_hub.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await live_hub.stop()
+    fps_index.stop()
+    await redis_cache.close()
+
 @app.get("/api/ping")
 def ping():
     return {"msg": "pong"}
@@ -57,150 +216,314 @@ def ping():
 @app.get("/api/cameras")
 def get_cameras():
     try:
-        logs_dir = "/opt/nvidia/deepstream/deepstream-7.1/MCT/logs"
-        fps_files = [f for f in os.listdir(logs_dir) if f.startswith("fps_") and f.endswith(".log")]
-        all_cams = set()
-        for log_file in fps_files:
-            full_path = os.path.join(logs_dir, log_file)
-            fps_data = parse_fps_log(full_path)
-            all_cams.update(fps_data.keys())
-        return list(all_cams)
+        return fps_index.cameras()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/fps/{camera_id}")
-def get_camera_fps(camera_id: str):
+def get_camera_fps(camera_id: str, start: Optional[float] = None, end: Optional[float] = None,
+                   resolution: Optional[str] = None,
+                   points: int = Query(FPS_DEFAULT_POINTS, ge=1, le=20000), method: str = "lttb_approx"):
+    """FPS samples in [start, end], downsampled to at most `points`."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}' (use {', '.join(DOWNSAMPLE_METHODS)})")
     try:
-        from app.transition_graph import MultiZoneCameraConfig
-        config = MultiZoneCameraConfig("app/camera_config.yaml")
-        zone = config.get_zone_of_camera(camera_id)
+        zone = load_topology().zone_of(camera_id)
         if not zone:
             raise HTTPException(status_code=404, detail=f"Camera '{camera_id}' not assigned to any zone")
 
-        fps_log_path = f"/opt/nvidia/deepstream/deepstream-7.1/MCT/logs/fps_{zone}.log"
-        if not os.path.exists(fps_log_path):
-            raise HTTPException(status_code=404, detail=f"FPS log for zone '{zone}' not found")
-
-        fps_data = parse_fps_log(fps_log_path)
-        if camera_id not in fps_data:
+        resolution = resolution or choose_resolution(start, end)
+        if resolution not in ("1s", "1m", "1h"):
+            raise HTTPException(status_code=400, detail=f"Unknown resolution '{resolution}' (use 1s, 1m or 1h)")
+        fps_data = fps_index.get_arrays(camera_id, resolution, start, end)
+        if not len(fps_data["time"]):
             raise HTTPException(status_code=404, detail=f"No FPS data for camera '{camera_id}' in zone '{zone}'")
 
-        return fps_data[camera_id]
+        return rows_to_samples(fps_data, downsample(fps_data, points, method))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/latency")
+def get_latency():
+    try:
+        return read_snapshots(list_latency_snapshots())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/latency/{camera_id}")
+def get_camera_latency(camera_id: str):
+    try:
+        latency = read_snapshots(list_latency_snapshots()).get(camera_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if latency is None:
+        raise HTTPException(status_code=404, detail=f"No latency data for camera '{camera_id}'")
+    return latency
+
+@app.get("/api/stream")
+async def stream_updates(request: Request, topics: Optional[str] = None):
+    """Server-Sent Events: fps / health / global_ids deltas, plus `resync` when a full reload is needed."""
+    wanted = set(TOPICS) if not topics else {t.strip() for t in topics.split(",") if t.strip()}
+    unknown = wanted - set(TOPICS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics {sorted(unknown)} (use {', '.join(TOPICS)})")
+    subscriber = live_hub.subscribe(wanted)
+    return StreamingResponse(
+        live_hub.stream(subscriber, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    return response_cache.stats()
+
 @app.get("/api/health")
 def get_system_health():
     return {"status": "OK", "timestamp": datetime.now().isoformat()}
 
 @app.get("/api/tracking/summary")
-def get_tracking_summary():
-    r = redis_cache.redis
-    keys = r.keys("stream*")
-    total = len(keys)
-    per_cam_active = defaultdict(int)
-    for key in keys:
-        cam = key.split(":")[0]
-        per_cam_active[cam] += 1
-
-    global_keys = r.keys("global_id:*")
-    per_cam_global_ids = defaultdict(int)
-    for key in global_keys:
-        try:
-            val = r.get(key)
-            data = json.loads(val) if isinstance(val, str) else val
-            cam = data.get("camera_id")
-            if cam:
-                per_cam_global_ids[cam] += 1
-        except Exception:
-            continue
-
+async def get_tracking_summary():
+    try:
+        cameras = await redis_cache.tracked_cameras()
+        summaries = await redis_cache.camera_summaries(cameras, time.time() - ACTIVE_TRACK_WINDOW_SECONDS)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
     return {
-        "total_tracks": total,
-        "per_camera": dict(per_cam_active),
-        "global_ids": dict(per_cam_global_ids)
+        "total_tracks": sum(summary["active_tracks"] for summary in summaries.values()),
+        "per_camera": {cam: summary["active_tracks"] for cam, summary in summaries.items()},
+        "global_ids": {cam: summary["indexed_tracks"] for cam, summary in summaries.items()},
+        "counters": {cam: summary["counters"] for cam, summary in summaries.items()},
     }
 
+def summarize_transitions(pairs: Dict[str, Dict[str, float]], topology, zone: Optional[str],
+                          min_count: int) -> Dict[str, Any]:
+    """Transition matrix plus per-pair travel statistics from merged hourly hashes."""
+    edges = []
+    for pair, stats in pairs.items():
+        cams = transitions.split_pair(pair)
+        if cams is None or stats.get("n", 0) < max(1, min_count):
+            continue
+        src, dst = cams
+        src_zone, dst_zone = topology.zone_of(src), topology.zone_of(dst)
+        if zone is not None and zone not in (src_zone, dst_zone):
+            continue
+        edges.append({"from": src, "to": dst, "from_zone": src_zone, "to_zone": dst_zone,
+                      **transitions.pair_statistics(stats)})
+
+    outgoing = {}
+    for edge in edges:
+        outgoing[edge["from"]] = outgoing.get(edge["from"], 0) + edge["count"]
+    for edge in edges:
+        edge["probability"] = round(edge["count"] / outgoing[edge["from"]], 4)
+    edges.sort(key=lambda edge: edge["count"], reverse=True)
+
+    cameras = sorted({edge["from"] for edge in edges} | {edge["to"] for edge in edges})
+    ordinal = {cam: i for i, cam in enumerate(cameras)}
+    matrix = [[0] * len(cameras) for _ in cameras]
+    for edge in edges:
+        matrix[ordinal[edge["from"]]][ordinal[edge["to"]]] = edge["count"]
+    return {"cameras": cameras, "matrix": matrix, "transitions": edges}
+
 @app.get("/api/zone_transitions")
-def get_zone_transitions():
-    return {"transitions": []}
+async def get_zone_transitions(start: Optional[float] = None, end: Optional[float] = None,
+                               zone: Optional[str] = None, bucket: Optional[str] = None,
+                               min_count: int = Query(1, ge=1)):
+    """
+    Camera-to-camera transition counts and travel times in [start, end] (default: last 24 h).
+
+    `zone` keeps pairs entering or leaving the zone; `bucket` ("hour" or "day")
+    adds per-bucket transition counts for trend charts.
+    """
+    if bucket not in (None, "hour", "day"):
+        raise HTTPException(status_code=400, detail=f"Unknown bucket '{bucket}' (use hour or day)")
+    end = end or time.time()
+    start = start if start is not None else end - 86400
+    first_hour = int(max(start, end - TRANSITION_RETENTION_DAYS * 86400) // 3600)
+    hours = list(range(first_hour, int(end // 3600) + 1))
+    try:
+        hashes = await redis_cache.hgetall_many([transitions.transitions_key(hour) for hour in hours])
+        topology = await run_in_threadpool(load_topology)
+        summary = summarize_transitions(transitions.merge_hours(hashes), topology, zone, min_count)
+        if bucket:
+            period = 3600 if bucket == "hour" else 86400
+            series = {}
+            for hour, fields in zip(hours, hashes):
+                if not fields:
+                    continue
+                kept = summarize_transitions(transitions.merge_hours([fields]), topology, zone, 1)["transitions"]
+                bucket_start = hour * 3600 // period * period
+                series[bucket_start] = series.get(bucket_start, 0) + sum(edge["count"] for edge in kept)
+            summary["buckets"] = [{"start": ts, "count": count} for ts, count in sorted(series.items())]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "start": start,
+        "end": end,
+        "histogram_bounds_s": transitions.TRANSITION_HISTOGRAM_BOUNDS,
+        **summary,
+    }
 
 @app.get("/api/health/cameras")
-def get_camera_health():
+async def get_camera_health(by_shard: bool = False, detail: bool = False):
+    """LIVE / DEGRADED / DEAD per camera; `detail` adds fps, target and heartbeat ages."""
     try:
-        logs_dir = "/opt/nvidia/deepstream/deepstream-7.1/MCT/logs"
-        fps_files = [f for f in os.listdir(logs_dir) if f.startswith("fps_") and f.endswith(".log")]
-        now = datetime.now().timestamp()
-        health = {}
-
-        for log_file in fps_files:
-            full_path = os.path.join(logs_dir, log_file)
-            fps_data = parse_fps_log(full_path)
-            for cam, logs in fps_data.items():
-                try:
-                    last_entry = logs[-1]
-                    last_time = last_entry["time"]
-                    last_fps = last_entry["fps"]
-                    if last_fps == 0.0:
-                        health[cam] = "DEAD"
-                    else:
-                        health[cam] = "LIVE"
-                except Exception as e:
-                    print(f"[ERROR] Health check failed for {cam}: {e}")
-                    health[cam] = "DEAD"
-        return health
+        details = await camera_health_details()
+        health = details if detail else {cam_id: d["status"] for cam_id, d in details.items()}
+        if not by_shard:
+            return health
+        per_shard = {}
+        for shard in load_shard_layout():
+            per_shard[shard["name"]] = {cam: health.get(cam, "DEAD") for cam in shard["cameras"]}
+        return per_shard
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/shards")
+async def get_shards():
+    try:
+        health = await compute_camera_health()
+        shards = []
+        for shard in load_shard_layout():
+            statuses = [health.get(cam, "DEAD") for cam in shard["cameras"]]
+            shards.append({
+                **shard,
+                "live_cameras": statuses.count("LIVE"),
+                "degraded_cameras": statuses.count("DEGRADED"),
+                "dead_cameras": statuses.count("DEAD"),
+            })
+        return {"shards": shards}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/zones")
 def get_zones():
-    from app.transition_graph import MultiZoneCameraConfig
-    camera_config = MultiZoneCameraConfig("app/camera_config.yaml")
-    zone_map = {}
-    for cam_id in camera_config.camera_uri_map:
-        zone = camera_config.get_zone_of_camera(cam_id)
-        zone_map.setdefault(zone, []).append(cam_id)
-    return zone_map
+    return load_topology().zone_map()
+
+async def _global_id_history_page(global_id: int, cameras: Optional[List[str]], zone: Optional[str],
+                                  since: Optional[float], until: Optional[float],
+                                  after: Optional[tuple], limit: int) -> tuple:
+    """One page of a single global ID's mappings, from its (capped) track history (no index scan)."""
+    tracks = [
+        (last_seen, cam_id, track_id)
+        for last_seen, cam_id, track_id, *_ in await redis_cache.track_history(global_id, since=since, until=until)
+        if cameras is None or cam_id in cameras
+    ]
+    mappings = await redis_cache.get_mappings([(cam, track) for _, cam, track in tracks])
+    rows = []
+    for (last_seen, cam_id, track_id), mapping in zip(tracks, mappings):
+        if mapping is None:
+            continue
+        item = mapping_item(cam_id, track_id, last_seen, mapping)
+        if zone is not None and item["zone"] != zone:
+            continue
+        rows.append(((-last_seen, cam_id, track_id), (last_seen, cam_id, track_id), item))
+    rows.sort(key=lambda row: row[0])
+    if after is not None:
+        rows = [row for row in rows if row[0] > (-after[0], after[1], after[2])]
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1][1]) if len(rows) > limit else None
+    return [item for _, _, item in page], next_cursor
 
 @app.get("/api/global_ids")
-def get_active_global_ids():
+async def get_active_global_ids(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    camera_id: Optional[List[str]] = Query(None),
+    zone: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    global_id: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Mappings ordered by last seen (newest first), one page at a time.
+
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    `fields` is a comma-separated projection of GLOBAL_ID_FIELDS.
+    """
+    projection = GLOBAL_ID_FIELDS if not fields else tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = set(projection) - set(GLOBAL_ID_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {sorted(unknown)} (use {', '.join(GLOBAL_ID_FIELDS)})")
+    after = decode_cursor(cursor) if cursor else None
+
     try:
-        r = redis_cache.redis
-        keys = r.keys("global_id:*")
-        global_ids = []
-        for key in keys:
-            value = r.get(key)
-            if not value:
-                continue
-            try:
-                data = json.loads(value)
-                global_ids.append({
-                    "global_id": data.get("global_id", "unknown"),
-                    "camera_id": data.get("camera_id", "unknown"),
-                    "track_id": data.get("track_id", "unknown"),
-                    "zone": data.get("zone", "unknown"),
-                    "timestamp": data.get("timestamp", 0),
-                    "raw": data
-                })
-            except Exception:
-                parts = key.split(":")
-                global_ids.append({
-                    "global_id": parts[-1],
-                    "camera_id": parts[1] if len(parts) > 2 else "unknown",
-                    "track_id": parts[2] if len(parts) > 2 else "unknown",
-                    "zone": "unknown",
-                    "timestamp": 0,
-                    "raw": value
-                })
-        global_ids.sort(key=lambda x: x["timestamp"], reverse=True)
-        return {"count": len(global_ids), "items": global_ids}
+        cameras = list(camera_id) if camera_id else None
+        if zone is not None:
+            zone_cameras = await run_in_threadpool(cameras_in_zone, zone)
+            if zone_cameras:
+                cameras = [cam for cam in (cameras or zone_cameras) if cam in zone_cameras]
+
+        if global_id is not None:
+            items, next_cursor = await _global_id_history_page(global_id, cameras, zone, since, until, after, limit)
+        else:
+            if cameras is None:
+                cameras = await redis_cache.tracked_cameras()
+            items, next_cursor = [], None
+            for _ in range(GLOBAL_ID_SCAN_ROUNDS):
+                wanted = limit - len(items)
+                entries = await redis_cache.recent_tracks(cameras, wanted, since, until, after)
+                exhausted = len(entries) < wanted  # so every camera returned fewer than asked
+                entries.sort(key=lambda entry: (-entry[0], entry[1], entry[2]))
+                entries = entries[:wanted]
+                if not entries:
+                    next_cursor = None
+                    break
+                mappings = await redis_cache.get_mappings([(cam, track) for _, cam, track in entries])
+                for (last_seen, cam, track), mapping in zip(entries, mappings):
+                    if mapping is None:
+                        continue  # mapping expired; the writer's sweep drops the index entry too
+                    item = mapping_item(cam, track, last_seen, mapping)
+                    if zone is None or item["zone"] == zone:
+                        items.append(item)
+                after = entries[-1]
+                next_cursor = None if exhausted else encode_cursor(after)
+                if exhausted or len(items) >= limit:
+                    break
+
+        return {
+            "count": len(items),
+            "items": [{field: item[field] for field in projection} for item in items],
+            "next_cursor": next_cursor,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/track_ids/{global_id}")
-def get_track_ids(global_id: int):
-    track_ids = redis_cache.get_all_track_ids(global_id)
-    return {"global_id": global_id, "track_ids": track_ids}
+async def get_track_ids(global_id: int, limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None,
+                        since: Optional[float] = None, until: Optional[float] = None):
+    """
+    Tracks of a global ID last seen in [since, until], newest first, one page at a time.
+
+    Each (camera, track) appears once with its first and last seen time and,
+    once the track has ended, its detection count.
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    """
+    after = None
+    if cursor:
+        last_seen, cam_id, track_id = decode_cursor(cursor)
+        after = (last_seen, f"{cam_id}:{track_id}")
+    try:
+        history = await redis_cache.track_history(global_id, limit + 1, since, until, after)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    page = history[:limit]
+    next_cursor = encode_cursor(page[-1][:3]) if len(history) > limit else None
+    return {
+        "global_id": global_id,
+        "track_ids": [f"{cam_id}:{track_id}" for _, cam_id, track_id, *_ in page],
+        "tracks": [
+            {"camera_id": cam_id, "track_id": track_id, "first_seen": first_seen, "last_seen": last_seen,
+             "detections": detections}
+            for last_seen, cam_id, track_id, first_seen, detections in page
+        ],
+        "next_cursor": next_cursor,
+    }
 
 # === Entry Point ===
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""
+downsample.py
+
+Shape-preserving downsampling of FPS series for charting.
+
+Both methods work on the stored time/FPS columns and return row indices,
+so whatever fields a sample carries (rollup min/max/p5/count included)
+pass through unchanged and only the selected rows become dicts:
+
+- lttb_approx : Approximate Largest-Triangle-Three-Buckets. Keeps the
+                visual shape of the line; two vectorized passes over all
+                buckets at once instead of the sequential exact algorithm
+                (most, not all, picks match it).
+- minmax      : Min and max of each equal-time bucket, fully vectorized.
+                Guarantees FPS drops are never hidden.
+
+Author: Debjit
+"""
+
+from typing import Dict
+
+import numpy as np
+
+METHODS = ("lttb_approx", "minmax")
+
+
+def _edge_indices(n: int, points: int) -> np.ndarray:
+    """The first sample, and the last one too when two points fit."""
+    return np.array([0] if points < 2 else [0, n - 1], dtype=np.int64)
+
+
+def _largest_triangles(x: np.ndarray, y: np.ndarray, candidates: np.ndarray, valid: np.ndarray,
+                       anchor_x: np.ndarray, anchor_y: np.ndarray, next_x: np.ndarray, next_y: np.ndarray) -> np.ndarray:
+    """Per bucket (row of `candidates`), the candidate spanning the largest triangle with its anchor and the next bucket."""
+    cx, cy = x[candidates], y[candidates]
+    # Twice the triangle area (anchor, candidate, next bucket average)
+    area = np.abs(
+        (anchor_x[:, None] - next_x[:, None]) * (cy - anchor_y[:, None])
+        - (anchor_x[:, None] - cx) * (next_y[:, None] - anchor_y[:, None])
+    )
+    area[~valid] = -1.0
+    return candidates[np.arange(len(candidates)), np.argmax(area, axis=1)]
+
+
+def lttb_approx_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return _edge_indices(n, points)
+
+    # Interior points split into points - 2 non-empty buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    lengths = stops - starts
+    mean_x = np.add.reduceat(x[:n - 1], starts) / lengths
+    mean_y = np.add.reduceat(y[:n - 1], starts) / lengths
+    next_x, next_y = np.r_[mean_x[1:], x[-1]], np.r_[mean_y[1:], y[-1]]
+
+    # Buckets as rows of a padded candidate matrix (about 2n cells)
+    offsets = np.arange(lengths.max())
+    candidates = starts[:, None] + offsets[None, :]
+    valid = offsets[None, :] < lengths[:, None]
+    candidates = np.where(valid, candidates, starts[:, None])
+
+    # Classic LTTB anchors each bucket on the point picked in the previous one, which
+    # is sequential. Pick once against the previous bucket's average, then again
+    # against those picks: two vectorized passes instead of one Python step per point.
+    picks = _largest_triangles(x, y, candidates, valid, np.r_[x[0], mean_x[:-1]], np.r_[y[0], mean_y[:-1]],
+                               next_x, next_y)
+    anchors = np.r_[0, picks[:-1]]
+    picks = _largest_triangles(x, y, candidates, valid, x[anchors], y[anchors], next_x, next_y)
+    return np.r_[0, picks, n - 1]
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 2:
+        return _edge_indices(n, points)
+
+    buckets = max(1, points // 2)
+    span = x[-1] - x[0]
+    if span <= 0:
+        bucket = np.arange(n) * buckets // n
+    else:
+        bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1)
+    # Sort by (bucket, value): the first entry of a bucket is its min, the last its max
+    order = np.lexsort((y, bucket))
+    sorted_buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def downsample(arrays: Dict[str, np.ndarray], points: int, method: str = "lttb_approx") -> np.ndarray:
+    """Indices of at most `points` (>= 1) rows of a time-ordered {"time", "fps", ...} column set."""
+    x = arrays["time"]
+    if len(x) <= points:
+        return np.arange(len(x))
+    y = arrays["fps"].astype(np.float64)
+    return lttb_approx_indices(x, y, points) if method == "lttb_approx" else minmax_indices(x, y, points)
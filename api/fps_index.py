@@ -0,0 +1,327 @@
+"""
+fps_index.py
+
+In-memory, time-indexed FPS series for the dashboard API.
+
+A background thread tails every FPS log in LOGS_DIR (binary raw logs, their
+1m/1h rollups and legacy `**PERF: {json}` text logs). Each reader remembers
+its byte offset and inode, so a poll only parses records appended since the
+last one; when a log is rotated the remainder of the old generation is read
+from `path.1` before starting on the new file. Endpoints answer from memory
+with a binary search over the per-camera timestamps, in O(result)
+regardless of log size. Series are stored as columnar NumPy blocks, not
+one dict per sample.
+
+Author: Debjit
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.fps_store import FpsLogReader, RollupLogReader, rotated_paths
+from app.fps_retention import FPS_RAW_KEEP, FPS_ROLLUP_KEEP
+
+FPS_INDEX_POLL_SECONDS = float(os.getenv("FPS_INDEX_POLL_SECONDS", 1.0))
+FPS_INDEX_RAW_SECONDS = int(os.getenv("FPS_INDEX_RAW_SECONDS", 3 * 3600))
+FPS_INDEX_ROLLUP_SECONDS = int(os.getenv("FPS_INDEX_ROLLUP_SECONDS", 31 * 86400))
+
+# Samples older than this are dropped from memory (None: kept for the life of the process)
+RETENTION = {"1s": FPS_INDEX_RAW_SECONDS, "1m": FPS_INDEX_ROLLUP_SECONDS, "1h": None}
+
+
+class LegacyFpsLogReader:
+    """Incremental reader for legacy `fps_*.log` text logs; only whole lines are consumed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.inode: Optional[int] = None
+
+    def read_new(self) -> List[Tuple[float, str, float]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size <= self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+
+        records = []
+        for line in data[:end].decode(errors="replace").splitlines():
+            if "**PERF:" not in line or "{" not in line:
+                continue
+            try:
+                payload = json.loads(line[line.index("{"):])
+                timestamp = datetime.strptime(payload.pop("Time"), "%Y-%m-%d %H:%M:%S").timestamp()
+                records.extend((timestamp, cam, float(fps)) for cam, fps in payload.items())
+            except (ValueError, KeyError, TypeError):
+                continue
+        return records
+
+
+# Columns of each resolution; times stay float64, values are stored as float32 (2-decimal FPS)
+RAW_FIELDS = (("time", np.float64), ("fps", np.float32))
+ROLLUP_FIELDS = (("time", np.float64), ("fps", np.float32), ("min", np.float32), ("max", np.float32),
+                 ("p5", np.float32), ("count", np.int32))
+SERIES_INITIAL_CAPACITY = 1024
+
+
+class CameraSeries:
+    """
+    Samples of one camera at one resolution, ordered by time.
+
+    Stored columnar: one preallocated NumPy block per field, with live rows
+    in [head, tail). Trimming only moves `head`; the block is compacted or
+    grown when an append reaches its end. Response dicts are only built for
+    the rows a query returns.
+    """
+
+    def __init__(self, fields=RAW_FIELDS):
+        self.fields = fields
+        self.names = tuple(name for name, _ in fields)
+        self.columns = {name: np.empty(SERIES_INITIAL_CAPACITY, dtype=dtype) for name, dtype in fields}
+        self.head = 0
+        self.tail = 0
+
+    def __len__(self) -> int:
+        return self.tail - self.head
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.columns["time"][self.head:self.tail]
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self.columns["time"])
+        if self.tail + rows <= capacity:
+            return
+        live = len(self)
+        if live + rows > capacity // 2:
+            capacity = max(2 * capacity, live + rows)
+        for name, dtype in self.fields:
+            column = np.empty(capacity, dtype=dtype)
+            column[:live] = self.columns[name][self.head:self.tail]
+            self.columns[name] = column
+        self.head, self.tail = 0, live
+
+    def extend(self, block: Dict[str, np.ndarray]) -> None:
+        """Append rows given as {field: array}; rows older than the newest stored one are merged in order."""
+        rows = len(block["time"])
+        if not rows:
+            return
+        times = block["time"]
+        ordered = bool(np.all(times[1:] >= times[:-1])) and (not len(self) or times[0] >= self.times[-1])
+        if not ordered:
+            # Another log for the same camera (e.g. legacy + binary) may lag behind: merge, stable by time
+            merged = {name: np.concatenate([self.columns[name][self.head:self.tail], block[name]]) for name in self.names}
+            order = np.argsort(merged["time"], kind="stable")
+            self.head = self.tail = 0
+            block, rows = {name: column[order] for name, column in merged.items()}, len(order)
+        self._reserve(rows)
+        for name in self.names:
+            self.columns[name][self.tail:self.tail + rows] = block[name]
+        self.tail += rows
+
+    def trim(self, cutoff: float) -> None:
+        if len(self) and self.times[0] < cutoff:
+            self.head += int(np.searchsorted(self.times, cutoff, side="left"))
+
+    def bounds(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        """Absolute [lo, hi) row range of samples with time in [start, end]."""
+        times = self.times
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side="right"))
+        return self.head + lo, self.head + max(lo, hi)
+
+    def arrays(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Copies of every column for [start, end] (safe to use after the lock is released)."""
+        lo, hi = self.bounds(start, end)
+        return {name: self.columns[name][lo:hi].copy() for name in self.names}
+
+    def range(self, start: Optional[float], end: Optional[float]) -> List[Dict[str, Any]]:
+        return rows_to_samples(self.arrays(start, end))
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        if not len(self):
+            return None
+        return rows_to_samples({name: self.columns[name][self.tail - 1:self.tail] for name in self.names})[0]
+
+
+def rows_to_samples(arrays: Dict[str, np.ndarray], indices: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """Response dicts of the selected rows (all of them without `indices`)."""
+    if indices is not None:
+        arrays = {name: column[indices] for name, column in arrays.items()}
+    columns = []
+    for name, column in arrays.items():
+        if name == "time":
+            columns.append(column.tolist())
+        elif column.dtype.kind == "f":
+            columns.append([round(value, 2) for value in column.tolist()])
+        else:
+            columns.append(column.tolist())
+    names = list(arrays)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def _raw_columns(records: List[tuple]) -> Dict[str, Dict[str, np.ndarray]]:
+    """(ts, camera, fps) records → camera → columns."""
+    by_camera: Dict[str, List[tuple]] = {}
+    for ts, name, fps in records:
+        by_camera.setdefault(name, []).append((ts, fps))
+    return {
+        name: {field: np.array(column, dtype=dtype) for column, (field, dtype) in zip(zip(*rows), RAW_FIELDS)}
+        for name, rows in by_camera.items()
+    }
+
+
+def _rollup_columns(records: List[tuple]) -> Dict[str, Dict[str, np.ndarray]]:
+    """(ts, camera, min, avg, max, p5, count) records → camera → columns."""
+    by_camera: Dict[str, List[tuple]] = {}
+    for ts, name, low, avg, high, p5, count in records:
+        by_camera.setdefault(name, []).append((ts, avg, low, high, p5, count))
+    return {
+        name: {field: np.array(column, dtype=dtype) for column, (field, dtype) in zip(zip(*rows), ROLLUP_FIELDS)}
+        for name, rows in by_camera.items()
+    }
+
+
+def classify(filename: str) -> Optional[Tuple[str, type, int]]:
+    """(resolution, reader class, rotated generations kept) of a live FPS log, None for anything else."""
+    if filename.startswith("fps_") and filename.endswith(".bin"):
+        return "1s", FpsLogReader, FPS_RAW_KEEP
+    if filename.startswith("fps_") and filename.endswith(".log"):
+        return "1s", LegacyFpsLogReader, 0
+    for resolution in ("1m", "1h"):
+        if filename.startswith(f"fps{resolution}_") and filename.endswith(".bin"):
+            return resolution, RollupLogReader, FPS_ROLLUP_KEEP
+    return None
+
+
+class FpsIndex:
+    """
+    Keeps every camera's FPS series in memory, refreshed by a background tailer.
+
+    Attributes:
+        logs_dir (str): Directory holding the zone FPS logs.
+        series (Dict[str, Dict[str, CameraSeries]]): resolution → camera → series.
+    """
+
+    def __init__(self, logs_dir: str, poll_interval: float = FPS_INDEX_POLL_SECONDS):
+        self.logs_dir = logs_dir
+        self.poll_interval = poll_interval
+        self.series: Dict[str, Dict[str, CameraSeries]] = {resolution: {} for resolution in RETENTION}
+        self.readers: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ─── Tailing ───────────────────────────────────────────────
+    def _ingest(self, resolution: str, records: List[tuple]) -> None:
+        if not records:
+            return
+        fields, blocks = (RAW_FIELDS, _raw_columns(records)) if resolution == "1s" else (ROLLUP_FIELDS, _rollup_columns(records))
+        with self.lock:
+            cameras = self.series[resolution]
+            for name, block in blocks.items():
+                series = cameras.get(name)
+                if series is None:
+                    series = cameras[name] = CameraSeries(fields)
+                series.extend(block)
+
+    def _read_rotated(self, path: str, reader) -> List[tuple]:
+        """Finish a generation that was rotated to `path.1` since the last poll."""
+        try:
+            if reader.inode is None or os.stat(path).st_ino == reader.inode:
+                return []
+            if os.stat(f"{path}.1").st_ino != reader.inode:
+                return []
+        except FileNotFoundError:
+            return []
+        previous = type(reader)(f"{path}.1")
+        previous.inode, previous.offset = reader.inode, reader.offset
+        return previous.read_new()
+
+    def refresh(self) -> None:
+        """Read whatever was appended to each log since the previous refresh."""
+        try:
+            filenames = os.listdir(self.logs_dir)
+        except FileNotFoundError:
+            return
+        for filename in sorted(filenames):
+            kind = classify(filename)
+            if kind is None:
+                continue
+            resolution, reader_cls, keep = kind
+            path = os.path.join(self.logs_dir, filename)
+            try:
+                reader = self.readers.get(path)
+                if reader is None:
+                    # First sight: load the older generations once, then tail the live file
+                    for rotated in rotated_paths(path, keep)[:-1]:
+                        self._ingest(resolution, reader_cls(rotated).read_new())
+                    reader = self.readers[path] = reader_cls(path)
+                else:
+                    self._ingest(resolution, self._read_rotated(path, reader))
+                self._ingest(resolution, reader.read_new())
+            except Exception as e:
+                print(f"[WARN] Failed to index FPS log {path}: {e}")
+        self._trim()
+
+    def _trim(self) -> None:
+        now = time.time()
+        with self.lock:
+            for resolution, keep_seconds in RETENTION.items():
+                if keep_seconds is None:
+                    continue
+                for series in self.series[resolution].values():
+                    series.trim(now - keep_seconds)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self.refresh()
+            self._thread = threading.Thread(target=self._run, name="fps-index", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ─── Queries ───────────────────────────────────────────────
+    def cameras(self) -> List[str]:
+        with self.lock:
+            return sorted({cam for cameras in self.series.values() for cam in cameras})
+
+    def get_range(self, camera_id: str, resolution: str = "1s",
+                  start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        return rows_to_samples(self.get_arrays(camera_id, resolution, start, end))
+
+    def get_arrays(self, camera_id: str, resolution: str = "1s",
+                   start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Columns (time, fps[, min, max, p5, count]) of a camera's samples in [start, end]; empty arrays if unknown."""
+        with self.lock:
+            series = self.series[resolution].get(camera_id)
+            if series is None:
+                fields = RAW_FIELDS if resolution == "1s" else ROLLUP_FIELDS
+                return {name: np.empty(0, dtype=dtype) for name, dtype in fields}
+            return series.arrays(start, end)
+
+    def latest(self) -> Dict[str, Dict[str, Any]]:
+        """Last raw sample of every camera."""
+        with self.lock:
+            return {cam: series.last() for cam, series in self.series["1s"].items() if len(series)}
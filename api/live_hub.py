@@ -0,0 +1,199 @@
+"""
+live_hub.py
+
+Server-Sent Events fan-out for the dashboard API.
+
+One background task computes deltas once per tick for all subscribers:
+- fps        : FPS samples appended since the previous tick, per camera
+- health     : cameras whose health status changed
+- global_ids : (cam, track) mappings that became active or expired
+
+Each subscriber has a bounded queue and a set of topics; topics nobody
+subscribes to are not computed. A subscriber that falls behind gets its
+backlog dropped and a `resync` event, telling it to do a full reload.
+
+Author: Debjit
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+LIVE_TICK_SECONDS = float(os.getenv("LIVE_TICK_SECONDS", 1.0))
+LIVE_CLIENT_QUEUE = int(os.getenv("LIVE_CLIENT_QUEUE", 256))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", 15.0))
+LIVE_GLOBAL_ID_LIMIT = int(os.getenv("LIVE_GLOBAL_ID_LIMIT", 1000))  # active tracks tracked per camera
+
+TOPICS = ("fps", "health", "global_ids")
+
+
+class Subscriber:
+    def __init__(self, topics: Set[str]):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_CLIENT_QUEUE)
+
+    def offer(self, event: Tuple[int, str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog, the client reloads in full
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((event[0], "resync", {}))
+
+
+class LiveHub:
+    """
+    Computes dashboard deltas once per tick and fans them out to SSE subscribers.
+
+    Attributes:
+        fps_index: FpsIndex the FPS samples are read from.
+        health_fn (Callable): Returns {camera_id: status}; may be a coroutine function.
+        redis_cache: AsyncRedisCache holding the active-track indexes and mappings.
+        active_window (float): Seconds since last seen for a track to count as active.
+        zone_of (Callable): Camera ID → zone name (or None) for the global_ids topic.
+    """
+
+    def __init__(self, fps_index, health_fn: Callable, redis_cache, active_window: float,
+                 tick_seconds: float = LIVE_TICK_SECONDS, zone_of: Optional[Callable] = None):
+        self.fps_index = fps_index
+        self.health_fn = health_fn
+        self.redis_cache = redis_cache
+        self.active_window = active_window
+        self.zone_of = zone_of or (lambda cam_id: None)
+        self.tick_seconds = tick_seconds
+        self.subscribers: Set[Subscriber] = set()
+        self.event_id = 0
+        self.fps_cursor: Dict[str, float] = {}
+        self.health: Optional[Dict[str, str]] = None
+        self.active_tracks: Optional[Set[Tuple[str, str]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ─── Subscription ──────────────────────────────────────────
+    def subscribe(self, topics: Set[str]) -> Subscriber:
+        subscriber = Subscriber(topics)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def wanted(self, topic: str) -> bool:
+        return any(topic in subscriber.topics for subscriber in self.subscribers)
+
+    def publish(self, topic: str, payload: Any) -> None:
+        self.event_id += 1
+        for subscriber in list(self.subscribers):
+            if topic in subscriber.topics:
+                subscriber.offer((self.event_id, topic, payload))
+
+    # ─── Delta computation ─────────────────────────────────────
+    def fps_delta(self) -> Dict[str, list]:
+        delta = {}
+        for cam_id in self.fps_index.cameras():
+            after = self.fps_cursor.get(cam_id)
+            samples = self.fps_index.get_range(cam_id, "1s", start=after)
+            if after is not None:
+                samples = [sample for sample in samples if sample["time"] > after]
+            if samples:
+                self.fps_cursor[cam_id] = samples[-1]["time"]
+                if after is not None:  # the first tick only sets the cursor
+                    delta[cam_id] = samples
+        return delta
+
+    async def health_delta(self) -> Dict[str, str]:
+        health = self.health_fn()
+        if inspect.isawaitable(health):
+            health = await health
+        previous, self.health = self.health, dict(health)
+        if previous is None:
+            return {}
+        changes = {cam: status for cam, status in health.items() if previous.get(cam) != status}
+        changes.update({cam: "UNKNOWN" for cam in previous if cam not in health})
+        return changes
+
+    async def global_id_delta(self) -> Dict[str, list]:
+        cameras = await self.redis_cache.tracked_cameras()
+        entries = await self.redis_cache.recent_tracks(
+            cameras, LIVE_GLOBAL_ID_LIMIT, since=time.time() - self.active_window
+        )
+        active = {(cam_id, track_id) for _, cam_id, track_id in entries}
+        previous, self.active_tracks = self.active_tracks, active
+        if previous is None:
+            return {}
+        added = sorted(active - previous)
+        expired = sorted(previous - active)
+        items = []
+        if added:
+            mappings = await self.redis_cache.get_mappings(added)
+            for (cam_id, track_id), mapping in zip(added, mappings):
+                if mapping is not None:
+                    global_id, first_seen = mapping
+                    items.append({
+                        "global_id": global_id,
+                        "camera_id": cam_id,
+                        "track_id": track_id,
+                        "zone": self.zone_of(cam_id) or "unknown",
+                        "timestamp": first_seen,
+                    })
+        return {
+            "added": items,
+            "expired": [{"camera_id": cam_id, "track_id": track_id} for cam_id, track_id in expired],
+        }
+
+    async def tick(self) -> None:
+        if self.wanted("fps"):
+            delta = self.fps_delta()
+            if delta:
+                self.publish("fps", delta)
+        else:
+            self.fps_cursor.clear()
+        if self.wanted("health"):
+            changes = await self.health_delta()
+            if changes:
+                self.publish("health", changes)
+        else:
+            self.health = None
+        if self.wanted("global_ids"):
+            delta = await self.global_id_delta()
+            if delta.get("added") or delta.get("expired"):
+                self.publish("global_ids", delta)
+        else:
+            self.active_tracks = None
+
+    async def _run(self) -> None:
+        while True:
+            began = time.monotonic()
+            if self.subscribers:
+                try:
+                    await self.tick()
+                except Exception as e:
+                    print(f"[WARN] Live update tick failed: {e}")
+            await asyncio.sleep(max(0.0, self.tick_seconds - (time.monotonic() - began)))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # ─── SSE encoding ──────────────────────────────────────────
+    async def stream(self, subscriber: Subscriber, is_disconnected: Callable):
+        """Yield SSE frames for `subscriber` until the client goes away."""
+        try:
+            yield f"retry: 3000\nevent: hello\ndata: {json.dumps({'topics': sorted(subscriber.topics)})}\n\n"
+            while not await is_disconnected():
+                try:
+                    event_id, topic, payload = await asyncio.wait_for(subscriber.queue.get(), LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event_id}\nevent: {topic}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
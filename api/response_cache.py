@@ -0,0 +1,147 @@
+"""
+response_cache.py
+
+In-process GET response cache for the dashboard API.
+
+- Per-endpoint TTLs, matched by longest path prefix; paths without a TTL are
+  never cached.
+- Single flight: concurrent identical requests (same path and query) wait
+  for one computation and share its response.
+- Every cached response carries an ETag; a matching If-None-Match is
+  answered with an empty 304.
+
+Only 200 responses are stored. N dashboards polling the same views cost
+about one computation per TTL.
+
+Author: Debjit
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", 1024))
+
+# Headers recomputed for every reply instead of being replayed from the cache
+_VOLATILE_HEADERS = {"content-length", "etag", "cache-control", "x-cache"}
+
+
+class CachedResponse:
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes, media_type: Optional[str], ttl: float):
+        self.status_code = status_code
+        self.headers = {k: v for k, v in headers.items() if k.lower() not in _VOLATILE_HEADERS}
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.ttl = ttl
+        self.expires = time.monotonic() + ttl
+
+    def render(self, request: Request, state: str) -> Response:
+        headers = {
+            **self.headers,
+            "ETag": self.etag,
+            "Cache-Control": f"max-age={int(self.ttl)}",
+            "X-Cache": state,
+        }
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, status_code=self.status_code, headers=headers, media_type=self.media_type)
+
+
+class ResponseCache:
+    """
+    HTTP middleware; install with `app.middleware("http")(ResponseCache(ttls))`.
+
+    Attributes:
+        ttls (Dict[str, float]): Path prefix → seconds a response stays fresh.
+        entries (OrderedDict): (path, query) → CachedResponse, least recently used first.
+        inflight (Dict[tuple, asyncio.Future]): Requests currently being computed.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = API_CACHE_MAX_ENTRIES):
+        self.ttls = ttls
+        self.prefixes = sorted(ttls, key=len, reverse=True)
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+        self.inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, path: str) -> Optional[float]:
+        for prefix in self.prefixes:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return self.ttls[prefix]
+        return None
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[CachedResponse]:
+        cached = self.entries.get(key)
+        if cached is None:
+            return None
+        if cached.expires <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return cached
+
+    def _store(self, key: Tuple[str, str], cached: CachedResponse) -> None:
+        self.entries[key] = cached
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def __call__(self, request: Request, call_next):
+        ttl = self.ttl_for(request.url.path) if request.method == "GET" else None
+        if not ttl:
+            return await call_next(request)
+
+        key = (request.url.path, str(request.query_params))
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached.render(request, "HIT")
+
+        leader = self.inflight.get(key)
+        if leader is not None:
+            self.coalesced += 1
+            cached = await asyncio.shield(leader)
+            if cached is not None:
+                return cached.render(request, "COALESCED")
+            return await call_next(request)  # the leader's response was not cacheable
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            cached = CachedResponse(response.status_code, dict(response.headers), body, response.media_type, ttl)
+            if response.status_code == 200:
+                self._store(key, cached)
+                future.set_result(cached)
+                return cached.render(request, "MISS")
+            future.set_result(None)
+            return Response(content=body, status_code=response.status_code,
+                            headers=cached.headers, media_type=response.media_type)
+        except BaseException:
+            if not future.done():
+                future.set_result(None)
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
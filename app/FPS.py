@@ -1,21 +1,28 @@
 import time
-import json
 import os
+from collections import deque
 from threading import Lock
 from datetime import datetime
 
+from app.fps_retention import FpsRetention
+
+FPS_RING_SIZE = int(os.getenv("FPS_RING_SIZE", 3600))  # in-memory samples kept per stream
+PERF_STDOUT = os.getenv("PERF_STDOUT", "1") not in ("0", "false", "False", "")
+
 
 class GETFPS:
     def __init__(self, stream_id: str):
         self.stream_id = stream_id
         self.start_time = time.time()
         self.frame_count = 0
+        self.last_frame = None
         self.is_first = True
         self.lock = Lock()
 
     def update_fps(self):
         now = time.time()
         with self.lock:
+            self.last_frame = now
             if self.is_first:
                 self.start_time = now
                 self.is_first = False
@@ -38,53 +45,86 @@ class GETFPS:
 
 
 class PERF_DATA:
-    def __init__(self, num_streams=1, log_path=None, stream_names=None):
+    """
+    Per-stream FPS counters, sampled once per second.
+
+    Samples are kept in an in-memory ring buffer per stream and handed to
+    FpsRetention, which appends them to a binary log kept open for the process
+    lifetime and maintains 1-minute / 1-hour rollups. History survives restarts.
+    Each sample is also handed to an optional CameraHeartbeatPublisher.
+    """
+
+    def __init__(self, num_streams=1, log_path=None, stream_names=None, ring_size=FPS_RING_SIZE,
+                 heartbeat_publisher=None):
         self.log_path = log_path
+        self.heartbeat_publisher = heartbeat_publisher
         self.lock = Lock()
         self.perf_dict = {}
         self.all_stream_fps = {}
-        # 💥 Remove old log file if exists
-        if self.log_path and os.path.exists(self.log_path):
-            os.remove(self.log_path)
+        self.ring_size = ring_size
+        self.history = {}
+        self.retention = None
+        if self.log_path:
+            try:
+                self.retention = FpsRetention(self.log_path, expected_streams=len(stream_names or []) or num_streams)
+            except Exception as e:
+                print(f"[ERROR] Failed to open FPS log: {e}")
 
         # Allow custom stream names like ['camA', 'camB']
         if stream_names:
             for name in stream_names:
-                self.all_stream_fps[name] = GETFPS(name)
+                self._register(name)
         else:
             for i in range(num_streams):
-                name = f"stream{i}"
-                self.all_stream_fps[name] = GETFPS(name)
+                self._register(f"stream{i}")
+
+    def _register(self, name: str):
+        self.all_stream_fps[name] = GETFPS(name)
+        self.history[name] = deque(maxlen=self.ring_size)
 
     def update_fps(self, stream_name: str):
         if stream_name not in self.all_stream_fps:
             # Auto-register missing streams
             with self.lock:
-                self.all_stream_fps[stream_name] = GETFPS(stream_name)
+                self._register(stream_name)
                 print(f"[WARN] Stream '{stream_name}' not initialized. Auto-registering.")
         self.all_stream_fps[stream_name].update_fps()
 
+    def get_history(self, stream_name: str, since: float = 0.0):
+        """(timestamp, fps) samples kept in memory for a stream, newer than `since`."""
+        with self.lock:
+            samples = list(self.history.get(stream_name, ()))
+        return [sample for sample in samples if sample[0] > since]
+
     def perf_print_callback(self):
+        now = time.time()
         with self.lock:
             self.perf_dict = {
                 name: stream.get_fps()
                 for name, stream in self.all_stream_fps.items()
             }
+            for name, fps in self.perf_dict.items():
+                self.history[name].append((now, fps))
 
-        log_line = {
-            "Time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            **self.perf_dict
-        }
-
-        print("**PERF:", log_line)
+        if PERF_STDOUT:
+            print("**PERF:", {"Time": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"), **self.perf_dict})
 
-        if self.log_path:
+        if self.retention:
             try:
-                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
-                with open(self.log_path, "a") as f:
-                    f.write(f"**PERF: {json.dumps(log_line)}\n")
+                self.retention.add(now, self.perf_dict)
             except Exception as e:
                 print(f"[ERROR] Failed to write FPS log: {e}")
 
+        if self.heartbeat_publisher:
+            self.heartbeat_publisher.publish(now, {
+                name: (stream.last_frame, self.perf_dict[name])
+                for name, stream in self.all_stream_fps.items()
+            })
+
         return True  # Needed by GLib.timeout_add
 
+    def close(self):
+        if self.retention:
+            self.retention.close()
+        if self.heartbeat_publisher:
+            self.heartbeat_publisher.close()
@@ -0,0 +1,78 @@
+"""
+camera_heartbeat.py
+
+Per-camera heartbeats published to Redis by each zone process.
+
+Every FPS sample (once per second) the latest (last frame time, fps) of the
+zone's cameras is written into the shared `camera_heartbeats` hash with one
+pipelined HSET. The write happens on a background thread that only keeps the
+newest snapshot, so a slow or unreachable Redis never stalls the GLib main
+loop. The dashboard API derives camera health from this hash.
+
+Author: Debjit
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+CAMERA_HEARTBEATS = os.getenv("CAMERA_HEARTBEATS", "1") not in ("0", "false", "False", "")
+
+
+class CameraHeartbeatPublisher:
+    """
+    Publishes the newest heartbeat snapshot of a zone's cameras.
+
+    Attributes:
+        zone (str): Zone (shard) name stored with every heartbeat.
+    """
+
+    def __init__(self, zone: str, redis_cache=None):
+        self.zone = zone
+        self._redis_cache = redis_cache
+        self._pending: Optional[Tuple[float, Dict[str, Tuple[Optional[float], float]]]] = None
+        self._wakeup = threading.Condition()
+        self._closed = False
+        self._failed = False
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{zone}", daemon=True)
+        self._thread.start()
+
+    @property
+    def redis_cache(self):
+        if self._redis_cache is None:
+            from global_id_service.clients import get_redis_cache
+            self._redis_cache = get_redis_cache()
+        return self._redis_cache
+
+    def publish(self, now: float, cameras: Dict[str, Tuple[Optional[float], float]]) -> None:
+        """Queue {camera: (last frame time, fps)} sampled at `now`; replaces any unsent snapshot."""
+        with self._wakeup:
+            self._pending = (now, cameras)
+            self._wakeup.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                while self._pending is None and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                now, cameras = self._pending
+                self._pending = None
+            try:
+                self.redis_cache.publish_camera_heartbeats({
+                    cam_id: {"last_frame": last_frame, "fps": fps, "zone": self.zone, "time": now}
+                    for cam_id, (last_frame, fps) in cameras.items()
+                })
+                if self._failed:
+                    print(f"[INFO] Camera heartbeats for zone '{self.zone}' restored")
+                self._failed = False
+            except Exception as e:
+                if not self._failed:
+                    print(f"[ERROR] Failed to publish camera heartbeats: {e}")
+                self._failed = True
+
+    def close(self) -> None:
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
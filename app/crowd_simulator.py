@@ -0,0 +1,441 @@
+"""
+crowd_simulator.py
+
+Synthetic multi-camera crowd for end-to-end scale testing of the global ID
+service, without GPUs or DeepStream.
+
+Thousands of synthetic identities walk the camera graph:
+- each identity has a stable unit base embedding;
+- every camera visit gets its own view embedding (base + `view_noise`) and
+  every detection adds per-frame noise (`frame_noise`), so matching is as
+  hard as the noise levels make it;
+- a visit lasts an exponential dwell time, the next camera is drawn with
+  MultiZoneCameraConfig.sample_next_camera and the walk there takes a
+  log-normal travel time;
+- every visit is a new DeepStream-style track (per-run object_id counter).
+
+Each simulated frame emits detections shaped like ZonePipeline's track_data
+(cam_id, track_id, embedding, timestamp, capture_ts, pts). Worker threads,
+one ID manager each like zone processes, assign them in per-tick batches.
+A track's end is reported when its identity leaves the camera. Ground truth
+is scored as results come back.
+
+Report:
+- throughput: offered vs assigned detections per second;
+- latency: queue wait, assignment and enqueue → done histograms (app.latency);
+- ID switches: assigned ID changes between consecutive detections of one
+  identity, within a camera track or at a camera handoff;
+- fragmentation: identities split over several global IDs, and global IDs
+  shared by several identities (false merges).
+
+Run (needs Redis and Qdrant, or a sidecar):
+    python -m app.crowd_simulator --cameras 1000 --zones 50 --people 5000 --fps 5 --duration 60
+
+Author: Debjit
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from app.latency import LatencyHistogram
+from app.topology import get_topology
+from global_id_service.config import ID_SIDECAR_SOCKET, QDRANT_VECTOR_SIZE
+
+SIM_QUEUE_SIZE = int(os.getenv("SIM_QUEUE_SIZE", 64))  # batches waiting per worker
+SIM_STAGES = ("queue_wait", "assign", "end_to_end")
+
+
+def synthetic_camera_config(path: str, cameras: int, zones: int, links: int = 2, seed: int = 0) -> str:
+    """
+    Write a camera config YAML for `cameras` cameras split over `zones` zones.
+
+    Each camera links to the next `links` cameras of its zone ring; the last
+    camera of every zone also links to the first camera of the next zone.
+    """
+    rng = random.Random(seed)
+    zones = max(1, min(zones, cameras))
+    per_zone = [cameras // zones + (1 if z < cameras % zones else 0) for z in range(zones)]
+    cfg = {"zones": []}
+    for z, count in enumerate(per_zone):
+        cams = [f"z{z}_cam{i}" for i in range(count)]
+        transitions = []
+        for i, cam_id in enumerate(cams):
+            for k in range(1, min(links, count - 1) + 1):
+                transitions.append([cam_id, cams[(i + k) % count], round(rng.uniform(0.2, 1.0), 2)])
+        if zones > 1:
+            transitions.append([cams[-1], f"z{(z + 1) % zones}_cam0", 0.5])
+        cfg["zones"].append({
+            "name": f"zone{z}",
+            "cameras": [{"id": cam_id, "uri": f"sim://{cam_id}"} for cam_id in cams],
+            "transitions": transitions,
+        })
+    with open(path, "w") as f:
+        yaml.safe_dump(cfg, f, sort_keys=False)
+    return path
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def merge_histograms(histograms: List[LatencyHistogram]) -> LatencyHistogram:
+    merged = LatencyHistogram()
+    for hist in histograms:
+        merged.counts = [a + b for a, b in zip(merged.counts, hist.counts)]
+        merged.count += hist.count
+        merged.sum_ms += hist.sum_ms
+        merged.max_ms = max(merged.max_ms, hist.max_ms)
+    return merged
+
+
+class IdentityScorer:
+    """
+    Scores assigned global IDs against the simulated identities.
+
+    Results are observed per batch in completion order; an identity is on one
+    camera at a time, so its detections arrive in order.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.assigned = 0
+        self.failed = 0
+        self.track_switches = 0
+        self.handoffs = 0
+        self.handoff_switches = 0
+        self.last: Dict[int, tuple] = {}  # person → (track key, global_id)
+        self.person_ids: Dict[int, set] = defaultdict(set)
+        self.id_persons: Dict[int, set] = defaultdict(set)
+
+    def observe(self, persons: List[int], tracks: List[tuple], global_ids: List[Optional[int]]) -> None:
+        with self.lock:
+            for person, track, global_id in zip(persons, tracks, global_ids):
+                if global_id is None:
+                    self.failed += 1
+                    continue
+                self.assigned += 1
+                previous = self.last.get(person)
+                if previous is not None:
+                    previous_track, previous_id = previous
+                    if previous_track != track:
+                        self.handoffs += 1
+                        self.handoff_switches += previous_id != global_id
+                    elif previous_id != global_id:
+                        self.track_switches += 1
+                self.last[person] = (track, global_id)
+                self.person_ids[person].add(global_id)
+                self.id_persons[global_id].add(person)
+
+    def report(self) -> Dict:
+        with self.lock:
+            ids_per_person = [len(ids) for ids in self.person_ids.values()]
+            people = len(ids_per_person)
+            return {
+                "assigned": self.assigned,
+                "failed": self.failed,
+                "id_switches": self.track_switches + self.handoff_switches,
+                "id_switches_within_track": self.track_switches,
+                "id_switches_at_handoff": self.handoff_switches,
+                "handoffs": self.handoffs,
+                "handoff_accuracy": round(1 - self.handoff_switches / self.handoffs, 4) if self.handoffs else None,
+                "people_seen": people,
+                "fragmented_people": sum(1 for n in ids_per_person if n > 1),
+                "fragments": sum(n - 1 for n in ids_per_person),
+                "ids_per_person": round(sum(ids_per_person) / people, 3) if people else None,
+                "global_ids": len(self.id_persons),
+                "merged_ids": sum(1 for persons in self.id_persons.values() if len(persons) > 1),
+            }
+
+
+class CrowdSimulator:
+    """
+    Drives ID managers with a synthetic crowd walking a camera topology.
+
+    Attributes:
+        topology (CameraTopology): Camera graph the identities walk.
+        people (int): Number of synthetic identities.
+        fps (float): Simulated frames per second of every camera.
+        workers (int): Assignment threads; zones are spread round-robin over them.
+        realtime (bool): Pace frames to the wall clock and drop batches when a
+            worker falls behind (like ZonePipeline); otherwise run as fast as
+            the workers accept batches.
+    """
+
+    def __init__(self, topology, manager_factory, people: int = 500, fps: float = 5.0,
+                 dwell_seconds: float = 8.0, travel_seconds: float = 20.0, travel_sigma: float = 0.5,
+                 view_noise: float = 0.25, frame_noise: float = 0.1, detect_prob: float = 1.0,
+                 workers: int = 4, realtime: bool = False, dim: int = QDRANT_VECTOR_SIZE, seed: int = 0):
+        self.topology = topology
+        self.manager_factory = manager_factory
+        self.people = people
+        self.fps = fps
+        self.dwell_seconds = dwell_seconds
+        self.travel_seconds = travel_seconds
+        self.travel_sigma = travel_sigma
+        self.view_noise = view_noise
+        self.frame_noise = frame_noise
+        self.detect_prob = detect_prob
+        self.workers = max(1, workers)
+        self.realtime = realtime
+        self.dim = dim
+        self.seed = seed
+
+        self.rng = np.random.default_rng(seed)
+        random.seed(seed)  # sample_next_camera draws from the module RNG
+        self.zone_of_cam = [topology.zone_of(cam_id) for cam_id in topology.cameras]
+        zone_worker = {zone: i % self.workers for i, zone in enumerate(topology.zones)}
+        self.worker_of_cam = np.array([zone_worker[zone] for zone in self.zone_of_cam], dtype=np.int64)
+
+        self.base = _unit_rows(self.rng.standard_normal((people, dim)).astype(np.float32))
+        self.view = self.base.copy()
+        self.cam = np.full(people, -1, dtype=np.int64)  # camera ordinal while visible, -1 while walking
+        self.next_cam = self.rng.integers(0, len(topology), people)
+        self.track = np.zeros(people, dtype=np.int64)
+        self.last_seen = np.zeros(people)
+        self.next_event = self.rng.uniform(0, travel_seconds, people)  # staggered first arrivals
+        self._next_track_id = 1
+
+        self.queues = [queue.Queue(maxsize=SIM_QUEUE_SIZE) for _ in range(self.workers)]
+        self.scorer = IdentityScorer()
+        self.histograms = [{stage: LatencyHistogram() for stage in SIM_STAGES} for _ in range(self.workers)]
+        self.generated = 0
+        self.dropped = 0
+        self.errors = 0
+
+    # ─── Crowd movement ────────────────────────────────────────
+    def _new_view(self, person: int) -> None:
+        noise = _unit_rows(self.rng.standard_normal((1, self.dim)).astype(np.float32))[0]
+        view = self.base[person] + self.view_noise * noise
+        self.view[person] = view / np.linalg.norm(view)
+
+    def _advance(self, t: float, wall_start: float) -> None:
+        for person in np.flatnonzero(self.next_event <= t):
+            cam = self.cam[person]
+            if cam >= 0:
+                # Leave: report the track end, then walk to a neighbouring camera
+                cam_id = self.topology.cameras[cam]
+                self._put(self.worker_of_cam[cam], "end", {
+                    "cam_id": cam_id, "track_id": int(self.track[person]),
+                    "last_seen": wall_start + float(self.last_seen[person]),
+                }, block=True)
+                next_cam_id = self.topology.config.sample_next_camera(cam_id)
+                self.next_cam[person] = (self.topology.ordinal[next_cam_id] if next_cam_id in self.topology
+                                         else self.rng.integers(0, len(self.topology)))
+                self.cam[person] = -1
+                self.next_event[person] = t + self.rng.lognormal(np.log(self.travel_seconds), self.travel_sigma)
+            else:
+                self.cam[person] = self.next_cam[person]
+                self.track[person] = self._next_track_id
+                self._next_track_id += 1
+                self._new_view(person)
+                self.next_event[person] = t + max(1.0 / self.fps, self.rng.exponential(self.dwell_seconds))
+
+    def _detections(self, tick: int, t: float, wall_start: float) -> None:
+        visible = np.flatnonzero(self.cam >= 0)
+        if self.detect_prob < 1.0:
+            visible = visible[self.rng.random(len(visible)) < self.detect_prob]
+        if not len(visible):
+            return
+        self.last_seen[visible] = t
+        noise = _unit_rows(self.rng.standard_normal((len(visible), self.dim)).astype(np.float32))
+        embeddings = _unit_rows(self.view[visible] + self.frame_noise * noise)
+        timestamp = wall_start + t
+        pts = int(tick * 1e9 / self.fps)
+        workers = self.worker_of_cam[self.cam[visible]]
+        for w in range(self.workers):
+            rows = np.flatnonzero(workers == w)
+            if not len(rows):
+                continue
+            items, persons = [], []
+            for row in rows:
+                person = visible[row]
+                cam_id = self.topology.cameras[self.cam[person]]
+                items.append({
+                    "cam_id": cam_id,
+                    "track_id": int(self.track[person]),
+                    "embedding": embeddings[row],
+                    "timestamp": timestamp,
+                    "capture_ts": timestamp,
+                    "pts": pts,
+                    "zone": self.zone_of_cam[self.cam[person]],
+                })
+                persons.append(int(person))
+            self.generated += len(items)
+            if not self._put(w, "assign", (items, persons), block=not self.realtime):
+                self.dropped += len(items)
+
+    def _put(self, worker: int, op: str, payload, block: bool) -> bool:
+        try:
+            self.queues[worker].put((op, payload, time.time()), block=block)
+            return True
+        except queue.Full:
+            return False
+
+    # ─── Assignment workers ────────────────────────────────────
+    def _worker_loop(self, w: int, manager) -> None:
+        histograms = self.histograms[w]
+        while True:
+            op, payload, enqueue_ts = self.queues[w].get()
+            if op == "stop":
+                return
+            try:
+                if op == "end":
+                    manager.end_track(payload["cam_id"], payload["track_id"], payload["last_seen"])
+                    continue
+                items, persons = payload
+                dequeue_ts = time.time()
+                if hasattr(manager, "assign_global_ids"):
+                    global_ids = manager.assign_global_ids(items)
+                else:
+                    global_ids = [
+                        manager.assign_global_id(item["cam_id"], item["track_id"], item["embedding"],
+                                                 item["timestamp"], item["zone"])
+                        for item in items
+                    ]
+                done_ts = time.time()
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"[ERROR] Simulated assignment failed: {e}", file=sys.stderr)
+                continue
+            for stage, value_ms in (("queue_wait", (dequeue_ts - enqueue_ts) * 1000.0),
+                                    ("assign", (done_ts - dequeue_ts) * 1000.0),
+                                    ("end_to_end", (done_ts - enqueue_ts) * 1000.0)):
+                for _ in items:
+                    histograms[stage].add(value_ms)
+            self.scorer.observe(persons, [(item["cam_id"], item["track_id"]) for item in items], global_ids)
+
+    # ─── Run ───────────────────────────────────────────────────
+    def run(self, duration: float) -> Dict:
+        """Simulate `duration` seconds of crowd and return the report."""
+        threads = []
+        for w in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, args=(w, self.manager_factory()),
+                                      name=f"sim-assign-{w}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        ticks = int(duration * self.fps)
+        wall_start = time.time()
+        began = time.perf_counter()
+        for tick in range(ticks):
+            t = tick / self.fps
+            self._advance(t, wall_start)
+            self._detections(tick, t, wall_start)
+            if self.realtime:
+                delay = began + t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        generate_s = time.perf_counter() - began
+        for w in range(self.workers):
+            self.queues[w].put(("stop", None, time.time()))
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        scores = self.scorer.report()
+        return {
+            "cameras": len(self.topology),
+            "zones": len(self.topology.zones),
+            "people": self.people,
+            "fps": self.fps,
+            "simulated_seconds": duration,
+            "workers": self.workers,
+            "realtime": self.realtime,
+            "wall_seconds": round(elapsed, 3),
+            "generated": self.generated,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "offered_per_s": round(self.generated / duration, 1) if duration else None,
+            "generated_per_s": round(self.generated / generate_s, 1) if generate_s else None,
+            "throughput_per_s": round(scores["assigned"] / elapsed, 1) if elapsed else None,
+            "latency": {
+                stage: merge_histograms([hists[stage] for hists in self.histograms]).to_dict()
+                for stage in SIM_STAGES
+            },
+            "identity": scores,
+        }
+
+
+def make_manager_factory(backend: str, socket_path: str):
+    if backend == "sidecar":
+        from global_id_service.sidecar import SidecarIDClient
+        return lambda: SidecarIDClient(socket_path)
+    from global_id_service.qdrant_backend.id_manager import GlobalIDManager
+    return GlobalIDManager
+
+
+def print_report(report: Dict) -> None:
+    identity = report["identity"]
+    print(f"[SIM] {report['cameras']} cameras / {report['zones']} zones, {report['people']} people, "
+          f"{report['fps']} FPS, {report['simulated_seconds']}s simulated in {report['wall_seconds']}s")
+    print(f"[SIM] detections: generated={report['generated']} assigned={identity['assigned']} "
+          f"dropped={report['dropped']} failed={identity['failed']} errors={report['errors']}")
+    print(f"[SIM] throughput: offered={report['offered_per_s']}/s assigned={report['throughput_per_s']}/s")
+    for stage, stats in report["latency"].items():
+        print(f"[SIM] latency {stage}: p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+              f"p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
+    print(f"[SIM] ID switches: {identity['id_switches']} (within track {identity['id_switches_within_track']}, "
+          f"at handoff {identity['id_switches_at_handoff']} of {identity['handoffs']})")
+    print(f"[SIM] fragmentation: {identity['fragmented_people']}/{identity['people_seen']} people split, "
+          f"{identity['ids_per_person']} IDs per person, {identity['merged_ids']} merged IDs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the global ID service with a synthetic crowd.")
+    parser.add_argument("--config", type=str, default=None, help="Camera config YAML (default: synthetic graph)")
+    parser.add_argument("--cameras", type=int, default=100, help="Synthetic graph: number of cameras")
+    parser.add_argument("--zones", type=int, default=10, help="Synthetic graph: number of zones")
+    parser.add_argument("--people", type=int, default=500, help="Synthetic identities")
+    parser.add_argument("--fps", type=float, default=5.0, help="Simulated frames per second per camera")
+    parser.add_argument("--duration", type=float, default=30.0, help="Simulated seconds")
+    parser.add_argument("--dwell", type=float, default=8.0, help="Mean seconds spent on a camera")
+    parser.add_argument("--travel", type=float, default=20.0, help="Median seconds between cameras")
+    parser.add_argument("--view-noise", type=float, default=0.25, help="Per-visit embedding noise")
+    parser.add_argument("--frame-noise", type=float, default=0.1, help="Per-detection embedding noise")
+    parser.add_argument("--detect-prob", type=float, default=1.0, help="Probability a visible person is detected")
+    parser.add_argument("--workers", type=int, default=4, help="Assignment threads (zone processes)")
+    parser.add_argument("--backend", choices=("local", "sidecar"), default="local",
+                        help="GlobalIDManager per worker, or clients of a running sidecar")
+    parser.add_argument("--socket", type=str, default=ID_SIDECAR_SOCKET or "/tmp/mct_id_sidecar.sock",
+                        help="Sidecar socket (--backend sidecar)")
+    parser.add_argument("--realtime", action="store_true", help="Pace frames to the wall clock, dropping on overload")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    config_path = args.config
+    if config_path is None:
+        config_path = synthetic_camera_config(
+            os.path.join(tempfile.mkdtemp(prefix="mct_sim_"), "camera_config.yaml"),
+            args.cameras, args.zones, seed=args.seed,
+        )
+    topology = get_topology(config_path, transition_model_path=None)
+
+    simulator = CrowdSimulator(
+        topology, make_manager_factory(args.backend, args.socket),
+        people=args.people, fps=args.fps, dwell_seconds=args.dwell, travel_seconds=args.travel,
+        view_noise=args.view_noise, frame_noise=args.frame_noise, detect_prob=args.detect_prob,
+        workers=args.workers, realtime=args.realtime, seed=args.seed,
+    )
+    report = simulator.run(args.duration)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+fps_retention.py
+
+Multi-resolution FPS retention for one zone shard.
+
+- Raw 1-second samples go to `fps_{shard}.bin` and are kept for a short window.
+- Every closed minute and hour is rolled up per stream into min/avg/max/p5
+  records in `fps1m_{shard}.bin` and `fps1h_{shard}.bin`, kept for days and
+  months respectively.
+- Every log is rotated by size (`path` → `path.1` → ... → `path.N`).
+
+On restart the open minute and hour are re-seeded from the tail of the raw
+log, so crashes do not leave holes in the rollups and history is never wiped.
+
+Author: Debjit
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.fps_store import FpsLogReader, FpsLogWriter, RollupLogWriter
+
+FPS_RAW_MAX_BYTES = int(os.getenv("FPS_RAW_MAX_BYTES", 8 * 1024 * 1024))
+FPS_RAW_KEEP = int(os.getenv("FPS_RAW_KEEP", 2))
+FPS_ROLLUP_MAX_BYTES = int(os.getenv("FPS_ROLLUP_MAX_BYTES", 32 * 1024 * 1024))
+FPS_ROLLUP_KEEP = int(os.getenv("FPS_ROLLUP_KEEP", 4))
+
+RESOLUTIONS = {"1s": 1, "1m": 60, "1h": 3600}
+
+
+def rollup_path(raw_path: str, resolution: str) -> str:
+    """fps_{shard}.bin → fps1m_{shard}.bin / fps1h_{shard}.bin."""
+    directory, name = os.path.split(raw_path)
+    return os.path.join(directory, name.replace("fps_", f"fps{resolution}_", 1))
+
+
+def summarize(values: List[float]) -> tuple:
+    """(min, avg, max, p5, count) of a bucket; p5 by nearest rank."""
+    ordered = sorted(values)
+    count = len(ordered)
+    return ordered[0], sum(ordered) / count, ordered[-1], ordered[int(0.05 * (count - 1))], count
+
+
+class RotatingLog:
+    """A FpsLogWriter (or subclass) that rotates to `path.1..path.keep` once it exceeds `max_bytes`."""
+
+    def __init__(self, path: str, writer_cls=FpsLogWriter, max_bytes: int = FPS_RAW_MAX_BYTES, keep: int = FPS_RAW_KEEP):
+        self.path = path
+        self.writer_cls = writer_cls
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.writer = writer_cls(path)
+
+    def append(self, records) -> None:
+        self.writer.append(records)
+        if self.writer.size() >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self) -> None:
+        self.writer.close()
+        for i in range(self.keep - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.keep > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.writer = self.writer_cls(self.path)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class FpsRetention:
+    """
+    Writes raw samples and maintains the 1-minute and 1-hour rollups.
+
+    Attributes:
+        raw (RotatingLog): 1-second samples.
+        rollups (Dict[str, RotatingLog]): "1m" / "1h" rollup logs.
+        buckets (Dict[str, Dict[str, List[float]]]): Open bucket values per resolution and stream.
+    """
+
+    def __init__(self, raw_path: str, expected_streams: int = 1):
+        self.raw = RotatingLog(raw_path, FpsLogWriter, FPS_RAW_MAX_BYTES, FPS_RAW_KEEP)
+        self.rollups = {
+            resolution: RotatingLog(rollup_path(raw_path, resolution), RollupLogWriter,
+                                    FPS_ROLLUP_MAX_BYTES, FPS_ROLLUP_KEEP)
+            for resolution in ("1m", "1h")
+        }
+        self.bucket_start: Dict[str, Optional[float]] = {"1m": None, "1h": None}
+        self.buckets: Dict[str, Dict[str, List[float]]] = {"1m": defaultdict(list), "1h": defaultdict(list)}
+        self._seed(raw_path, expected_streams)
+
+    def _seed(self, raw_path: str, expected_streams: int) -> None:
+        """Reload the open minute/hour from the raw log tail after a restart."""
+        try:
+            tail = FpsLogReader(raw_path).read_tail(max(1, expected_streams) * (RESOLUTIONS["1h"] + 60))
+        except Exception as e:
+            print(f"[WARN] Could not seed FPS rollups from {raw_path}: {e}")
+            return
+        if tail:
+            latest = tail[-1][0]
+            for resolution in self.buckets:
+                self.bucket_start[resolution] = latest - latest % RESOLUTIONS[resolution]
+            for ts, name, fps in tail:
+                self._accumulate(ts, name, fps)
+
+    def _accumulate(self, ts: float, name: str, fps: float) -> None:
+        for resolution, values in self.buckets.items():
+            start = self.bucket_start[resolution]
+            if start is not None and start <= ts < start + RESOLUTIONS[resolution]:
+                values[name].append(fps)
+
+    def add(self, ts: float, samples: Dict[str, float]) -> None:
+        """Record one sample per stream taken at `ts`."""
+        self.raw.append((ts, name, fps) for name, fps in samples.items())
+        for resolution, period in (("1m", 60), ("1h", 3600)):
+            start = ts - ts % period
+            if self.bucket_start[resolution] is None:
+                self.bucket_start[resolution] = start
+            elif start != self.bucket_start[resolution]:
+                self._close_bucket(resolution)
+                self.bucket_start[resolution] = start
+        for name, fps in samples.items():
+            self._accumulate(ts, name, fps)
+
+    def _close_bucket(self, resolution: str) -> None:
+        values = self.buckets[resolution]
+        start = self.bucket_start[resolution]
+        records = [(start, name, *summarize(stream_values)) for name, stream_values in values.items() if stream_values]
+        if records:
+            self.rollups[resolution].append(records)
+        self.buckets[resolution] = defaultdict(list)
+
+    def close(self) -> None:
+        self.raw.close()
+        for log in self.rollups.values():
+            log.close()
@@ -0,0 +1,183 @@
+"""
+fps_store.py
+
+Append-only binary FPS logs and their readers.
+
+File layout:
+    header  : 8-byte magic, u32 version, u32 record size   (16 bytes)
+    records : fixed width, one of
+        raw    (b"MCTFPS01"): f64 unix time, 32-byte stream name (NUL padded), f32 fps          (44 bytes)
+        rollup (b"MCTROL01"): f64 bucket start, 32-byte stream name, f32 min/avg/max/p5, u32 count (60 bytes)
+
+The writer keeps the file open and fsyncs periodically; readers tail it by
+byte offset, so both writing and reading cost O(new data). Readers only
+consume whole records and restart from the beginning when the file is
+truncated or replaced (rotation).
+
+Author: Debjit
+"""
+
+import os
+import struct
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b"MCTFPS01"
+ROLLUP_MAGIC = b"MCTROL01"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<d32sf")
+ROLLUP_RECORD = struct.Struct("<d32sffffI")
+NAME_SIZE = 32
+
+FpsRecord = Tuple[float, str, float]  # (timestamp, stream name, fps)
+RollupRecord = Tuple[float, str, float, float, float, float, int]  # (bucket start, stream, min, avg, max, p5, count)
+
+
+def encode_records(records: Iterable[tuple], record: struct.Struct = RECORD) -> bytes:
+    """Pack (time, stream name, *values) tuples."""
+    return b"".join(
+        record.pack(ts, name.encode()[:NAME_SIZE], *values) for ts, name, *values in records
+    )
+
+
+def decode_records(data: bytes, record: struct.Struct = RECORD) -> List[tuple]:
+    return [
+        (ts, raw_name.rstrip(b"\0").decode(errors="replace"), *values)
+        for ts, raw_name, *values in record.iter_unpack(data)
+    ]
+
+
+class FpsLogWriter:
+    """
+    Appends records to a binary log kept open for the life of the process.
+
+    Attributes:
+        path (str): Log file path.
+        fsync_interval (float): Seconds between fsyncs (data is flushed to the OS on every append).
+    """
+
+    MAGIC = MAGIC
+    RECORD = RECORD
+
+    def __init__(self, path: str, fsync_interval: float = 5.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(self.MAGIC, VERSION, self.RECORD.size))
+            self._file.flush()
+
+    def append(self, records: Iterable[tuple]) -> None:
+        data = encode_records(records, self.RECORD)
+        if not data:
+            return
+        self._file.write(data)
+        self._file.flush()
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def size(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+class RollupLogWriter(FpsLogWriter):
+    """Appends (bucket start, stream, min, avg, max, p5, count) rollup records."""
+
+    MAGIC = ROLLUP_MAGIC
+    RECORD = ROLLUP_RECORD
+
+
+class FpsLogReader:
+    """
+    Incremental reader for a binary FPS log.
+
+    Each read_new() returns only records appended since the previous call.
+    """
+
+    MAGIC = MAGIC
+    RECORD = RECORD
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.inode: Optional[int] = None
+
+    def read_new(self) -> List[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # New, rotated or truncated file: start over after the header
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size <= max(self.offset, HEADER.size):
+            return []
+
+        with open(self.path, "rb") as f:
+            if self.offset == 0:
+                magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+                if magic != self.MAGIC or record_size != self.RECORD.size:
+                    raise ValueError(f"{self.path} is not a {self.MAGIC!r} log (magic={magic!r}, record={record_size})")
+                self.offset = HEADER.size
+            f.seek(self.offset)
+            usable = (stat.st_size - self.offset) // self.RECORD.size * self.RECORD.size
+            data = f.read(usable)
+        self.offset += len(data)
+        return decode_records(data, self.RECORD)
+
+    def read_tail(self, max_records: int) -> List[tuple]:
+        """Last `max_records` whole records of the file, without moving the tail offset."""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+        count = min(max_records, max(0, (size - HEADER.size) // self.RECORD.size))
+        if not count:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(HEADER.size + ((size - HEADER.size) // self.RECORD.size - count) * self.RECORD.size)
+            return decode_records(f.read(count * self.RECORD.size), self.RECORD)
+
+
+class RollupLogReader(FpsLogReader):
+    MAGIC = ROLLUP_MAGIC
+    RECORD = ROLLUP_RECORD
+
+
+def rotated_paths(path: str, keep: int) -> List[str]:
+    """Existing generations of a rotated log, oldest first (path.N ... path.1, path)."""
+    candidates = [f"{path}.{i}" for i in range(keep, 0, -1)] + [path]
+    return [candidate for candidate in candidates if os.path.exists(candidate)]
+
+
+def read_series(path: str) -> Dict[str, List[Dict[str, float]]]:
+    """Whole log as {stream: [{"time", "fps"}, ...]} (the shape the dashboard API returns)."""
+    series = defaultdict(list)
+    for ts, name, fps in FpsLogReader(path).read_new():
+        series[name].append({"time": ts, "fps": round(fps, 2)})
+    return series
+
+
+def read_rollup_series(path: str) -> Dict[str, List[Dict[str, float]]]:
+    """Whole rollup log as {stream: [{"time", "fps" (avg), "min", "max", "p5", "count"}, ...]}."""
+    series = defaultdict(list)
+    for ts, name, low, avg, high, p5, count in RollupLogReader(path).read_new():
+        series[name].append({
+            "time": ts, "fps": round(avg, 2), "min": round(low, 2),
+            "max": round(high, 2), "p5": round(p5, 2), "count": count,
+        })
+    return series
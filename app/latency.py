@@ -0,0 +1,139 @@
+"""
+latency.py
+
+Per-camera latency histograms for the path frame capture → global ID assignment.
+
+Stages (all in milliseconds):
+- capture_to_probe : frame capture (NTP timestamp when available) → pad probe
+- queue_wait       : probe enqueue → assignment worker dequeue
+- assign           : dequeue → assignment completed
+- end_to_end       : capture → assignment completed
+
+Assignments whose end-to-end latency exceeds STALE_ASSIGNMENT_SECONDS are
+counted as stale. Snapshots are written as JSON next to the FPS logs for the
+dashboard API.
+
+Author: Debjit
+"""
+
+import bisect
+import json
+import os
+import time
+from threading import Lock
+from typing import Dict, List
+
+STALE_ASSIGNMENT_SECONDS = float(os.getenv("STALE_ASSIGNMENT_SECONDS", 2.0))
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]  # last bucket: > 10 s
+STAGES = ("capture_to_probe", "queue_wait", "assign", "end_to_end")
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; percentiles are interpolated linearly inside a bucket."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS_MS[i - 1] if i else 0.0
+                upper = min(BUCKET_BOUNDS_MS[i], self.max_ms) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return round(lower + (upper - lower) * (rank - seen) / bucket_count, 2)
+            seen += bucket_count
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": self.counts,
+        }
+
+
+class LatencyTracker:
+    """
+    Per-camera histograms for every stage plus a stale-assignment counter.
+
+    Attributes:
+        stale_seconds (float): End-to-end latency above which an assignment is stale.
+    """
+
+    def __init__(self, stale_seconds: float = STALE_ASSIGNMENT_SECONDS):
+        self.stale_seconds = stale_seconds
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.stale: Dict[str, int] = {}
+        self.lock = Lock()
+
+    def record(self, cam_id: str, capture_ts: float, probe_ts: float, enqueue_ts: float,
+               dequeue_ts: float, done_ts: float) -> None:
+        """Record one assignment; all timestamps are unix seconds."""
+        values = {
+            "capture_to_probe": (probe_ts - capture_ts) * 1000.0,
+            "queue_wait": (dequeue_ts - enqueue_ts) * 1000.0,
+            "assign": (done_ts - dequeue_ts) * 1000.0,
+            "end_to_end": (done_ts - capture_ts) * 1000.0,
+        }
+        with self.lock:
+            camera = self.histograms.get(cam_id)
+            if camera is None:
+                camera = self.histograms[cam_id] = {stage: LatencyHistogram() for stage in STAGES}
+                self.stale[cam_id] = 0
+            for stage, value_ms in values.items():
+                camera[stage].add(max(0.0, value_ms))
+            if done_ts - capture_ts > self.stale_seconds:
+                self.stale[cam_id] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {
+                cam_id: {
+                    **{stage: hist.to_dict() for stage, hist in stages.items()},
+                    "stale_assignments": self.stale[cam_id],
+                }
+                for cam_id, stages in self.histograms.items()
+            }
+
+    def write_snapshot(self, path: str, extra: Dict = None) -> None:
+        """Atomically write the snapshot (plus `extra` fields) as JSON."""
+        payload = {
+            "time": time.time(),
+            "stale_threshold_s": self.stale_seconds,
+            "bucket_bounds_ms": BUCKET_BOUNDS_MS,
+            "cameras": self.snapshot(),
+            **(extra or {}),
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+
+def read_snapshots(paths: List[str]) -> Dict[str, Dict]:
+    """Merge the per-shard snapshot files into one camera → stats map."""
+    cameras = {}
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                cameras.update(json.load(f).get("cameras", {}))
+        except (OSError, ValueError):
+            continue
+    return cameras
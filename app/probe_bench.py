@@ -0,0 +1,351 @@
+"""
+probe_bench.py
+
+Offline benchmark and check harness for ZonePipeline._metadata_probe.
+
+Lightweight fake `pyds` and `Gst` objects model what DeepStream hands the
+probe: batch meta → frame meta list → object meta list → user meta list
+with NVDSINFER_TENSOR_OUTPUT_META tensors backed by real float32 buffers
+(read through ctypes exactly like on the GPU box). The real probe then runs
+against them on a plain Linux machine, without GPU, DeepStream or GStreamer.
+
+Per (batch size, objects per frame) it reports:
+- ns per object, per frame and per batch (perf_counter_ns, queue drained
+  outside the timed region);
+- allocations: traced bytes allocated per frame (tracemalloc peak) and
+  blocks still alive afterwards (the queued track_data), plus gen-0 GC
+  collections per 1000 frames.
+
+The fake casts are identity functions, so the numbers are a lower bound on
+the pyds binding overhead and measure the Python work of the probe itself.
+
+Run:
+    python -m app.probe_bench --batch-sizes 1,8,32 --objects 1,10,50
+    python -m app.probe_bench --check
+
+Author: Debjit
+"""
+
+import argparse
+import gc
+import json
+import os
+import queue
+import sys
+import time
+import tracemalloc
+import types
+from typing import Dict, List, Optional
+
+import numpy as np
+
+PROBE_BENCH_CHUNK = 50  # probe calls per timed chunk; the assign queue is drained between chunks
+TENSOR_OUTPUT_META = 12  # NvDsMetaType.NVDSINFER_TENSOR_OUTPUT_META
+
+
+# ─────────────────────────────────────────────────────────────
+# Fake DeepStream metadata
+# ─────────────────────────────────────────────────────────────
+class FakeGList:
+    __slots__ = ("data", "next")
+
+    def __init__(self, data, next_node=None):
+        self.data = data
+        self.next = next_node
+
+
+def fake_glist(items: List) -> Optional[FakeGList]:
+    head = None
+    for item in reversed(items):
+        head = FakeGList(item, head)
+    return head
+
+
+class FakeLayerDims:
+    def __init__(self, num_elements: int):
+        self.numElements = num_elements
+
+
+class FakeLayerInfo:
+    def __init__(self, values: np.ndarray):
+        self.buffer = values  # kept alive here; get_ptr hands out its address
+        self.dims = FakeLayerDims(values.size)
+
+
+class FakeTensorMeta:
+    def __init__(self, layers: List[FakeLayerInfo]):
+        self.layers = layers
+        self.num_output_layers = len(layers)
+
+
+class FakeBaseMeta:
+    def __init__(self, meta_type: int):
+        self.meta_type = meta_type
+
+
+class FakeUserMeta:
+    def __init__(self, meta_type: int, user_meta_data):
+        self.base_meta = FakeBaseMeta(meta_type)
+        self.user_meta_data = user_meta_data
+
+
+class FakeObjectMeta:
+    def __init__(self, object_id: int, user_metas: List[FakeUserMeta], obj_label: str = "person"):
+        self.object_id = object_id
+        self.obj_label = obj_label
+        self.obj_user_meta_list = fake_glist(user_metas)
+
+
+class FakeFrameMeta:
+    def __init__(self, pad_index: int, objects: List[FakeObjectMeta], ntp_timestamp: int = 0, buf_pts: int = 0):
+        self.pad_index = pad_index
+        self.ntp_timestamp = ntp_timestamp
+        self.buf_pts = buf_pts
+        self.obj_meta_list = fake_glist(objects)
+
+
+class FakeBatchMeta:
+    def __init__(self, frames: List[FakeFrameMeta]):
+        self.frame_meta_list = fake_glist(frames)
+
+
+class FakeBuffer:
+    """Stands in for a Gst.Buffer; pyds looks the batch meta up by hash(buffer)."""
+
+
+class FakeProbeInfo:
+    def __init__(self, buffer: FakeBuffer):
+        self._buffer = buffer
+
+    def get_buffer(self):
+        return self._buffer
+
+
+def _cast(data):
+    return data
+
+
+def make_fake_pyds() -> types.ModuleType:
+    pyds = types.ModuleType("pyds")
+    pyds.batches = {}  # hash(buffer) → FakeBatchMeta
+    pyds.gst_buffer_get_nvds_batch_meta = pyds.batches.get
+    for name in ("NvDsFrameMeta", "NvDsObjectMeta", "NvDsUserMeta", "NvDsInferTensorMeta"):
+        setattr(pyds, name, types.SimpleNamespace(cast=_cast))
+    pyds.NvDsMetaType = types.SimpleNamespace(NVDSINFER_TENSOR_OUTPUT_META=TENSOR_OUTPUT_META)
+    pyds.get_nvds_LayerInfo = lambda tensor_meta, i: tensor_meta.layers[i]
+    pyds.get_ptr = lambda values: values.ctypes.data
+    return pyds
+
+
+def make_fake_gi() -> types.ModuleType:
+    gi = types.ModuleType("gi")
+    gi.require_version = lambda namespace, version: None
+    repository = types.ModuleType("gi.repository")
+    repository.Gst = types.SimpleNamespace(
+        PadProbeReturn=types.SimpleNamespace(OK=1, DROP=2),
+        init=lambda argv: None,
+    )
+    repository.GLib = types.SimpleNamespace(timeout_add=lambda interval, fn: 0,
+                                            timeout_add_seconds=lambda interval, fn: 0)
+    repository.GObject = types.SimpleNamespace(threads_init=lambda: None)
+    gi.repository = repository
+    return gi
+
+
+def install_fakes() -> types.ModuleType:
+    """
+    Put the fake pyds (always) and gi (only when PyGObject is missing) in
+    sys.modules. Must run before app.zone_pipeline is imported.
+    """
+    if "app.zone_pipeline" in sys.modules and not hasattr(sys.modules.get("pyds"), "batches"):
+        raise RuntimeError("app.zone_pipeline was imported before the fake pyds was installed")
+    pyds = sys.modules.get("pyds")
+    if not hasattr(pyds, "batches"):
+        pyds = sys.modules["pyds"] = make_fake_pyds()
+    try:
+        import gi  # noqa: F401
+    except ImportError:
+        gi = make_fake_gi()
+        sys.modules["gi"] = gi
+        sys.modules["gi.repository"] = gi.repository
+    return pyds
+
+
+def make_batch(pyds, batch_size: int, objects: int, dim: int, layers: int = 1,
+               seed: int = 0) -> FakeProbeInfo:
+    """Register a fake batch of `batch_size` frames × `objects` tracked objects and return its probe info."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for pad_index in range(batch_size):
+        frame_objects = []
+        for k in range(objects):
+            tensor = FakeTensorMeta([
+                FakeLayerInfo(rng.standard_normal(dim).astype(np.float32)) for _ in range(layers)
+            ])
+            frame_objects.append(FakeObjectMeta(pad_index * objects + k, [FakeUserMeta(TENSOR_OUTPUT_META, tensor)]))
+        frames.append(FakeFrameMeta(pad_index, frame_objects, ntp_timestamp=time.time_ns(), buf_pts=pad_index))
+    buffer = FakeBuffer()
+    pyds.batches[hash(buffer)] = FakeBatchMeta(frames)
+    return FakeProbeInfo(buffer)
+
+
+# ─────────────────────────────────────────────────────────────
+# Harness
+# ─────────────────────────────────────────────────────────────
+class _NullIDManager:
+    def assign_global_id(self, cam_id, track_id, embedding, timestamp, zone=None):
+        return 0
+
+    def end_track(self, cam_id, track_id, last_seen=None):
+        pass
+
+
+def make_pipeline(cameras: int):
+    """A ZonePipeline over `cameras` streams, never built or started; the probe is called directly."""
+    os.environ.setdefault("CAMERA_HEARTBEATS", "0")
+    from app.zone_pipeline import ZonePipeline
+    pipeline = ZonePipeline(
+        zone_name="bench",
+        camera_ids=[f"cam{i}" for i in range(cameras)],
+        config=None,
+        global_id_manager=_NullIDManager(),
+    )
+    pipeline.assign_queue = queue.Queue()  # unbounded: drained between timed chunks instead of dropping
+    return pipeline
+
+
+def check_probe(pyds, batch_size: int = 4, objects: int = 3, dim: int = 16) -> List[str]:
+    """Run the probe once and compare the enqueued track_data with the fake metadata."""
+    pipeline = make_pipeline(batch_size)
+    info = make_batch(pyds, batch_size, objects, dim)
+    batch = pyds.batches[hash(info.get_buffer())]
+    pipeline._metadata_probe(None, info, None)
+
+    queued = [payload for op, payload in pipeline.assign_queue.queue if op == "assign"]
+    errors = []
+    if len(queued) != batch_size * objects:
+        errors.append(f"expected {batch_size * objects} detections, got {len(queued)}")
+    frame_node = batch.frame_meta_list
+    i = 0
+    while frame_node and not errors:
+        frame = frame_node.data
+        obj_node = frame.obj_meta_list
+        while obj_node:
+            obj = obj_node.data
+            expected = obj.obj_user_meta_list.data.user_meta_data.layers[0].buffer
+            track_data = queued[i]
+            if track_data["cam_id"] != f"cam{frame.pad_index}" or track_data["track_id"] != obj.object_id:
+                errors.append(f"detection {i}: wrong camera/track {track_data['cam_id']}:{track_data['track_id']}")
+            if not np.array_equal(track_data["embedding"], expected):
+                errors.append(f"detection {i}: embedding differs from the tensor buffer")
+            if np.shares_memory(track_data["embedding"], expected):
+                errors.append(f"detection {i}: embedding aliases the DeepStream buffer (must be copied)")
+            if abs(track_data["capture_ts"] - frame.ntp_timestamp / 1e9) > 1e-3:
+                errors.append(f"detection {i}: capture_ts does not come from ntp_timestamp")
+            i += 1
+            obj_node = obj_node.next
+        frame_node = frame_node.next
+    pipeline.perf_data.close()
+    return errors
+
+
+def bench_probe(pyds, batch_size: int, objects: int, dim: int = 256, iterations: int = 500,
+                warmup: int = 20, alloc_iterations: int = 50) -> Dict:
+    pipeline = make_pipeline(batch_size)
+    info = make_batch(pyds, batch_size, objects, dim)
+    probe = pipeline._metadata_probe
+
+    def drain():
+        pipeline.assign_queue.queue.clear()
+        pipeline.ended_tracks.clear()
+
+    for _ in range(warmup):
+        probe(None, info, None)
+    drain()
+
+    elapsed_ns = 0
+    gen0_before = gc.get_stats()[0]["collections"]
+    done = 0
+    while done < iterations:
+        chunk = min(PROBE_BENCH_CHUNK, iterations - done)
+        began = time.perf_counter_ns()
+        for _ in range(chunk):
+            probe(None, info, None)
+        elapsed_ns += time.perf_counter_ns() - began
+        drain()
+        done += chunk
+    gen0 = gc.get_stats()[0]["collections"] - gen0_before
+
+    # Allocation pass (tracemalloc slows the probe down, so it is not timed)
+    tracemalloc.start()
+    allocated = 0
+    before = tracemalloc.take_snapshot()
+    for _ in range(alloc_iterations):
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        probe(None, info, None)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    drain()
+    pipeline.perf_data.close()
+
+    frames = iterations * batch_size
+    alloc_frames = alloc_iterations * batch_size
+    return {
+        "batch_size": batch_size,
+        "objects_per_frame": objects,
+        "dim": dim,
+        "iterations": iterations,
+        "ns_per_batch": round(elapsed_ns / iterations),
+        "ns_per_frame": round(elapsed_ns / frames),
+        "ns_per_object": round(elapsed_ns / (frames * objects)) if objects else None,
+        "alloc_bytes_per_frame": round(allocated / alloc_frames),
+        "retained_blocks_per_frame": round(retained_blocks / alloc_frames, 2),
+        "gc_gen0_per_1000_frames": round(gen0 * 1000 / frames, 2),
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ZonePipeline._metadata_probe on fake DeepStream metadata.")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 8, 32], help="Frames per batch (comma-separated)")
+    parser.add_argument("--objects", type=_int_list, default=[1, 10, 50], help="Objects per frame (comma-separated)")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding floats per object")
+    parser.add_argument("--iterations", type=int, default=500, help="Timed probe calls per configuration")
+    parser.add_argument("--check", action="store_true", help="Only verify the probe output against the fake metadata")
+    parser.add_argument("--json", type=str, default=None, help="Write the results here")
+    args = parser.parse_args()
+
+    pyds = install_fakes()
+    errors = check_probe(pyds)
+    if errors:
+        for error in errors:
+            print(f"[CHECK] ❌ {error}")
+        sys.exit(1)
+    print("[CHECK] ✅ probe output matches the fake metadata")
+    if args.check:
+        return
+
+    results = []
+    print(f"{'batch':>6} {'objs':>5} {'ns/object':>10} {'ns/frame':>10} {'µs/batch':>10} "
+          f"{'B alloc/frame':>14} {'blocks kept/frame':>18} {'gc0/1k frames':>14}")
+    for batch_size in args.batch_sizes:
+        for objects in args.objects:
+            result = bench_probe(pyds, batch_size, objects, args.dim, args.iterations)
+            results.append(result)
+            print(f"{batch_size:>6} {objects:>5} {result['ns_per_object'] or 0:>10} {result['ns_per_frame']:>10} "
+                  f"{result['ns_per_batch'] / 1000:>10.1f} {result['alloc_bytes_per_frame']:>14} "
+                  f"{result['retained_blocks_per_frame']:>18} {result['gc_gen0_per_1000_frames']:>14}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+scheduler_check.py
+
+Offline check of the zone shard scheduling and supervision, runnable on a
+plain Linux machine without GPU, DeepStream or GStreamer.
+
+The pure planning functions (split_zone, assign_cpus, plan_shards) are
+checked on synthetic zones: shard sizes, cost balance and CPU sets. A
+ZoneManager is then run against a generated camera config with a stub
+runner command (a Python process that only sleeps) to check the published
+shards.json, the launched command lines and CPU pinning, restart after a
+crash, hung-shard detection and a config reload that moves a camera.
+
+Run:
+    python -m app.scheduler_check
+
+Author: Debjit
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import yaml
+
+from app.topology import get_topology, TOPOLOGY_CHECK_SECONDS
+from app.zone_scheduler import split_zone, assign_cpus, plan_shards, load_shard_layout, Shard
+
+STUB_RUNNER_CMD = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def _config(zones: Dict[str, List[str]], costs: Dict[str, float]) -> dict:
+    return {"zones": [
+        {
+            "name": zone,
+            "cameras": [{"id": cam, "uri": f"rtsp://stub/{cam}", "cost": costs.get(cam, 1.0)} for cam in cameras],
+            "transitions": [],
+        }
+        for zone, cameras in zones.items()
+    ]}
+
+
+def _write_config(path: str, zones: Dict[str, List[str]], costs: Dict[str, float]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        yaml.safe_dump(_config(zones, costs), f)
+    os.replace(tmp_path, path)
+
+
+def check_planning() -> List[str]:
+    errors = []
+
+    # Shard sizes: fewest shards, none above the limit, every camera exactly once
+    cameras = [f"cam{i}" for i in range(40)]
+    costs = {cam: 1.0 + (i % 5) for i, cam in enumerate(cameras)}
+    shards = split_zone("big", cameras, costs, max_cameras=16)
+    sizes = [len(shard.cameras) for shard in shards]
+    if len(shards) != 3 or max(sizes) > 16:
+        errors.append(f"split_zone: expected 3 shards of <= 16 cameras, got sizes {sizes}")
+    placed = sorted(cam for shard in shards for cam in shard.cameras)
+    if placed != sorted(cameras):
+        errors.append("split_zone: cameras lost or duplicated across shards")
+    if [shard.name for shard in shards] != ["big-s0", "big-s1", "big-s2"]:
+        errors.append(f"split_zone: unexpected shard names {[shard.name for shard in shards]}")
+
+    # Cost balance: greedy LPT keeps shards within one camera cost of each other
+    shard_costs = [shard.cost for shard in shards]
+    if abs(sum(shard_costs) - sum(costs.values())) > 1e-9:
+        errors.append(f"split_zone: shard costs {shard_costs} do not add up to {sum(costs.values())}")
+    if max(shard_costs) - min(shard_costs) > max(costs.values()):
+        errors.append(f"split_zone: unbalanced shard costs {shard_costs}")
+    for shard in shards:
+        if abs(shard.cost - sum(costs[cam] for cam in shard.cameras)) > 1e-9:
+            errors.append(f"split_zone: {shard.name} cost {shard.cost} does not match its cameras")
+
+    small = split_zone("small", ["a", "b"], {}, max_cameras=16)
+    if len(small) != 1 or small[0].name != "small" or small[0].cost != 2.0:
+        errors.append(f"split_zone: a small zone should stay one shard named after it, got {small}")
+
+    # CPU sets: disjoint, contiguous, covering every CPU, sized by cost
+    cpu_shards = [Shard("heavy", "z", ["a"], 6.0), Shard("mid", "z", ["b"], 3.0), Shard("light", "z", ["c"], 1.0)]
+    cpus = list(range(10))
+    assign_cpus(cpu_shards, cpus)
+    counts = [len(shard.cpus) for shard in cpu_shards]
+    flat = [cpu for shard in cpu_shards for cpu in shard.cpus]
+    if counts != [6, 3, 1]:
+        errors.append(f"assign_cpus: expected 6/3/1 CPUs by cost, got {counts}")
+    if flat != cpus:
+        errors.append(f"assign_cpus: CPU sets must be disjoint, contiguous and cover all CPUs, got {flat}")
+    many = [Shard(f"s{i}", "z", [f"c{i}"], 1.0) for i in range(5)]
+    assign_cpus(many, [0, 1])
+    if [shard.cpus for shard in many] != [[0], [1], [0], [1], [0]]:
+        errors.append(f"assign_cpus: more shards than CPUs should go round-robin, got {[s.cpus for s in many]}")
+    return errors
+
+
+def _wait_for(condition: Callable[[], bool], manager, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        manager.supervise_once(max_wait=0.05)
+    return condition()
+
+
+def _running(manager, shard_name: str) -> bool:
+    proc = manager.zone_processes.get(shard_name)
+    return proc is not None and proc.poll() is None
+
+
+def check_manager(workdir: str) -> List[str]:
+    """Drive a ZoneManager with the stub runner through launch, crash, hang and reload."""
+    from app.zone_manager import ZoneManager
+
+    errors = []
+    config_path = os.path.join(workdir, "camera_config.yaml")
+    layout_path = os.path.join(workdir, "logs", "shards.json")
+    zones = {"zone1": [f"a{i}" for i in range(5)], "zone2": ["b0", "b1"]}
+    costs = {"a0": 3.0, "a1": 2.0}
+    _write_config(config_path, zones, costs)
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+
+    manager = ZoneManager(config_path, max_cameras_per_shard=3, runner_cmd=STUB_RUNNER_CMD,
+                          cpus=cpus, layout_path=layout_path)
+    manager.backoff.base = 0.05
+    try:
+        expected = plan_shards(get_topology(config_path).config, 3, cpus=cpus)
+        manager.launch_all_zones()
+
+        # shards.json: the planned layout, published for the API
+        layout = load_shard_layout(layout_path)
+        if layout != [shard.to_dict() for shard in expected]:
+            errors.append(f"shards.json does not match the plan: {json.dumps(layout)}")
+        if sorted(shard["name"] for shard in layout) != ["zone1-s0", "zone1-s1", "zone2"]:
+            errors.append(f"unexpected shards {[shard['name'] for shard in layout]}")
+
+        # Launch: one stub per shard with its zone, shard and cameras, pinned to its CPUs
+        for shard in manager.shards.values():
+            proc = manager.zone_processes.get(shard.name)
+            if proc is None or proc.poll() is not None:
+                errors.append(f"shard {shard.name} is not running")
+                continue
+            command = manager.shard_command(shard)
+            if proc.args != command or command[:len(STUB_RUNNER_CMD)] != STUB_RUNNER_CMD:
+                errors.append(f"shard {shard.name} launched as {proc.args}")
+            if "--cameras" not in command or command[command.index("--cameras") + 1] != ",".join(shard.cameras):
+                errors.append(f"shard {shard.name} command lacks its cameras: {command}")
+            if shard.cpus and hasattr(os, "sched_getaffinity"):
+                affinity = sorted(os.sched_getaffinity(proc.pid))
+                if affinity != sorted(shard.cpus):
+                    errors.append(f"shard {shard.name} pinned to {affinity}, expected {shard.cpus}")
+
+        # Crash: the exit is noticed and the shard comes back after its backoff
+        crashed = manager.zone_processes["zone2"]
+        crashed.kill()
+        restarted = _wait_for(lambda: _running(manager, "zone2") and manager.zone_processes["zone2"] is not crashed,
+                              manager)
+        if not restarted:
+            errors.append("crashed shard zone2 was not restarted")
+
+        # Hang: the stub never touches its heartbeat, so it is killed once past the grace period
+        manager.startup_grace = 0.0
+        manager.heartbeat_timeout = 0.0
+        silent = dict(manager.zone_processes)
+        hung = manager.check_heartbeats()
+        if sorted(hung) != sorted(manager.shards):
+            errors.append(f"expected every silent shard to be killed as hung, got {hung}")
+        manager.startup_grace = manager.heartbeat_timeout = 3600.0
+        if not _wait_for(lambda: all(_running(manager, name) and manager.zone_processes[name] is not silent.get(name)
+                                     for name in manager.shards), manager):
+            errors.append("hung shards were not restarted")
+
+        # Reload: moving a camera restarts the affected shards only
+        untouched, changed = manager.zone_processes.get("zone1-s0"), manager.zone_processes.get("zone2")
+        time.sleep(TOPOLOGY_CHECK_SECONDS + 0.1)
+        _write_config(config_path, {"zone1": zones["zone1"], "zone2": ["b0", "b1", "b2"]}, costs)
+        reloaded = _wait_for(lambda: "b2" in manager.shards.get("zone2", Shard("", "", [], 0)).cameras, manager)
+        if not reloaded:
+            errors.append("config change was not picked up")
+        elif (not _running(manager, "zone2") or manager.zone_processes["zone2"] is changed
+              or manager.zone_processes.get("zone1-s0") is not untouched):
+            errors.append("reload should restart zone2 and leave zone1-s0 running")
+        if "b2" not in next((s["cameras"] for s in load_shard_layout(layout_path) if s["name"] == "zone2"), []):
+            errors.append("shards.json was not republished after the reload")
+    finally:
+        manager.terminate_all()
+    if any(proc.poll() is None for proc in manager.zone_processes.values()):
+        errors.append("terminate_all left stub runners alive")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check zone shard scheduling and supervision with a stub runner.")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary config and layout directory")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="scheduler_check_")
+    try:
+        errors = check_planning() + check_manager(workdir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    if errors:
+        for error in errors:
+            print(f"[CHECK] ❌ {error}")
+        sys.exit(1)
+    print("[CHECK] ✅ shard planning, shards.json, launch, restart, hang detection and reload behave as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+startup_timing.py
+
+Small phase timer for zone runner startup (import, connect, pipeline build, ...),
+so slow restarts can be traced to the phase that caused them.
+
+Author: Debjit
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupTimer:
+    """
+    Records named startup phases.
+
+    Phases may overlap (e.g. backend warmup running in a thread while the
+    pipeline is built); `total` is wall time since the timer started.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    def mark(self, name: str) -> None:
+        """Record a phase that started when the timer did (e.g. module imports)."""
+        self.record(name, time.perf_counter() - self.start)
+
+    @contextmanager
+    def phase(self, name: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - began)
+
+    def as_dict(self) -> Dict[str, float]:
+        report = {name: round(seconds, 3) for name, seconds in self.phases}
+        report["total"] = round(time.perf_counter() - self.start, 3)
+        return report
+
+    def report(self) -> str:
+        return "[STARTUP] " + "  ".join(f"{name}={seconds:.3f}s" for name, seconds in self.as_dict().items())
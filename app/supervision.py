@@ -0,0 +1,138 @@
+"""
+supervision.py
+
+Building blocks used by ZoneManager to supervise shard processes:
+
+- ChildExitWatcher: wakes up as soon as a child exits (pidfd + selector,
+  falling back to short polling where pidfds are unavailable).
+- RestartBackoff: jittered exponential restart delays per shard.
+- Heartbeat helpers: zone runners touch a file from their main loop and the
+  manager kills processes whose heartbeat goes stale.
+
+Author: Debjit
+"""
+
+import os
+import random
+import selectors
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+ZONE_RESTART_BACKOFF_BASE = float(os.getenv("ZONE_RESTART_BACKOFF_BASE", 1.0))  # seconds
+ZONE_RESTART_BACKOFF_MAX = float(os.getenv("ZONE_RESTART_BACKOFF_MAX", 60.0))  # seconds
+ZONE_STABLE_SECONDS = float(os.getenv("ZONE_STABLE_SECONDS", 60.0))  # uptime that resets the backoff
+ZONE_HEARTBEAT_INTERVAL = int(os.getenv("ZONE_HEARTBEAT_INTERVAL", 5))  # runner touch period
+ZONE_HEARTBEAT_TIMEOUT = float(os.getenv("ZONE_HEARTBEAT_TIMEOUT", 30.0))  # stale → considered hung
+ZONE_STARTUP_GRACE = float(os.getenv("ZONE_STARTUP_GRACE", 120.0))  # no hang checks while starting
+HEARTBEAT_ENV = "MCT_HEARTBEAT_FILE"
+
+
+class ChildExitWatcher:
+    """
+    Reports exited child processes by name.
+
+    Uses one pidfd per child registered on a selector, so `wait()` returns the
+    moment a child exits. Children that cannot get a pidfd are polled every
+    `poll_interval` seconds instead.
+    """
+
+    def __init__(self, poll_interval: float = 1.0):
+        self.poll_interval = poll_interval
+        self.selector = selectors.DefaultSelector()
+        self._pidfds: Dict[str, int] = {}
+        self._polled: Dict[str, subprocess.Popen] = {}
+
+    def watch(self, name: str, proc: subprocess.Popen) -> None:
+        self.unwatch(name)
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except (AttributeError, OSError):
+            self._polled[name] = proc
+            return
+        self._pidfds[name] = pidfd
+        self.selector.register(pidfd, selectors.EVENT_READ, (name, proc))
+
+    def unwatch(self, name: str) -> None:
+        self._polled.pop(name, None)
+        pidfd = self._pidfds.pop(name, None)
+        if pidfd is not None:
+            self.selector.unregister(pidfd)
+            os.close(pidfd)
+
+    def wait(self, timeout: float) -> List[str]:
+        """Block up to `timeout` seconds; return the names of children that exited (and reap them)."""
+        if self._polled:
+            timeout = min(timeout, self.poll_interval)
+        timeout = max(timeout, 0.0)
+
+        exited = []
+        if self._pidfds:
+            for key, _ in self.selector.select(timeout):
+                name, proc = key.data
+                proc.poll()
+                self.unwatch(name)
+                exited.append(name)
+        else:
+            time.sleep(timeout)
+
+        for name, proc in list(self._polled.items()):
+            if proc.poll() is not None:
+                self.unwatch(name)
+                exited.append(name)
+        return exited
+
+
+class RestartBackoff:
+    """
+    Jittered exponential backoff per shard.
+
+    The n-th consecutive crash waits base * 2^(n-1) seconds (capped at
+    `maximum`) scaled by a random factor in [0.5, 1]. A run longer than
+    `stable_after` seconds resets the count.
+    """
+
+    def __init__(
+        self,
+        base: float = ZONE_RESTART_BACKOFF_BASE,
+        maximum: float = ZONE_RESTART_BACKOFF_MAX,
+        stable_after: float = ZONE_STABLE_SECONDS,
+    ):
+        self.base = base
+        self.maximum = maximum
+        self.stable_after = stable_after
+        self.failures: Dict[str, int] = {}
+        self.started_at: Dict[str, float] = {}
+
+    def started(self, name: str, now: Optional[float] = None) -> None:
+        self.started_at[name] = time.time() if now is None else now
+
+    def next_delay(self, name: str, now: Optional[float] = None) -> float:
+        """Record a crash of `name` and return how long to wait before restarting it."""
+        now = time.time() if now is None else now
+        if now - self.started_at.get(name, now) >= self.stable_after:
+            self.failures[name] = 0
+        failures = self.failures.get(name, 0) + 1
+        self.failures[name] = failures
+        delay = min(self.maximum, self.base * (2 ** (failures - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def forget(self, name: str) -> None:
+        self.failures.pop(name, None)
+        self.started_at.pop(name, None)
+
+
+def touch_heartbeat(path: str) -> None:
+    """Update the heartbeat file's mtime (creating it if needed)."""
+    with open(path, "a"):
+        pass
+    os.utime(path, None)
+
+
+def heartbeat_age(path: str, now: Optional[float] = None) -> Optional[float]:
+    """Seconds since the last heartbeat, or None if there has been none."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return (time.time() if now is None else now) - mtime
@@ -0,0 +1,183 @@
+"""
+topology.py
+
+Indexed, process-wide camera topology shared by the dashboard API, the
+ZoneManager, the zone runners and the ID service.
+
+CameraTopology wraps a parsed MultiZoneCameraConfig with precomputed indexes
+so topology queries stay O(1) at thousands of cameras:
+
+- camera ordinals (YAML order) and camera → zone
+- zone → cameras (tuples, in YAML order)
+- transitions as CSR adjacency: the successors of camera i are
+  `indices[indptr[i]:indptr[i + 1]]` with weights `weights[...]`
+
+get_topology(path) loads the YAML once per process and re-parses it only
+when the file (or the learned transition model) actually changes: the
+files are stat'ed at most every TOPOLOGY_CHECK_SECONDS, and a changed
+mtime/size is confirmed with a content hash, so a `touch` or an identical
+rewrite keeps the current object. A config that fails to parse on reload
+keeps the previous topology.
+
+Author: Debjit
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.transition_graph import MultiZoneCameraConfig
+from global_id_service.config import CAMERA_CONFIG_PATH, TRANSITION_MODEL_PATH
+
+TOPOLOGY_CHECK_SECONDS = float(os.getenv("TOPOLOGY_CHECK_SECONDS", 1.0))  # min seconds between file stats
+
+
+class CameraTopology:
+    """
+    Immutable, indexed view of a camera configuration.
+
+    Attributes:
+        config (MultiZoneCameraConfig): Parsed configuration (URIs, costs, raw YAML).
+        cameras (Tuple[str, ...]): Camera IDs by ordinal.
+        zones (Tuple[str, ...]): Zone names in YAML order.
+        indptr, indices, weights (np.ndarray): CSR transition adjacency over camera ordinals.
+        digest (str): Content hash of the files the topology was built from.
+        version (int): Load counter of this path in this process.
+    """
+
+    def __init__(self, config: MultiZoneCameraConfig, digest: str = "", version: int = 0):
+        self.config = config
+        self.digest = digest
+        self.version = version
+        self.cameras: Tuple[str, ...] = tuple(config.get_all_cameras())
+        self.ordinal: Dict[str, int] = {cam_id: i for i, cam_id in enumerate(self.cameras)}
+        self.zones: Tuple[str, ...] = tuple(zone["name"] for zone in config.cfg["zones"])
+
+        zone_cameras: Dict[str, List[str]] = {zone: [] for zone in self.zones}
+        for cam_id in self.cameras:
+            zone_cameras[config.camera_zone_map[cam_id]].append(cam_id)
+        self.zone_cameras: Dict[str, Tuple[str, ...]] = {zone: tuple(cams) for zone, cams in zone_cameras.items()}
+
+        # Edges to cameras outside the config (e.g. only seen by the learner) are left out
+        indptr = np.zeros(len(self.cameras) + 1, dtype=np.int64)
+        indices, weights = [], []
+        for i, cam_id in enumerate(self.cameras):
+            for edge in config.get_possible_transitions(cam_id):
+                j = self.ordinal.get(edge["to"])
+                if j is not None:
+                    indices.append(j)
+                    weights.append(edge["weight"])
+            indptr[i + 1] = len(indices)
+        self.indptr = indptr
+        self.indices = np.array(indices, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.cameras)
+
+    def __contains__(self, cam_id: str) -> bool:
+        return cam_id in self.ordinal
+
+    def zone_of(self, cam_id: str) -> Optional[str]:
+        return self.config.camera_zone_map.get(cam_id)
+
+    def cameras_in_zone(self, zone: str) -> Tuple[str, ...]:
+        return self.zone_cameras.get(zone, ())
+
+    def zone_map(self) -> Dict[str, List[str]]:
+        """{zone: [camera IDs]} for every zone with at least one camera."""
+        return {zone: list(cams) for zone, cams in self.zone_cameras.items() if cams}
+
+    def camera_uri(self, cam_id: str) -> Optional[str]:
+        return self.config.camera_uri_map.get(cam_id)
+
+    def target_fps(self, cam_id: str) -> Optional[float]:
+        return self.config.camera_target_fps_map.get(cam_id)
+
+    def neighbors(self, cam_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(successor ordinals, weights) of a camera; views into the CSR arrays."""
+        i = self.ordinal.get(cam_id)
+        if i is None:
+            return self.indices[:0], self.weights[:0]
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.weights[lo:hi]
+
+    def successors(self, cam_id: str) -> List[str]:
+        return [self.cameras[j] for j in self.neighbors(cam_id)[0]]
+
+
+def _file_signature(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _content_digest(config_path: str, transition_model_path: Optional[str]) -> str:
+    digest = hashlib.sha1()
+    with open(config_path, "rb") as f:
+        digest.update(f.read())
+    if transition_model_path and os.path.exists(transition_model_path):
+        with open(transition_model_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class _TopologyEntry:
+    def __init__(self):
+        self.topology: Optional[CameraTopology] = None
+        self.signature = None
+        self.next_check = 0.0
+        self.lock = threading.Lock()
+
+
+_entries: Dict[Tuple[str, Optional[str]], _TopologyEntry] = {}
+_entries_lock = threading.Lock()
+
+
+def get_topology(config_path: str = CAMERA_CONFIG_PATH,
+                 transition_model_path: Optional[str] = TRANSITION_MODEL_PATH) -> CameraTopology:
+    """
+    The shared CameraTopology of `config_path`, reloaded when its content changes.
+
+    Raises the parse/IO error when the first load fails; later failures keep
+    the last good topology.
+    """
+    key = (os.path.abspath(config_path), transition_model_path)
+    entry = _entries.get(key)
+    if entry is None:
+        with _entries_lock:
+            entry = _entries.setdefault(key, _TopologyEntry())
+
+    now = time.monotonic()
+    if entry.topology is not None and now < entry.next_check:
+        return entry.topology
+
+    with entry.lock:
+        if entry.topology is not None and now < entry.next_check:
+            return entry.topology
+        signature = (_file_signature(config_path), _file_signature(transition_model_path))
+        if entry.topology is not None and signature == entry.signature:
+            entry.next_check = now + TOPOLOGY_CHECK_SECONDS
+            return entry.topology
+        try:
+            # Stat before reading: an edit racing the read shows up as a new signature next time
+            digest = _content_digest(config_path, transition_model_path)
+            if entry.topology is None or digest != entry.topology.digest:
+                config = MultiZoneCameraConfig(config_path, transition_model_path=transition_model_path)
+                version = entry.topology.version + 1 if entry.topology else 1
+                entry.topology = CameraTopology(config, digest, version)
+        except Exception as e:
+            if entry.topology is None:
+                raise
+            print(f"[WARN] Camera config reload failed, keeping topology v{entry.topology.version}: {e}")
+        entry.signature = signature
+        entry.next_check = now + TOPOLOGY_CHECK_SECONDS
+        return entry.topology
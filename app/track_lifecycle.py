@@ -0,0 +1,71 @@
+"""
+track_lifecycle.py
+
+Tracks which DeepStream object IDs are alive on each camera.
+
+The zone pipeline reports the object_ids present in every frame. A track that
+has not been seen for `absence_seconds` is reported exactly once as ended, so
+the GlobalIDManager can finalize it and release its state instead of waiting
+for the Redis TTL.
+
+Author: Debjit
+"""
+
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from global_id_service.config import TRACK_END_ABSENCE_SECONDS
+
+
+class TrackLifecycle:
+    """
+    Per-camera live-track bookkeeping.
+
+    Attributes:
+        absence_seconds (float): How long a track may be missing before it is ended.
+        sweep_interval (float): Minimum time between two sweeps for ended tracks.
+        last_seen (Dict[str, Dict[int, float]]): cam_id → {object_id: last seen timestamp}.
+    """
+
+    def __init__(self, absence_seconds: float = TRACK_END_ABSENCE_SECONDS, sweep_interval: float = 0.5):
+        self.absence_seconds = absence_seconds
+        self.sweep_interval = sweep_interval
+        self.last_seen: Dict[str, Dict[int, float]] = {}
+        self._last_sweep = 0.0
+        self.lock = Lock()
+
+    def observe_frame(self, cam_id: str, object_ids: Iterable[int], now: float) -> None:
+        """Mark every object in a frame as alive at `now`."""
+        with self.lock:
+            seen = self.last_seen.setdefault(cam_id, {})
+            for object_id in object_ids:
+                seen[object_id] = now
+
+    def collect_ended(self, now: Optional[float] = None) -> List[Tuple[str, int, float]]:
+        """
+        Remove and return tracks that have been absent for longer than `absence_seconds`.
+
+        Sweeps at most once per `sweep_interval`, so it is cheap to call per batch.
+
+        Returns:
+            List of (cam_id, object_id, last_seen) tuples.
+        """
+        now = time.time() if now is None else now
+        if now - self._last_sweep < self.sweep_interval:
+            return []
+        self._last_sweep = now
+
+        cutoff = now - self.absence_seconds
+        ended = []
+        with self.lock:
+            for cam_id, seen in self.last_seen.items():
+                stale = [object_id for object_id, ts in seen.items() if ts < cutoff]
+                for object_id in stale:
+                    ended.append((cam_id, object_id, seen.pop(object_id)))
+        return ended
+
+    def live_count(self, cam_id: str) -> int:
+        """Number of tracks currently alive on a camera."""
+        with self.lock:
+            return len(self.last_seen.get(cam_id, {}))
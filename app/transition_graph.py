@@ -47,6 +47,9 @@ import random
 import yaml
 from collections import defaultdict
 
+from global_id_service.config import TRANSITION_MODEL_PATH, TRANSITION_MIN_SAMPLES
+from global_id_service.transition_model import TransitionModel
+
 class MultiZoneCameraConfig:
     """
     Parses a multi-zone camera configuration YAML.
@@ -55,34 +58,64 @@ class MultiZoneCameraConfig:
     - weighted directional transitions
     - reverse transition auto-fill
     - camera-to-zone mapping
+    - per-camera processing cost (`cost:`, default 1.0) for shard scheduling
+    - per-camera expected frame rate (`target_fps:`, optional) for health checks
     - sampling next camera based on transition weights
+    - learned transition weights and travel times (TransitionModel), replacing the
+      YAML weights of every camera with at least TRANSITION_MIN_SAMPLES observed departures
     """
-    def __init__(self, config_path='/opt/nvidia/deepstream/deepstream-7.1/MCT/app/camera_config.yaml'):
+    def __init__(self, config_path='/opt/nvidia/deepstream/deepstream-7.1/MCT/app/camera_config.yaml',
+                 transition_model_path=TRANSITION_MODEL_PATH, min_samples=TRANSITION_MIN_SAMPLES):
         with open(config_path, 'r') as f:
-            self.cfg = yaml.safe_load(f)
+            # libyaml parser when available: the pure-Python one takes seconds on thousand-camera configs
+            self.cfg = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
         self.camera_uri_map = {}
         self.camera_zone_map = {}
+        self.camera_cost_map = {}
+        self.camera_target_fps_map = {}
         self.transitions = defaultdict(list)
+        self.transition_source = {}  # camera → "learned" for rows taken from the transition model
+        self.transition_model = TransitionModel.load(transition_model_path) if transition_model_path else None
         self._parse_config()
         self._build_reverse_transitions()  # Optional reverse logic
+        self._apply_transition_model(min_samples)
 
     def _parse_config(self):
         for zone in self.cfg['zones']:
             for cam in zone['cameras']:
                 self.camera_uri_map[cam['id']] = cam['uri']
                 self.camera_zone_map[cam['id']] = zone['name']
+                self.camera_cost_map[cam['id']] = float(cam.get('cost', 1.0))
+                if cam.get('target_fps') is not None:
+                    self.camera_target_fps_map[cam['id']] = float(cam['target_fps'])
             for transition in zone.get('transitions', []):
                 src, dst, weight = transition
                 self.transitions[src].append({'to': dst, 'weight': weight})
 
     def _build_reverse_transitions(self):
+        # One pass over the edges; the pair set replaces a scan of the destination's list per edge
+        pairs = {(src, entry['to']) for src, dst_list in self.transitions.items() for entry in dst_list}
         for src, dst_list in list(self.transitions.items()):
             for entry in dst_list:
                 dst = entry['to']
                 weight = entry['weight']
-                reverse_exists = any(t['to'] == src for t in self.transitions[dst])
-                if not reverse_exists:
+                if (dst, src) not in pairs:
                     self.transitions[dst].append({'to': src, 'weight': round(1 - weight, 2)})
+                    pairs.add((dst, src))
+
+    def _apply_transition_model(self, min_samples):
+        if self.transition_model is None:
+            return
+        for cam_id in self.camera_uri_map:
+            if self.transition_model.is_confident(cam_id, min_samples):
+                self.transitions[cam_id] = self.transition_model.transitions_from(cam_id)
+                self.transition_source[cam_id] = "learned"
+
+    def get_travel_time_likelihood(self, src, dst, seconds):
+        """Learned log-normal density of a src → dst travel time; None without a model or data."""
+        if self.transition_model is None:
+            return None
+        return self.transition_model.travel_time_likelihood(src, dst, seconds)
 
     def get_camera_uri(self, cam_id):
         return self.camera_uri_map.get(cam_id)
@@ -2,12 +2,15 @@
 zone_manager.py
 
 ZoneManager is responsible for launching and supervising multiple zone-based DeepStream pipelines.
-Each zone runs in an isolated subprocess using `zone_runner.py`.
+Each zone shard runs in an isolated subprocess using `zone_runner.py`.
 
 Features:
-- Spawns one subprocess per zone.
-- Restarts crashed zones with retry logic.
-- Monitors zone health via stdout/stderr.
+- Spawns one subprocess per shard (zones above the per-shard camera limit are split).
+- Pins each shard process to a CPU set sized by its camera cost.
+- Notices child exits immediately (pidfd selector) and restarts with jittered exponential backoff.
+- Kills and restarts shards whose heartbeat file goes stale (hung pipelines).
+- Watches the config file (shared CameraTopology) and restarts only the shards whose cameras changed.
+- Optionally runs the per-host global ID sidecar shared by all zones.
 - Suitable for 1000+ camera-scale systems.
 
 Author: [Your Name]
@@ -16,100 +19,343 @@ Author: [Your Name]
 import subprocess
 import time
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
-from app.transition_graph import MultiZoneCameraConfig
+from app.topology import get_topology
+from app.zone_scheduler import Shard, plan_shards, write_shard_layout, ZONE_MAX_CAMERAS_PER_SHARD, SHARD_LAYOUT_PATH
+from app.supervision import (
+    ChildExitWatcher,
+    RestartBackoff,
+    heartbeat_age,
+    HEARTBEAT_ENV,
+    ZONE_HEARTBEAT_TIMEOUT,
+    ZONE_STARTUP_GRACE,
+)
+from global_id_service.config import ID_SIDECAR_SOCKET
+
+DEFAULT_RUNNER_CMD = ["python3", "app/zone_runner.py"]
+CONFIG_CHECK_INTERVAL = 2.0  # seconds between config change checks
+
+
+def _cpu_pinner(cpus: List[int]):
+    """preexec_fn pinning the child to `cpus`; a bad CPU set leaves the child unpinned instead of failing it."""
+    def pin():
+        try:
+            os.sched_setaffinity(0, set(cpus))
+        except OSError as e:
+            os.write(2, f"[ZONE_MANAGER] ⚠️ Could not pin to CPUs {cpus}: {e}\n".encode())
+    return pin
 
 
 class ZoneManager:
     """
-    Manages DeepStream pipelines per zone by spawning subprocesses.
+    Manages DeepStream pipelines per zone shard by spawning subprocesses.
 
     Attributes:
         config_path (str): Path to camera configuration YAML.
-        zone_processes (Dict[str, subprocess.Popen]): Map of zone names to subprocess handles.
+        zone_processes (Dict[str, subprocess.Popen]): Map of shard names to subprocess handles.
+        topology (CameraTopology): Shared, indexed zone-camera topology of the config.
         camera_config (MultiZoneCameraConfig): Zone-camera graph configuration object.
+        shards (Dict[str, Shard]): Current shard layout by shard name.
+        runner_cmd (List[str]): Command prefix used to start a shard (app.scheduler_check passes a stub).
     """
 
-    def __init__(self, config_path: str = "/opt/nvidia/deepstream/deepstream-7.1/MCT/app/camera_config.yaml"):
+    def __init__(
+        self,
+        config_path: str = "/opt/nvidia/deepstream/deepstream-7.1/MCT/app/camera_config.yaml",
+        max_cameras_per_shard: int = ZONE_MAX_CAMERAS_PER_SHARD,
+        runner_cmd: Optional[List[str]] = None,
+        cpus: Optional[List[int]] = None,
+        layout_path: Optional[str] = None,
+    ):
         self.config_path = config_path
         self.zone_processes: Dict[str, subprocess.Popen] = {}
-        self.camera_config = MultiZoneCameraConfig(config_path)
+        self.topology = get_topology(config_path)
+        self.camera_config = self.topology.config
+        self.sidecar_process: Optional[subprocess.Popen] = None
+        self.max_cameras_per_shard = max_cameras_per_shard
+        self.runner_cmd = runner_cmd or DEFAULT_RUNNER_CMD
+        self.cpus = cpus
+        self.layout_path = layout_path or SHARD_LAYOUT_PATH
+        self.shards: Dict[str, Shard] = {}
+        self.exit_watcher = ChildExitWatcher()
+        self.backoff = RestartBackoff()
+        self.pending_restarts: Dict[str, float] = {}  # shard name → restart time
+        self.heartbeat_timeout = ZONE_HEARTBEAT_TIMEOUT
+        self.startup_grace = ZONE_STARTUP_GRACE
+        self._next_config_check = 0.0
+
+    def plan(self) -> List[Shard]:
+        """
+        Compute the shard layout from the current config and publish it for the API.
+        """
+        shards = plan_shards(self.camera_config, self.max_cameras_per_shard, cpus=self.cpus)
+        self.shards = {shard.name: shard for shard in shards}
+        write_shard_layout(shards, self.layout_path)
+        for shard in shards:
+            print(f"[ZONE_MANAGER] 🧩 {shard.name}: {len(shard.cameras)} cameras, cost={shard.cost}, cpus={shard.cpus}")
+        return shards
 
     def launch_all_zones(self) -> None:
         """
-        Launch pipelines for all zones in separate subprocesses.
+        Launch pipelines for all zone shards in separate subprocesses.
         """
+        self.launch_sidecar()
         print("[ZONE_MANAGER] 🚀 Launching all zone pipelines...")
-        for zone in self.camera_config.cfg["zones"]:
-            zone_name = zone["name"]
-            self.launch_zone(zone_name)
+        for shard in self.plan():
+            self.launch_shard(shard.name)
+
+    def launch_sidecar(self, timeout: float = 10.0) -> None:
+        """
+        Start the host-wide ID sidecar if ID_SIDECAR_SOCKET is configured.
+
+        Waits up to `timeout` seconds for its socket so zones can connect on startup.
+        """
+        if not ID_SIDECAR_SOCKET:
+            return
+        if self.sidecar_process and self.sidecar_process.poll() is None:
+            return
+
+        print(f"[ZONE_MANAGER] 🧬 Starting ID sidecar on {ID_SIDECAR_SOCKET}")
+        cmd = ["python3", "-m", "global_id_service.sidecar", "--socket", ID_SIDECAR_SOCKET]
+        try:
+            self.sidecar_process = subprocess.Popen(cmd)
+        except Exception as e:
+            print(f"[ZONE_MANAGER] ❌ Failed to start ID sidecar: {e}")
+            return
+
+        deadline = time.time() + timeout
+        while not os.path.exists(ID_SIDECAR_SOCKET) and time.time() < deadline:
+            if self.sidecar_process.poll() is not None:
+                print("[ZONE_MANAGER] ❌ ID sidecar exited during startup")
+                return
+            time.sleep(0.1)
 
     def launch_zone(self, zone_name: str) -> None:
         """
-        Launch a single zone pipeline subprocess.
+        Launch every shard of a zone.
 
         Args:
             zone_name (str): Zone identifier (e.g., 'zone1').
         """
-        if zone_name in self.zone_processes and self.zone_processes[zone_name].poll() is None:
-            print(f"[ZONE_MANAGER] ⚠️ Zone '{zone_name}' already running. Skipping.")
-            return
+        if not self.shards:
+            self.plan()
+        for shard in self.shards.values():
+            if shard.zone == zone_name:
+                self.launch_shard(shard.name)
 
-        print(f"[ZONE_MANAGER] 🟢 Starting subprocess for zone: {zone_name}")
-        cmd = [
-            "python3", "app/zone_runner.py",
-            "--zone", zone_name,
+    def shard_command(self, shard: Shard) -> List[str]:
+        """Full command line used to run a shard."""
+        return self.runner_cmd + [
+            "--zone", shard.zone,
+            "--shard", shard.name,
+            "--cameras", ",".join(shard.cameras),
             "--config", self.config_path
         ]
 
+    def launch_shard(self, shard_name: str) -> None:
+        """
+        Launch a single shard pipeline subprocess, pinned to its CPU set.
+
+        Args:
+            shard_name (str): Shard name (the zone name for unsplit zones).
+        """
+        if shard_name in self.zone_processes and self.zone_processes[shard_name].poll() is None:
+            print(f"[ZONE_MANAGER] ⚠️ Shard '{shard_name}' already running. Skipping.")
+            return
+
+        shard = self.shards[shard_name]
+        print(f"[ZONE_MANAGER] 🟢 Starting subprocess for shard: {shard_name}")
+        preexec_fn = _cpu_pinner(shard.cpus) if shard.cpus and hasattr(os, "sched_setaffinity") else None
+        heartbeat_path = self.heartbeat_path(shard_name)
+        if os.path.exists(heartbeat_path):
+            os.remove(heartbeat_path)
+        env = {**os.environ, HEARTBEAT_ENV: heartbeat_path}
+
         try:
-            process = subprocess.Popen(cmd)
-            self.zone_processes[zone_name] = process
+            process = subprocess.Popen(self.shard_command(shard), preexec_fn=preexec_fn, env=env)
+            self.zone_processes[shard_name] = process
+            self.exit_watcher.watch(shard_name, process)
+            self.backoff.started(shard_name)
         except Exception as e:
-            print(f"[ZONE_MANAGER] ❌ Failed to start zone '{zone_name}': {e}")
+            print(f"[ZONE_MANAGER] ❌ Failed to start shard '{shard_name}': {e}")
+            self.schedule_restart(shard_name)
+
+    def heartbeat_path(self, shard_name: str) -> str:
+        """File a shard's runner touches from its main loop."""
+        return os.path.join(os.path.dirname(self.layout_path), f"heartbeat_{shard_name}")
+
+    def schedule_restart(self, shard_name: str) -> None:
+        """Queue a restart of a crashed shard after its backoff delay."""
+        delay = self.backoff.next_delay(shard_name)
+        self.pending_restarts[shard_name] = time.time() + delay
+        print(f"[ZONE_MANAGER] ⏳ Restarting shard '{shard_name}' in {delay:.1f}s "
+              f"(failure #{self.backoff.failures[shard_name]})")
 
-    def terminate_zone(self, zone_name: str) -> None:
+    def terminate_zone(self, shard_name: str) -> None:
         """
-        Terminates a single zone subprocess if running.
+        Terminates a single shard subprocess if running.
 
         Args:
-            zone_name (str): Zone to terminate.
+            shard_name (str): Shard to terminate.
         """
-        proc = self.zone_processes.get(zone_name)
+        self.exit_watcher.unwatch(shard_name)
+        self.pending_restarts.pop(shard_name, None)
+        proc = self.zone_processes.get(shard_name)
         if proc and proc.poll() is None:
-            print(f"[ZONE_MANAGER] 🔻 Terminating zone: {zone_name}")
+            print(f"[ZONE_MANAGER] 🔻 Terminating shard: {shard_name}")
             proc.terminate()
             try:
                 proc.wait(timeout=10)
             except subprocess.TimeoutExpired:
-                print(f"[ZONE_MANAGER] ⚠️ Forcing kill on zone: {zone_name}")
+                print(f"[ZONE_MANAGER] ⚠️ Forcing kill on shard: {shard_name}")
                 proc.kill()
-        self.zone_processes.pop(zone_name, None)
+        self.zone_processes.pop(shard_name, None)
 
     def monitor_zones(self) -> None:
         """
-        Monitors running subprocesses and restarts them if they crash.
+        Supervises shard processes until interrupted.
+
+        Wakes up on child exit, on a due restart, or for periodic heartbeat
+        and config checks.
         """
         print("[ZONE_MANAGER] 🔍 Monitoring all active zones...")
         try:
             while True:
-                for zone_name, proc in list(self.zone_processes.items()):
-                    if proc.poll() is not None:  # Process has exited
-                        print(f"[ZONE_MANAGER] 🔄 Zone '{zone_name}' has crashed. Restarting...")
-                        self.terminate_zone(zone_name)
-                        self.launch_zone(zone_name)
-                time.sleep(5)
+                self.supervise_once()
         except KeyboardInterrupt:
             print("\n[ZONE_MANAGER] 🛑 Shutdown requested. Cleaning up...")
             self.terminate_all()
 
+    def supervise_once(self, max_wait: float = 1.0) -> None:
+        """
+        One supervision step: wait for exits, run due restarts, check heartbeats and config.
+        """
+        now = time.time()
+        wait = max_wait
+        if self.pending_restarts:
+            wait = min(wait, max(0.0, min(self.pending_restarts.values()) - now))
+
+        for shard_name in self.exit_watcher.wait(wait):
+            proc = self.zone_processes.pop(shard_name, None)
+            code = proc.returncode if proc else None
+            print(f"[ZONE_MANAGER] 🔄 Shard '{shard_name}' exited (code={code}).")
+            if shard_name in self.shards:
+                self.schedule_restart(shard_name)
+
+        now = time.time()
+        for shard_name, due in list(self.pending_restarts.items()):
+            if due <= now:
+                del self.pending_restarts[shard_name]
+                if shard_name in self.shards:
+                    self.launch_shard(shard_name)
+
+        if self.sidecar_process and self.sidecar_process.poll() is not None:
+            print("[ZONE_MANAGER] 🔄 ID sidecar has crashed. Restarting...")
+            self.launch_sidecar()
+
+        self.check_heartbeats(now)
+        if now >= self._next_config_check:
+            self._next_config_check = now + CONFIG_CHECK_INTERVAL
+            self.check_config()
+
+    def check_heartbeats(self, now: Optional[float] = None) -> List[str]:
+        """
+        Kill shards whose heartbeat is older than `heartbeat_timeout` once past the startup grace.
+
+        The kill is then picked up as a normal exit and restarted with backoff.
+        """
+        now = time.time() if now is None else now
+        hung = []
+        for shard_name, proc in list(self.zone_processes.items()):
+            if proc.poll() is not None:
+                continue
+            if now - self.backoff.started_at.get(shard_name, now) < self.startup_grace:
+                continue
+            age = heartbeat_age(self.heartbeat_path(shard_name), now)
+            if age is None or age > self.heartbeat_timeout:
+                status = "no heartbeat" if age is None else f"last heartbeat {age:.0f}s ago"
+                print(f"[ZONE_MANAGER] 💤 Shard '{shard_name}' looks hung ({status}). Killing...")
+                proc.kill()
+                hung.append(shard_name)
+        return hung
+
+    def check_config(self) -> bool:
+        """Reload the config if its content changed. Returns True when a reload happened."""
+        # Same object unless the content changed; a broken edit keeps the last good topology
+        if get_topology(self.config_path) is self.topology:
+            return False
+        try:
+            self.reload_config()
+        except Exception as e:
+            print(f"[ZONE_MANAGER] ❌ Config reload failed, keeping current layout: {e}")
+        return True
+
+    def _shard_signature(self, shard: Shard) -> Tuple:
+        uris = tuple(self.camera_config.get_camera_uri(cam) for cam in shard.cameras)
+        return tuple(shard.cameras), uris
+
+    def _repin(self, shard_name: str) -> None:
+        """Move every thread of a running shard onto its (new) CPU set without restarting it."""
+        proc = self.zone_processes.get(shard_name)
+        cpus = set(self.shards[shard_name].cpus)
+        if not proc or proc.poll() is not None or not cpus or not hasattr(os, "sched_setaffinity"):
+            return
+        try:
+            for tid in os.listdir(f"/proc/{proc.pid}/task"):
+                os.sched_setaffinity(int(tid), cpus)
+        except OSError as e:
+            print(f"[ZONE_MANAGER] ⚠️ Could not re-pin shard '{shard_name}': {e}")
+
+    def reload_config(self) -> Dict[str, List[str]]:
+        """
+        Re-plan from the edited config and apply only the difference.
+
+        Shards that disappeared are stopped, new shards are started, and shards
+        whose cameras (or camera URIs) changed are restarted. Others keep
+        running and are only re-pinned if their CPU set moved.
+        """
+        old_signatures = {name: self._shard_signature(shard) for name, shard in self.shards.items()}
+        old_cpus = {name: shard.cpus for name, shard in self.shards.items()}
+        self.topology = get_topology(self.config_path)
+        self.camera_config = self.topology.config
+        self.plan()
+        new_signatures = {name: self._shard_signature(shard) for name, shard in self.shards.items()}
+
+        diff = {
+            "removed": sorted(set(old_signatures) - set(new_signatures)),
+            "added": sorted(set(new_signatures) - set(old_signatures)),
+            "changed": sorted(name for name in set(old_signatures) & set(new_signatures)
+                              if old_signatures[name] != new_signatures[name]),
+        }
+        print(f"[ZONE_MANAGER] 📝 Config changed: {diff}")
+
+        for shard_name in diff["removed"]:
+            self.terminate_zone(shard_name)
+            self.backoff.forget(shard_name)
+        for shard_name in diff["changed"]:
+            self.terminate_zone(shard_name)
+            self.backoff.forget(shard_name)
+            self.launch_shard(shard_name)
+        for shard_name in diff["added"]:
+            self.launch_shard(shard_name)
+        for shard_name in set(old_signatures) & set(new_signatures):
+            if shard_name not in diff["changed"] and old_cpus[shard_name] != self.shards[shard_name].cpus:
+                self._repin(shard_name)
+        return diff
+
     def terminate_all(self) -> None:
         """
         Gracefully stops all zone subprocesses.
         """
-        for zone_name in list(self.zone_processes.keys()):
-            self.terminate_zone(zone_name)
+        for shard_name in list(self.zone_processes.keys()):
+            self.terminate_zone(shard_name)
+        if self.sidecar_process and self.sidecar_process.poll() is None:
+            self.sidecar_process.terminate()
+            try:
+                self.sidecar_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.sidecar_process.kill()
         print("[ZONE_MANAGER] ✅ All zones terminated.")
 
 
@@ -9,6 +9,7 @@ Responsibilities:
 - Integrate detection, tracking, and optional ReID inference.
 - Extract object metadata (bbox, track_id, embedding, etc.) via pad probe.
 - Assign global IDs using the GlobalIDManager.
+- Detect ended tracks and report them to the GlobalIDManager.
 
 Author: Debjit
 """
@@ -23,18 +24,30 @@ import traceback
 import os
 import time
 import asyncio
-from typing import List
+import queue
+import threading
+from collections import deque
+from typing import List, TYPE_CHECKING
 # from app.global_id_manager import GlobalIDManager
-from global_id_service.qdrant_backend.id_manager import GlobalIDManager
+if TYPE_CHECKING:  # the runner picks GlobalIDManager or SidecarIDClient and imports it lazily
+    from global_id_service.qdrant_backend.id_manager import GlobalIDManager
 from app.FPS import PERF_DATA
+from app.track_lifecycle import TrackLifecycle
+from app.latency import LatencyTracker
+from app.camera_heartbeat import CameraHeartbeatPublisher, CAMERA_HEARTBEATS
+from app.supervision import touch_heartbeat, HEARTBEAT_ENV, ZONE_HEARTBEAT_INTERVAL
 from datetime import datetime
 
 gi.require_version('Gst', '1.0')
 from gi.repository import GLib, Gst
 
+ASSIGN_QUEUE_SIZE = int(os.getenv("ASSIGN_QUEUE_SIZE", 1024))
+ASSIGN_BATCH_SIZE = int(os.getenv("ASSIGN_BATCH_SIZE", 64))  # queued detections sent to the ID manager at once
+LATENCY_SNAPSHOT_INTERVAL = int(os.getenv("LATENCY_SNAPSHOT_INTERVAL", 5))
+
 
 class ZonePipeline:
-    def __init__(self, zone_name: str, camera_ids: List[str], config, global_id_manager: GlobalIDManager,fps_log_path=None):
+    def __init__(self, zone_name: str, camera_ids: List[str], config, global_id_manager: "GlobalIDManager",fps_log_path=None, latency_path=None):
         self.zone_name = zone_name
         self.camera_ids = camera_ids
         self.config = config
@@ -45,25 +58,138 @@ class ZonePipeline:
         print(" ********************************************** ", self.global_id_manager)
         self.is_built = False
         self.cuda_visible_devices =0
-        self.perf_data = PERF_DATA(stream_names=camera_ids, log_path=fps_log_path)
+        self.perf_data = PERF_DATA(
+            stream_names=camera_ids,
+            log_path=fps_log_path,
+            heartbeat_publisher=CameraHeartbeatPublisher(zone_name) if CAMERA_HEARTBEATS else None,
+        )
+        self.track_lifecycle = TrackLifecycle()
         self.index_to_cam = {i: cam_id for i, cam_id in enumerate(camera_ids)}
         self.cam_to_index = {cam_id: i for i, cam_id in enumerate(camera_ids)}
         self.display_mode = os.getenv("Display")
+        self.heartbeat_path = os.getenv(HEARTBEAT_ENV)
+        # Assignment runs on a worker thread so the probe never waits on Redis/Qdrant
+        self.latency = LatencyTracker()
+        self.latency_path = latency_path
+        self.assign_queue = queue.Queue(maxsize=ASSIGN_QUEUE_SIZE)
+        self.assign_dropped = 0
+        # Track ends are never dropped: they wait here, each behind the assignments queued before it
+        self.ended_tracks = deque()
+        self._assigns_queued = 0
+        self._assigns_done = 0
+        self._assign_worker = None
     
-    def _process_metadata(self, track_data):
+    def _process_metadata(self, batch):
+        """Assign global IDs to queued detections in one call (one sidecar round trip in sidecar mode)."""
+        global_ids = [None] * len(batch)
         try:
-            global_id = self.global_id_manager.assign_global_id(
-                track_data["cam_id"],
-                track_data["track_id"],
-                track_data["embedding"],
-                track_data["timestamp"],
-                self.zone_name
-            )
-            # print("embeddings -----> ", track_data["embedding"],track_data["embedding"].shape)
-            # print(f"Assigned Global ID: {global_id} → TrackID: {track_data['track_id']}")
-            print(f"[GLOBAL_ID] Assigned {global_id} for camera {track_data['cam_id']} track {track_data['track_id']}")
+            items = [{
+                "cam_id": track_data["cam_id"],
+                "track_id": track_data["track_id"],
+                "embedding": track_data["embedding"],
+                "timestamp": track_data["timestamp"],
+                "zone": self.zone_name,
+            } for track_data in batch]
+            if hasattr(self.global_id_manager, "assign_global_ids"):
+                global_ids = self.global_id_manager.assign_global_ids(items)
+            else:
+                global_ids = [
+                    self.global_id_manager.assign_global_id(item["cam_id"], item["track_id"], item["embedding"],
+                                                            item["timestamp"], item["zone"])
+                    for item in items
+                ]
+            for global_id, track_data in zip(global_ids, batch):
+                print(f"[GLOBAL_ID] Assigned {global_id} for camera {track_data['cam_id']} track {track_data['track_id']}")
+        except Exception as e:
+            print(f"[ERROR] Failed to assign {len(batch)} global IDs: {e}", file=sys.stderr)
+        return global_ids
+
+    def _enqueue(self, op, payload):
+        payload["enqueue_ts"] = time.time()
+        if op == "end":
+            payload["after"] = self._assigns_queued
+            self.ended_tracks.append(payload)
+            if not self.assign_queue.empty():
+                return  # the worker drains ended tracks after every queued item
+            op, payload = "wake", {}
+        try:
+            self.assign_queue.put_nowait((op, payload))
+            if op == "assign":
+                self._assigns_queued += 1
+        except queue.Full:
+            if op == "assign":
+                self.assign_dropped += 1
+
+    def _drain_ended(self, everything=False):
+        while self.ended_tracks and (everything or self.ended_tracks[0]["after"] <= self._assigns_done):
+            payload = self.ended_tracks.popleft()
+            self._end_track(payload["cam_id"], payload["track_id"], payload["last_seen"])
+
+    def _assignment_loop(self):
+        carry = None
+        while True:
+            op, payload = carry or self.assign_queue.get()
+            carry = None
+            if op == "stop":
+                self._drain_ended(everything=True)
+                return
+            if op != "assign":
+                self._drain_ended()
+                continue
+            dequeue_ts = time.time()
+            # Batch only what is already queued (typically the rest of the frame); never wait for more
+            batch = [payload]
+            while len(batch) < ASSIGN_BATCH_SIZE:
+                try:
+                    item = self.assign_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] != "assign":
+                    carry = item
+                    break
+                batch.append(item[1])
+            self._process_metadata(batch)
+            self._assigns_done += len(batch)
+            self._drain_ended()
+            done_ts = time.time()
+            for payload in batch:
+                self.latency.record(
+                    payload["cam_id"], payload["capture_ts"], payload["timestamp"],
+                    payload["enqueue_ts"], dequeue_ts, done_ts,
+                )
+
+    def _write_latency_snapshot(self):
+        try:
+            self.latency.write_snapshot(self.latency_path, {
+                "zone": self.zone_name,
+                "queue_depth": self.assign_queue.qsize(),
+                "dropped": self.assign_dropped,
+                "pending_ends": len(self.ended_tracks),
+            })
         except Exception as e:
-            print(f"[ERROR] Failed to assign global ID: {e}", file=sys.stderr)
+            print(f"[ERROR] Failed to write latency snapshot: {e}", file=sys.stderr)
+        return True  # Needed by GLib.timeout_add
+
+    def _report_id_stats(self):
+        try:
+            print(f"[ID_STATS] zone={self.zone_name} {self.global_id_manager.get_stats()}")
+        except Exception as e:
+            print(f"[ERROR] Failed to read ID stats: {e}", file=sys.stderr)
+        return True  # Needed by GLib.timeout_add
+
+    def _heartbeat(self):
+        # Runs on the GLib main loop: a stale file means the loop is stuck.
+        try:
+            touch_heartbeat(self.heartbeat_path)
+        except Exception as e:
+            print(f"[ERROR] Failed to write heartbeat: {e}", file=sys.stderr)
+        return True  # Needed by GLib.timeout_add
+
+    def _end_track(self, cam_id, track_id, last_seen):
+        try:
+            self.global_id_manager.end_track(cam_id, track_id, last_seen)
+        except Exception as e:
+            print(f"[ERROR] Failed to end track {cam_id}:{track_id}: {e}", file=sys.stderr)
     
     def cb_newpad(self, decodebin, decoder_src_pad, data):
         print("In cb_newpad")
@@ -232,6 +358,14 @@ class ZonePipeline:
                 sinkpad.add_probe(Gst.PadProbeType.BUFFER, self._metadata_probe, None)
                 GLib.timeout_add(1000, self.perf_data.perf_print_callback)
 
+        GLib.timeout_add_seconds(30, self._report_id_stats)
+        if self.heartbeat_path:
+            self._heartbeat()
+            GLib.timeout_add_seconds(ZONE_HEARTBEAT_INTERVAL, self._heartbeat)
+        if self.latency_path:
+            GLib.timeout_add_seconds(LATENCY_SNAPSHOT_INTERVAL, self._write_latency_snapshot)
+
+        self.is_built = True
         print(f"[SUCCESS] Pipeline for zone '{self.zone_name}' constructed.")
 
     def _metadata_probe(self, pad, info, user_data) -> Gst.PadProbeReturn:
@@ -244,12 +378,17 @@ class ZonePipeline:
             if not batch_meta:
                 return Gst.PadProbeReturn.OK
 
+            now = time.time()
             l_frame = batch_meta.frame_meta_list
             while l_frame:
                 frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
+                # ntp_timestamp is set when nvstreammux attaches system/NTP time; otherwise fall back to probe time
+                capture_ts = frame_meta.ntp_timestamp / 1e9 if frame_meta.ntp_timestamp else now
+                frame_object_ids = []
                 l_obj = frame_meta.obj_meta_list
                 while l_obj:
                     obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
+                    frame_object_ids.append(obj_meta.object_id)
                     # print("OBJ AND TRACK_ID BRO -----> ", obj_meta.obj_label,obj_meta.object_id)
                     l_user = obj_meta.obj_user_meta_list
                     while l_user:
@@ -269,11 +408,13 @@ class ZonePipeline:
                                     "cam_id": self.index_to_cam.get(frame_meta.pad_index, f"stream{frame_meta.pad_index}"),
                                     "track_id": obj_meta.object_id,
                                     "embedding": embedding,
-                                    "timestamp": time.time()
+                                    "timestamp": now,
+                                    "capture_ts": capture_ts,
+                                    "pts": frame_meta.buf_pts,
                                 }
                                 
                                 # Process global ID assignment in a separate thread (non-blocking)
-                                self._process_metadata(track_data)
+                                self._enqueue("assign", track_data)
 
                                 # global_id = self.global_id_manager.assign_global_id(
                                 #     zone_name=self.zone_name,
@@ -287,7 +428,12 @@ class ZonePipeline:
                 # Update frame rate through this probe
                 cam_id = self.index_to_cam.get(frame_meta.pad_index, f"stream{frame_meta.pad_index}")
                 self.perf_data.update_fps(cam_id)
+                self.track_lifecycle.observe_frame(cam_id, frame_object_ids, now)
                 l_frame = l_frame.next
+
+            # Report tracks that have left their camera
+            for cam_id, track_id, last_seen in self.track_lifecycle.collect_ended(now):
+                self._enqueue("end", {"cam_id": cam_id, "track_id": track_id, "last_seen": last_seen})
         except Exception as e:
             print(f"[ERROR] Metadata probe failed: {e}", file=sys.stderr)
         return Gst.PadProbeReturn.OK
@@ -300,8 +446,23 @@ class ZonePipeline:
             self.build()  # build if not already
         if self.pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
             raise RuntimeError("Unable to set pipeline to PLAYING")
+        if self._assign_worker is None:
+            self._assign_worker = threading.Thread(
+                target=self._assignment_loop, name=f"assign-{self.zone_name}", daemon=True
+            )
+            self._assign_worker.start()
         print(f"[INFO] Zone pipeline '{self.zone_name}' started.")
 
     def stop(self):
         self.pipeline.set_state(Gst.State.NULL)
+        if self._assign_worker is not None:
+            try:
+                self.assign_queue.put(("stop", {}), timeout=1)
+                self._assign_worker.join(timeout=5)
+            except queue.Full:
+                pass  # daemon thread; dropped with the process
+            self._assign_worker = None
+        if self.latency_path:
+            self._write_latency_snapshot()
+        self.perf_data.close()
         print(f"[INFO] Zone pipeline '{self.zone_name}' stopped.")
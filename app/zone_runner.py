@@ -6,24 +6,33 @@ Entrypoint for launching a single zone-level DeepStream pipeline.
 This script:
 - Loads camera configuration for the specified zone.
 - Initializes the DeepStream GStreamer pipeline via ZonePipeline.
-- Runs the main GStreamer event loop.
+- Warms up backend clients in the background while the pipeline is built.
+- Prints a startup timing report, then runs the main GStreamer event loop.
 
 Author: Debjit (Modified by Venkatesh & ChatGPT)
 """
 
+import time
+_PROCESS_START = time.perf_counter()
+
 import argparse
 import gi
+import os
 import sys
 import signal
+import threading
 
 gi.require_version('Gst', '1.0')
 from gi.repository import GObject, Gst
 from gi.repository import GLib, Gst
 
-from app.transition_graph import MultiZoneCameraConfig
+from app.topology import get_topology
 from app.zone_pipeline import ZonePipeline
-# from app.global_id_manager import GlobalIDManager
-from global_id_service.qdrant_backend.id_manager import GlobalIDManager
+from app.startup_timing import StartupTimer
+from global_id_service.config import ID_SIDECAR_SOCKET
+
+# Connect backends, load Lua scripts and preload the hot gallery before PLAYING
+ZONE_WARMUP = os.getenv("ZONE_WARMUP", "1") not in ("0", "false", "False", "")
 
 # Initialize GStreamer
 Gst.init(None)
@@ -35,36 +44,76 @@ def parse_args():
     parser.add_argument('--zone', type=str, required=True, help='Zone name to run (e.g., zone1)')
     parser.add_argument('--config', type=str, default='app/camera_config.yaml',
                         help='Path to camera config YAML')
+    parser.add_argument('--shard', type=str, default=None,
+                        help='Shard name when the zone is split across processes (default: zone name)')
+    parser.add_argument('--cameras', type=str, default=None,
+                        help='Comma-separated subset of the zone cameras to run (default: all)')
     return parser.parse_args()
 
 def main():
+    timer = StartupTimer(start=_PROCESS_START)
+    timer.mark("import")
     args = parse_args()
 
     # Load config and validate zone
-    config = MultiZoneCameraConfig(args.config)
-    zone_cameras = [cam for cam in config.camera_uri_map if config.get_zone_of_camera(cam) == args.zone]
+    with timer.phase("config"):
+        topology = get_topology(args.config)
+    zone_cameras = list(topology.cameras_in_zone(args.zone))
+    if args.cameras:
+        requested = args.cameras.split(",")
+        zone_cameras = [cam for cam in requested if cam in zone_cameras]
 
     if not zone_cameras:
         print(f"[ERROR] Zone '{args.zone}' not found or contains no cameras.", file=sys.stderr)
         sys.exit(1)
 
-    print(f"[INFO] Launching zone pipeline for: {args.zone}")
+    shard_name = args.shard or args.zone
+    print(f"[INFO] Launching zone pipeline for: {args.zone} (shard: {shard_name})")
     print(f"[INFO] Cameras in zone: {zone_cameras}")
 
-    # Step 1: Initialize GlobalIDManager
-    global_id_manager = GlobalIDManager()
+    # Step 1: Initialize GlobalIDManager (or share the host sidecar's); no I/O yet
+    if ID_SIDECAR_SOCKET:
+        from global_id_service.sidecar import SidecarIDClient
+        print(f"[INFO] Using ID sidecar at {ID_SIDECAR_SOCKET}")
+        global_id_manager = SidecarIDClient(ID_SIDECAR_SOCKET)
+    else:
+        from global_id_service.qdrant_backend.id_manager import GlobalIDManager
+        global_id_manager = GlobalIDManager()
+
+    # Warm up backends concurrently with the pipeline build
+    warmup_timings = {}
+
+    def run_warmup():
+        began = time.perf_counter()
+        try:
+            warmup_timings.update(global_id_manager.warmup())
+        except Exception as e:
+            print(f"[WARN] Backend warmup failed, connecting on first use: {e}", file=sys.stderr)
+        timer.record("connect", time.perf_counter() - began)
+
+    warmup_thread = threading.Thread(target=run_warmup, name="backend-warmup", daemon=True)
+    if ZONE_WARMUP:
+        warmup_thread.start()
+
     zone_name = args.zone
-    fps_log_path = f"/opt/nvidia/deepstream/deepstream-7.1/MCT/logs/fps_{zone_name}.log"
+    fps_log_path = f"/opt/nvidia/deepstream/deepstream-7.1/MCT/logs/fps_{shard_name}.bin"
+    latency_path = f"/opt/nvidia/deepstream/deepstream-7.1/MCT/logs/latency_{shard_name}.json"
 
      # Step 2: Initialize pipeline
     pipeline = ZonePipeline(
         zone_name=zone_name,
         camera_ids=zone_cameras,
-        config=config,
+        config=topology.config,
         global_id_manager=global_id_manager,
-        fps_log_path=fps_log_path
+        fps_log_path=fps_log_path,
+        latency_path=latency_path
         
     )
+    with timer.phase("pipeline_build"):
+        pipeline.build()
+    if ZONE_WARMUP:
+        with timer.phase("warmup_wait"):
+            warmup_thread.join()
 
     # Step 3: Run GObject loop
     loop = GLib.MainLoop()#GObject.MainLoop()
@@ -78,7 +127,11 @@ def main():
     signal.signal(signal.SIGTERM, shutdown)
 
     try:
-        pipeline.start()  # <-- Only this now
+        with timer.phase("playing"):
+            pipeline.start()  # <-- Only this now
+        print(timer.report())
+        if warmup_timings:
+            print("[STARTUP] backend " + "  ".join(f"{k}={v:.3f}s" for k, v in warmup_timings.items()))
         loop.run()
     except Exception as e:
         print(f"[ERROR] Exception in zone pipeline: {e}", file=sys.stderr)
@@ -0,0 +1,162 @@
+"""
+zone_scheduler.py
+
+Capacity-aware placement of cameras onto zone runner processes.
+
+A zone with more than `max_cameras_per_shard` cameras is split into shards,
+each run by its own `zone_runner.py` process. Cameras are packed onto shards
+by their declared cost (`cost:` per camera in camera_config.yaml, default
+1.0), and the host CPUs are divided between shards in proportion to cost.
+
+Shards of different zones are never packed into one process: a
+ZonePipeline serves exactly one zone (heartbeats, assignment zone, stats),
+so every zone gets at least one process however small it is.
+
+`python -m app.scheduler_check` exercises the planning and the ZoneManager
+with a stub runner command.
+
+The layout is written to `shards.json` next to the FPS logs so the API can
+report FPS and health per shard.
+
+Author: Debjit
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+from app.transition_graph import MultiZoneCameraConfig
+
+ZONE_MAX_CAMERAS_PER_SHARD = int(os.getenv("ZONE_MAX_CAMERAS_PER_SHARD", 16))
+ZONE_CPU_PINNING = os.getenv("ZONE_CPU_PINNING", "1") not in ("0", "false", "False", "")
+LOGS_DIR = "/opt/nvidia/deepstream/deepstream-7.1/MCT/logs"
+SHARD_LAYOUT_PATH = os.path.join(LOGS_DIR, "shards.json")
+
+
+class Shard:
+    """
+    One zone runner process.
+
+    Attributes:
+        name (str): Process name; the zone name for unsplit zones, `<zone>-s<i>` otherwise.
+        zone (str): Zone the cameras belong to.
+        cameras (List[str]): Camera IDs handled by this shard.
+        cost (float): Sum of the declared camera costs.
+        cpus (List[int]): CPUs the process is pinned to (empty → not pinned).
+    """
+
+    def __init__(self, name: str, zone: str, cameras: List[str], cost: float, cpus: Optional[List[int]] = None):
+        self.name = name
+        self.zone = zone
+        self.cameras = cameras
+        self.cost = cost
+        self.cpus = cpus or []
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "zone": self.zone, "cameras": self.cameras, "cost": self.cost, "cpus": self.cpus}
+
+    def __repr__(self) -> str:
+        return f"Shard({self.name}, cameras={self.cameras}, cost={self.cost}, cpus={self.cpus})"
+
+
+def split_zone(zone: str, cameras: List[str], costs: Dict[str, float], max_cameras: int) -> List[Shard]:
+    """
+    Split one zone into the fewest shards of at most `max_cameras` cameras,
+    balancing total cost greedily (largest camera first onto the cheapest shard).
+    """
+    if len(cameras) <= max_cameras:
+        return [Shard(zone, zone, list(cameras), sum(costs.get(c, 1.0) for c in cameras))]
+
+    num_shards = math.ceil(len(cameras) / max_cameras)
+    buckets: List[List[str]] = [[] for _ in range(num_shards)]
+    bucket_costs = [0.0] * num_shards
+    for cam in sorted(cameras, key=lambda c: -costs.get(c, 1.0)):
+        open_buckets = [i for i in range(num_shards) if len(buckets[i]) < max_cameras]
+        target = min(open_buckets, key=lambda i: bucket_costs[i])
+        buckets[target].append(cam)
+        bucket_costs[target] += costs.get(cam, 1.0)
+
+    order = {cam: i for i, cam in enumerate(cameras)}
+    return [
+        Shard(f"{zone}-s{i}", zone, sorted(bucket, key=order.get), bucket_costs[i])
+        for i, bucket in enumerate(buckets)
+    ]
+
+
+def assign_cpus(shards: List[Shard], cpus: List[int]) -> None:
+    """
+    Give each shard a contiguous CPU set sized by its share of the total cost.
+
+    With more shards than CPUs every shard gets one CPU, round-robin.
+    """
+    if not shards or not cpus:
+        return
+    if len(shards) >= len(cpus):
+        for i, shard in enumerate(shards):
+            shard.cpus = [cpus[i % len(cpus)]]
+        return
+
+    total_cost = sum(shard.cost for shard in shards) or len(shards)
+    quotas = [len(cpus) * (shard.cost or 1.0) / total_cost for shard in shards]
+    counts = [max(1, int(q)) for q in quotas]
+    # Hand out (or take back) the remainder by largest fractional part
+    by_remainder = sorted(range(len(shards)), key=lambda i: quotas[i] - int(quotas[i]), reverse=True)
+    while sum(counts) < len(cpus):
+        for i in by_remainder:
+            if sum(counts) == len(cpus):
+                break
+            counts[i] += 1
+    while sum(counts) > len(cpus):
+        i = max(range(len(shards)), key=lambda j: counts[j])
+        counts[i] -= 1
+
+    start = 0
+    for shard, count in zip(shards, counts):
+        shard.cpus = cpus[start:start + count]
+        start += count
+
+
+def plan_shards(
+    camera_config: MultiZoneCameraConfig,
+    max_cameras_per_shard: int = ZONE_MAX_CAMERAS_PER_SHARD,
+    cpus: Optional[List[int]] = None,
+    pin_cpus: bool = ZONE_CPU_PINNING,
+) -> List[Shard]:
+    """
+    Build the shard layout for every zone in the config.
+
+    Args:
+        camera_config: Parsed camera configuration.
+        max_cameras_per_shard: Upper bound on cameras per process.
+        cpus: CPUs available for pinning (default: this process's affinity set).
+        pin_cpus: Set to False to leave CPU placement to the OS scheduler.
+    """
+    shards: List[Shard] = []
+    for zone in camera_config.cfg["zones"]:
+        zone_cameras = [cam["id"] for cam in zone["cameras"]]
+        if zone_cameras:
+            shards.extend(split_zone(zone["name"], zone_cameras, camera_config.camera_cost_map, max_cameras_per_shard))
+
+    if pin_cpus:
+        if cpus is None:
+            cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        assign_cpus(shards, cpus)
+    return shards
+
+
+def write_shard_layout(shards: List[Shard], path: str = SHARD_LAYOUT_PATH) -> None:
+    """Atomically publish the shard layout for the API."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"shards": [shard.to_dict() for shard in shards]}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_shard_layout(path: str = SHARD_LAYOUT_PATH) -> List[Dict]:
+    """Read the published shard layout; empty when no ZoneManager has written one."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f).get("shards", [])
@@ -2,10 +2,10 @@ import streamlit as st
 import requests
 import pandas as pd
 import plotly.express as px
-import json
 from streamlit_autorefresh import st_autorefresh
+from dashboard_feed import LiveFeed
 
-# 🔁 Auto-refresh every 5 seconds (5000 ms)
+# 🔁 Re-render every 5 seconds (5000 ms) from the live feed; API data is only re-fetched on reloads
 st_autorefresh(interval=5000, limit=None, key="dashboard_refresh")
 
 API_URL = "http://localhost:8088/api"
@@ -13,13 +13,30 @@ API_URL = "http://localhost:8088/api"
 st.set_page_config(layout="wide")
 st.title("📡 Multi-Camera Tracking Dashboard")
 
-# === Fetch all cameras grouped by zone
-zone_cam_response = requests.get(f"{API_URL}/zones")
-if zone_cam_response.status_code != 200:
-    st.error("Failed to fetch zone-camera mapping.")
-    st.stop()
+# === Live feed (SSE deltas) and full reloads on demand
+# Feeds close themselves once their session stops re-rendering; a returning session starts a new one
+if "feed" not in st.session_state or st.session_state["feed"].closed:
+    st.session_state["feed"] = LiveFeed(API_URL)
+feed = st.session_state["feed"]
+feed.touch()
+
+full_reload = st.button("🔄 Full reload") or feed.needs_reload
+if full_reload:
+    feed.needs_reload = False
+    st.session_state["reload_token"] = st.session_state.get("reload_token", 0) + 1
+    st.session_state.pop("zone_camera_map", None)
+    st.session_state["fps_loaded"] = set()
+reload_token = st.session_state.get("reload_token", 0)
 
-zone_camera_map = zone_cam_response.json()
+# === Fetch all cameras grouped by zone
+if "zone_camera_map" not in st.session_state:
+    zone_cam_response = requests.get(f"{API_URL}/zones")
+    if zone_cam_response.status_code != 200:
+        st.error("Failed to fetch zone-camera mapping.")
+        st.stop()
+    st.session_state["zone_camera_map"] = zone_cam_response.json()
+
+zone_camera_map = st.session_state["zone_camera_map"]
 zones = list(zone_camera_map.keys())
 
 # === Select Zone
@@ -29,9 +46,14 @@ selected_zone = st.selectbox("📍 Select Zone", zones)
 selected_cam = st.selectbox("🎥 Select Camera", zone_camera_map[selected_zone])
 
 # === FPS Chart ===
-fps_response = requests.get(f"{API_URL}/fps/{selected_cam}")
-if fps_response.status_code == 200:
-    fps_data = fps_response.json()
+fps_loaded = st.session_state.setdefault("fps_loaded", set())
+if selected_cam not in fps_loaded:
+    fps_response = requests.get(f"{API_URL}/fps/{selected_cam}")
+    feed.seed_fps(selected_cam, fps_response.json() if fps_response.status_code == 200 else [])
+    fps_loaded.add(selected_cam)
+
+fps_data = feed.fps_series(selected_cam)
+if fps_data:
     df = pd.DataFrame(fps_data)
     fig = px.line(df, x="time", y="fps", title=f"FPS Over Time - {selected_cam}")
     st.plotly_chart(fig, use_container_width=True)
@@ -39,59 +61,85 @@ else:
     st.warning("No FPS data available for this camera.")
 
 # === Camera Health ===
-cam_health_response = requests.get(f"{API_URL}/health/cameras")
-if cam_health_response.status_code == 200:
-    cam_health = cam_health_response.json()
+if full_reload:
+    cam_health_response = requests.get(f"{API_URL}/health/cameras")
+    if cam_health_response.status_code == 200:
+        feed.seed_health(cam_health_response.json())
+    else:
+        st.error("Could not fetch camera health status.")
+    st.session_state["system_health"] = requests.get(f"{API_URL}/health").json()
+
+cam_health = feed.health_snapshot()
+if cam_health:
     st.subheader("📶 Camera Health Status")
     health_df = pd.DataFrame(list(cam_health.items()), columns=["Camera", "Status"])
-    health_df["🟢 Status"] = health_df["Status"].apply(lambda x: "🟢 LIVE" if x == "LIVE" else "🔴 DEAD")
+    health_df["🟢 Status"] = health_df["Status"].map(
+        {"LIVE": "🟢 LIVE", "DEGRADED": "🟡 DEGRADED", "DEAD": "🔴 DEAD"}
+    ).fillna("⚪ " + health_df["Status"])
     st.dataframe(health_df[["Camera", "🟢 Status"]])
-else:
-    st.error("Could not fetch camera health status.")
 
 # === System Health Ping ===
-health = requests.get(f"{API_URL}/health").json()
-st.caption(f"**System Status**: `{health['status']}`  |  ⏱️ Last Ping: `{health['timestamp']}`")
+health = st.session_state.get("system_health", {"status": "UNKNOWN", "timestamp": "-"})
+stream_state = "🟢 live" if feed.connected else "🔴 reconnecting"
+st.caption(
+    f"**System Status**: `{health['status']}`  |  ⏱️ Last Ping: `{health['timestamp']}`  |  📡 Stream: {stream_state}"
+)
 
 # === Active Global IDs ===
 st.subheader("🧬 Active Global IDs")
-global_id_response = requests.get(f"{API_URL}/global_ids")
+all_cameras = sorted({cam for cams in zone_camera_map.values() for cam in cams})
+selected_gid_cams = st.multiselect("🎥 Filter by Camera", all_cameras, default=[selected_cam])
+page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1)
+
+# Cursor stack per filter set: filters run server-side, one page is fetched per refresh
+gid_filter_key = (tuple(selected_gid_cams), page_size)
+if st.session_state.get("gid_filter_key") != gid_filter_key:
+    st.session_state["gid_filter_key"] = gid_filter_key
+    st.session_state["gid_cursors"] = [None]
+gid_cursors = st.session_state["gid_cursors"]
+
+gid_page_key = (gid_filter_key, gid_cursors[-1], reload_token)
+gid_params = {
+    "limit": page_size,
+    "camera_id": selected_gid_cams,
+    "fields": "global_id,camera_id,track_id,zone,timestamp,last_seen",
+}
+if gid_cursors[-1]:
+    gid_params["cursor"] = gid_cursors[-1]
+if st.session_state.get("gid_page_key") != gid_page_key:
+    global_id_response = requests.get(f"{API_URL}/global_ids", params=gid_params)
+    st.session_state["gid_page"] = global_id_response.json() if global_id_response.status_code == 200 else None
+    st.session_state["gid_page_key"] = gid_page_key
+
+with st.expander("⚡ Live global ID changes"):
+    live_changes = feed.recent_global_id_events()
+    if live_changes:
+        st.dataframe(pd.DataFrame(live_changes), use_container_width=True)
+    else:
+        st.caption("No changes since the last reload.")
 
-if global_id_response.status_code == 200:
-    gid_data = global_id_response.json()
+if st.session_state["gid_page"] is not None:
+    gid_data = st.session_state["gid_page"]
     gid_items = gid_data.get("items", [])
 
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("⬅️ Newer", disabled=len(gid_cursors) == 1):
+        gid_cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(gid_cursors)}")
+    if next_col.button("Older ➡️", disabled=not gid_data.get("next_cursor")):
+        gid_cursors.append(gid_data["next_cursor"])
+        st.rerun()
+
     if not gid_items:
         st.info("No active global IDs.")
     else:
         df_gid = pd.DataFrame(gid_items)
-
-        # Convert raw field to dict if it's a JSON string
-        df_gid["raw"] = df_gid["raw"].apply(
-            lambda r: json.loads(r) if isinstance(r, str) and r.strip().startswith("{") else r
-        )
-
-        # Extract fields
-        def extract_field(row, key):
-            raw = row["raw"]
-            if isinstance(raw, dict):
-                return raw.get(key)
-            return None
-
-        df_gid["track_id"] = df_gid.apply(lambda row: extract_field(row, "track_id"), axis=1)
-        df_gid["zone"] = df_gid.apply(lambda row: extract_field(row, "zone"), axis=1)
-        df_gid["timestamp"] = df_gid.apply(lambda row: extract_field(row, "timestamp"), axis=1)
         df_gid["timestamp"] = pd.to_datetime(df_gid["timestamp"], unit="s", errors="coerce")
-
-        # Filters
-        cameras = df_gid["camera_id"].dropna().unique().tolist()
-        selected_gid_cams = st.multiselect("🎥 Filter by Camera", cameras, default=cameras)
-
-        df_gid_filtered = df_gid[df_gid["camera_id"].isin(selected_gid_cams)]
+        df_gid["last_seen"] = pd.to_datetime(df_gid["last_seen"], unit="s", errors="coerce")
 
         st.dataframe(
-            df_gid_filtered[["global_id", "camera_id", "track_id", "zone", "timestamp"]]
-            .sort_values("timestamp", ascending=False),
+            df_gid[["global_id", "camera_id", "track_id", "zone", "timestamp", "last_seen"]],
             use_container_width=True,
             height=500
         )
@@ -99,12 +147,22 @@ if global_id_response.status_code == 200:
         # ✅ NEW: Show track ID history for selected Global ID
         st.markdown("---")
         st.subheader("🧾 Global ID → Track ID History")
-        selected_global_id = st.selectbox("Select a Global ID to view its track history", df_gid_filtered["global_id"].unique())
-
-        history_resp = requests.get(f"{API_URL}/track_ids/{selected_global_id}")
-        if history_resp.status_code == 200:
-            history_data = history_resp.json()
-            st.code("\n".join(history_data.get("track_ids", [])), language="text")
+        selected_global_id = st.selectbox("Select a Global ID to view its track history", df_gid["global_id"].unique())
+
+        history_key = (selected_global_id, reload_token)
+        if st.session_state.get("history_key") != history_key:
+            history_resp = requests.get(f"{API_URL}/track_ids/{selected_global_id}")
+            st.session_state["history"] = history_resp.json() if history_resp.status_code == 200 else None
+            st.session_state["history_key"] = history_key
+        if st.session_state["history"] is not None:
+            tracks = st.session_state["history"].get("tracks", [])
+            if tracks:
+                df_tracks = pd.DataFrame(tracks)
+                for col in ("first_seen", "last_seen"):
+                    df_tracks[col] = pd.to_datetime(df_tracks[col], unit="s", errors="coerce")
+                st.dataframe(df_tracks, use_container_width=True)
+            else:
+                st.info("No track history for this Global ID.")
         else:
             st.error("Failed to load track ID history.")
 else:
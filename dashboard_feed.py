@@ -0,0 +1,139 @@
+"""
+dashboard_feed.py
+
+Client side of the API's `/api/stream` Server-Sent Events for the Streamlit
+dashboard.
+
+A LiveFeed keeps one SSE connection per dashboard session on a daemon
+thread and folds the deltas into local state (FPS tails, camera health,
+recent global ID changes). Re-renders read that state and send no requests.
+`needs_reload` is set when the server asks for a resync or the connection
+drops, so the dashboard knows to fetch full datasets again.
+
+Streamlit never tells us a session is gone, so a feed nobody has read for
+FEED_IDLE_SECONDS closes itself; a session that comes back finds it
+`closed` and starts a new one.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+FPS_TAIL_POINTS = 3600  # live FPS samples kept per camera
+GLOBAL_ID_EVENTS = 200  # recent added/expired mappings kept for display
+FEED_IDLE_SECONDS = float(os.getenv("FEED_IDLE_SECONDS", 60.0))  # unread feeds disconnect after this
+
+
+class LiveFeed:
+    def __init__(self, api_url: str, topics=("fps", "health", "global_ids"), idle_seconds: float = FEED_IDLE_SECONDS):
+        self.url = f"{api_url}/stream"
+        self.topics = ",".join(topics)
+        self.lock = threading.Lock()
+        self.fps: Dict[str, deque] = {}
+        self.health: Dict[str, str] = {}
+        self.global_id_events: deque = deque(maxlen=GLOBAL_ID_EVENTS)
+        self.needs_reload = True
+        self.connected = False
+        self.last_event_id: Optional[str] = None
+        self.idle_seconds = idle_seconds
+        self.last_read = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dashboard-feed", daemon=True)
+        self._thread.start()
+
+    # ─── Seeding from full reloads ─────────────────────────────
+    def seed_fps(self, cam_id: str, samples: List[dict]) -> None:
+        with self.lock:
+            self.fps[cam_id] = deque(samples[-FPS_TAIL_POINTS:], maxlen=FPS_TAIL_POINTS)
+
+    def seed_health(self, health: Dict[str, str]) -> None:
+        with self.lock:
+            self.health = dict(health)
+
+    @property
+    def closed(self) -> bool:
+        return not self._thread.is_alive()
+
+    def touch(self) -> None:
+        """Mark the feed as read by a live session; call once per re-render."""
+        self.last_read = time.monotonic()
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self.last_read > self.idle_seconds
+
+    def fps_series(self, cam_id: str) -> List[dict]:
+        with self.lock:
+            return list(self.fps.get(cam_id, ()))
+
+    def health_snapshot(self) -> Dict[str, str]:
+        with self.lock:
+            return dict(self.health)
+
+    def recent_global_id_events(self) -> List[dict]:
+        with self.lock:
+            return list(reversed(self.global_id_events))
+
+    # ─── SSE handling ──────────────────────────────────────────
+    def _apply(self, event: str, data: dict) -> None:
+        with self.lock:
+            if event == "fps":
+                for cam_id, samples in data.items():
+                    if cam_id in self.fps:  # only cameras the dashboard has loaded
+                        self.fps[cam_id].extend(samples)
+            elif event == "health":
+                self.health.update(data)
+            elif event == "global_ids":
+                now = time.time()
+                self.global_id_events.extend({**item, "change": "added", "seen": now} for item in data.get("added", []))
+                self.global_id_events.extend({**item, "change": "expired", "seen": now} for item in data.get("expired", []))
+            elif event == "resync":
+                self.needs_reload = True
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            if self._idle():
+                logger.info(f"[FEED] No session read {self.url} for {self.idle_seconds:.0f}s, closing")
+                return
+            try:
+                with requests.get(self.url, params={"topics": self.topics}, stream=True, timeout=(5, 60)) as response:
+                    response.raise_for_status()
+                    self.connected = True
+                    failures = 0
+                    event, data = None, []
+                    # Server keepalives arrive every few seconds, so idleness is noticed without events
+                    for line in response.iter_lines(decode_unicode=True):
+                        if self._stop.is_set() or self._idle():
+                            break
+                        if line is None or line.startswith(":"):
+                            continue
+                        if line == "":
+                            if event and data:
+                                self._apply(event, json.loads("\n".join(data)))
+                            event, data = None, []
+                        elif line.startswith("event:"):
+                            event = line[6:].strip()
+                        elif line.startswith("data:"):
+                            data.append(line[5:].strip())
+                        elif line.startswith("id:"):
+                            self.last_event_id = line[3:].strip()
+            except Exception as e:
+                # Warn once per outage; retries while the API stays down only go to debug
+                failures += 1
+                log = logger.warning if failures == 1 else logger.debug
+                log(f"[FEED] {self.url} disconnected ({e}), retrying in 3s")
+            # Anything pushed while disconnected is lost: reload in full after reconnecting
+            self.connected = False
+            self.needs_reload = True
+            self._stop.wait(3.0)
+
+    def close(self) -> None:
+        self._stop.set()
@@ -1,4 +1,4 @@
 from global_id_service.redis_backend import RedisCache
 
+# Shared per process; connects on first use (see global_id_service.clients).
 redis_cache = RedisCache()
-redis_cache.connect()
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Client Registry - clients.py
+
+Process-wide, lazily connected backend clients.
+
+Every component in a process (GlobalIDManager, EmbeddingMatcher, the API)
+shares one RedisCache and one QdrantClientWrapper. Nothing connects at import
+time: clients connect on first use, or all at once and concurrently through
+connect_all() / warmup(), which zone runners call while the DeepStream
+pipeline is being built.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from global_id_service.cache_instance import redis_cache
+from global_id_service.redis_backend import AsyncRedisCache, RedisCache
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_qdrant = None
+_async_redis_cache = None
+
+
+def get_redis_cache() -> RedisCache:
+    """Shared RedisCache (connects on first command)."""
+    return redis_cache
+
+
+def get_async_redis_cache() -> AsyncRedisCache:
+    """Shared asyncio RedisCache for async services such as the dashboard API."""
+    global _async_redis_cache
+    if _async_redis_cache is None:
+        _async_redis_cache = AsyncRedisCache()
+    return _async_redis_cache
+
+
+def get_qdrant():
+    """Shared QdrantClientWrapper (collection check on first use)."""
+    global _qdrant
+    if _qdrant is None:
+        with _lock:
+            if _qdrant is None:
+                # qdrant-client is a heavy import; only pay for it when Qdrant is actually used.
+                from global_id_service.qdrant_backend.qdrant_client import QdrantClientWrapper
+                _qdrant = QdrantClientWrapper()
+    return _qdrant
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def connect_all() -> Dict[str, float]:
+    """
+    Connect Redis and Qdrant concurrently.
+
+    Returns:
+        Seconds spent per backend, e.g. {"redis": 0.004, "qdrant": 0.12}.
+    """
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="connect") as pool:
+        redis_future = pool.submit(_timed, get_redis_cache().connect)
+        qdrant_future = pool.submit(_timed, lambda: get_qdrant().connect())
+        return {"redis": redis_future.result(), "qdrant": qdrant_future.result()}
+
+
+def warmup(hot_points: int = 1000) -> Dict[str, float]:
+    """
+    Connect everything and preload what the first frames would otherwise wait for:
+    registered Lua scripts and the hot part of the Qdrant gallery.
+
+    Returns:
+        Seconds per step (connect_redis, connect_qdrant, scripts, gallery).
+    """
+    timings = {f"connect_{name}": seconds for name, seconds in connect_all().items()}
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup") as pool:
+        scripts_future = pool.submit(_timed, get_redis_cache().load_scripts)
+        gallery_future = pool.submit(_timed, lambda: get_qdrant().warmup(hot_points))
+        timings["scripts"] = scripts_future.result()
+        timings["gallery"] = gallery_future.result()
+    logger.info(f"Backend warmup done: {timings}")
+    return timings
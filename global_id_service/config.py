@@ -30,6 +30,57 @@ QDRANT_DISTANCE = os.getenv("QDRANT_DISTANCE", "Cosine")  # or "Dot", "Euclidean
 # ─────────────────────────────────────────────────────────────
 EMBEDDING_MATCH_THRESHOLD = float(os.getenv("EMBEDDING_MATCH_THRESHOLD", 0.90))
 CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 3600))  # Redis mapping ttl
+MAPPING_SWEEP_SECONDS = float(os.getenv("MAPPING_SWEEP_SECONDS", 30.0))  # expire stale/ended mappings this often
+TRACK_HISTORY_MAX = int(os.getenv("TRACK_HISTORY_MAX", 1000))  # (cam, track) entries kept per global ID
+
+# ─────────────────────────────────────────────────────────────
+# Track Lifecycle Config
+# ─────────────────────────────────────────────────────────────
+TRACK_END_ABSENCE_SECONDS = float(os.getenv("TRACK_END_ABSENCE_SECONDS", 2.0))  # unseen this long → ended
+TRACK_ENDED_TTL_SECONDS = int(os.getenv("TRACK_ENDED_TTL_SECONDS", 300))  # mapping ttl once a track ends
+
+# ─────────────────────────────────────────────────────────────
+# Local ID Cache Config
+# ─────────────────────────────────────────────────────────────
+LOCAL_ID_CACHE_SIZE = int(os.getenv("LOCAL_ID_CACHE_SIZE", 50000))  # (cam, track) entries per process
+ID_EVENTS_CHANNEL = os.getenv("ID_EVENTS_CHANNEL", "global_id_events")  # pub/sub for merges/reassignments
+
+# ─────────────────────────────────────────────────────────────
+# Dashboard Index Config
+# ─────────────────────────────────────────────────────────────
+ACTIVE_INDEX_FLUSH_SECONDS = float(os.getenv("ACTIVE_INDEX_FLUSH_SECONDS", 1.0))  # batch last-seen updates
+ACTIVE_TRACK_WINDOW_SECONDS = float(os.getenv("ACTIVE_TRACK_WINDOW_SECONDS", 10.0))  # seen this recently → active
+
+# ─────────────────────────────────────────────────────────────
+# Camera Transition Analytics Config
+# ─────────────────────────────────────────────────────────────
+TRANSITION_MAX_GAP_SECONDS = float(os.getenv("TRANSITION_MAX_GAP_SECONDS", 1800))  # longer gaps are not transitions
+TRANSITION_RETENTION_DAYS = int(os.getenv("TRANSITION_RETENTION_DAYS", 31))  # hourly transition hashes kept
+TRANSITION_MODEL_PATH = os.getenv(
+    "TRANSITION_MODEL_PATH", "/opt/nvidia/deepstream/deepstream-7.1/MCT/models/transition_model.npz"
+)  # learned transition model (.npz)
+TRANSITION_LEARN_DAYS = float(os.getenv("TRANSITION_LEARN_DAYS", 7))  # history the learner fits on
+TRANSITION_MIN_SAMPLES = int(os.getenv("TRANSITION_MIN_SAMPLES", 50))  # departures before a learned row replaces YAML
+
+# ─────────────────────────────────────────────────────────────
+# Camera Topology Config
+# ─────────────────────────────────────────────────────────────
+CAMERA_CONFIG_PATH = os.getenv(
+    "CAMERA_CONFIG_PATH", "/opt/nvidia/deepstream/deepstream-7.1/MCT/app/camera_config.yaml"
+)  # zones, cameras and transitions (shared topology, see app/topology.py)
+
+# ─────────────────────────────────────────────────────────────
+# Assignment Event Log Config
+# ─────────────────────────────────────────────────────────────
+ASSIGNMENT_LOG_DIR = os.getenv("ASSIGNMENT_LOG_DIR", "")  # hour-partitioned Parquet; empty → disabled
+ASSIGNMENT_LOG_FLUSH_SECONDS = float(os.getenv("ASSIGNMENT_LOG_FLUSH_SECONDS", 60.0))  # max buffering time
+ASSIGNMENT_LOG_FLUSH_ROWS = int(os.getenv("ASSIGNMENT_LOG_FLUSH_ROWS", 100000))  # buffered rows → early write
+
+# ─────────────────────────────────────────────────────────────
+# Assignment Sidecar Config
+# ─────────────────────────────────────────────────────────────
+ID_SIDECAR_SOCKET = os.getenv("ID_SIDECAR_SOCKET", "")  # empty → each zone owns its GlobalIDManager
+SIDECAR_MAX_BATCH = int(os.getenv("SIDECAR_MAX_BATCH", 64))  # assignments per batch
 
 # ─────────────────────────────────────────────────────────────
 # Service Config
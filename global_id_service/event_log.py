@@ -0,0 +1,246 @@
+"""
+Assignment Event Log - event_log.py
+
+Append-only, columnar log of every global ID assignment decision, for
+offline analytics without touching Redis or Qdrant.
+
+The ID service records one row per decision (Qdrant match, new ID or manual
+reassignment); cache hits are not decisions and are not logged. Rows are
+buffered as Arrow record batches and a background thread writes them every
+ASSIGNMENT_LOG_FLUSH_SECONDS (or ASSIGNMENT_LOG_FLUSH_ROWS rows) as Parquet
+files partitioned by UTC hour:
+
+    {ASSIGNMENT_LOG_DIR}/hour=2025-07-20T13/part-{host}-{pid}-{seq}.parquet
+
+Files are written under a dot-prefixed name and renamed into place, so
+readers never see a partial file. Within a file rows are sorted by
+(cam_id, timestamp), so row-group statistics let camera and time filters
+skip most of the data.
+
+query_assignments() reads the log back with predicate pushdown on time
+(partition pruning plus row-group statistics), camera and global ID.
+
+Run:
+    python -m global_id_service.event_log --since 1753016000 --cam camA --global-id 42
+"""
+
+import argparse
+import atexit
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from global_id_service.config import (
+    ASSIGNMENT_LOG_DIR,
+    ASSIGNMENT_LOG_FLUSH_SECONDS,
+    ASSIGNMENT_LOG_FLUSH_ROWS,
+)
+
+logger = logging.getLogger(__name__)
+
+ASSIGNMENT_SCHEMA = pa.schema([
+    ("timestamp", pa.float64()),    # detection time (epoch seconds)
+    ("cam_id", pa.string()),
+    ("track_id", pa.string()),
+    ("global_id", pa.int64()),
+    ("score", pa.float32()),        # best Qdrant similarity; null without candidates or for reassignments
+    ("decision", pa.string()),      # "matched", "new" or "reassigned"
+    ("zone", pa.string()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("hour", pa.string())]), flavor="hive")
+HOUR_FORMAT = "%Y-%m-%dT%H"  # UTC; sorts lexicographically in time order
+
+
+def hour_partition(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime(HOUR_FORMAT)
+
+
+class AssignmentEventLog:
+    """
+    Buffers assignment events and writes them as hour-partitioned Parquet files.
+
+    Attributes:
+        root (str): Directory holding the `hour=...` partitions.
+        flush_seconds (float): Longest time an event stays buffered.
+        flush_rows (int): Buffered rows that trigger an early write.
+    """
+
+    def __init__(self, root: str, flush_seconds: float = ASSIGNMENT_LOG_FLUSH_SECONDS,
+                 flush_rows: int = ASSIGNMENT_LOG_FLUSH_ROWS):
+        self.root = root
+        self.flush_seconds = flush_seconds
+        self.flush_rows = flush_rows
+        self._batches: List[pa.RecordBatch] = []
+        self._rows = 0
+        self._wakeup = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._failed = False
+        self._prefix = f"part-{socket.gethostname()}-{os.getpid()}"
+        self._seq = itertools.count()
+        self.written_rows = 0
+        self.dropped_rows = 0
+        os.makedirs(root, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="assignment-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, events: Iterable[Tuple[float, str, str, int, Optional[float], str, Optional[str]]]) -> None:
+        """Buffer (timestamp, cam_id, track_id, global_id, score, decision, zone) events as one record batch."""
+        columns = list(zip(*events))
+        if not columns:
+            return
+        timestamps, cam_ids, track_ids, global_ids, scores, decisions, zones = columns
+        batch = pa.RecordBatch.from_arrays([
+            pa.array(timestamps, pa.float64()),
+            pa.array(cam_ids, pa.string()),
+            pa.array([str(track_id) for track_id in track_ids], pa.string()),
+            pa.array(global_ids, pa.int64()),
+            pa.array(scores, pa.float32()),
+            pa.array(decisions, pa.string()),
+            pa.array(zones, pa.string()),
+        ], schema=ASSIGNMENT_SCHEMA)
+        with self._wakeup:
+            if self._closed:
+                self.dropped_rows += batch.num_rows
+                return
+            self._batches.append(batch)
+            self._rows += batch.num_rows
+            if self._rows >= self.flush_rows:
+                self._wakeup.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._closed or self._rows >= self.flush_rows, self.flush_seconds)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every buffered event now; returns the number of rows written."""
+        with self._write_lock:
+            with self._wakeup:
+                batches, self._batches, self._rows = self._batches, [], 0
+            if not batches:
+                return 0
+            table = pa.Table.from_batches(batches, schema=ASSIGNMENT_SCHEMA)
+            try:
+                written = self._write(table)
+                if self._failed:
+                    logger.info("[EVENT LOG] Writes restored")
+                self._failed = False
+                self.written_rows += written
+                return written
+            except Exception as e:
+                if not self._failed:
+                    logger.error(f"[EVENT LOG] Failed to write {table.num_rows} events to {self.root}: {e}")
+                self._failed = True
+                self.dropped_rows += table.num_rows
+                return 0
+
+    def _write(self, table: pa.Table) -> int:
+        hours = table.column("timestamp").to_numpy() // 3600
+        seq = next(self._seq)
+        for hour in np.unique(hours):
+            part = table.filter(pa.array(hours == hour))
+            part = part.sort_by([("cam_id", "ascending"), ("timestamp", "ascending")])
+            directory = os.path.join(self.root, f"hour={hour_partition(hour * 3600)}")
+            os.makedirs(directory, exist_ok=True)
+            name = f"{self._prefix}-{seq:06d}.parquet"
+            tmp_path = os.path.join(directory, f".{name}.tmp")
+            pq.write_table(part, tmp_path, compression="zstd", row_group_size=64 * 1024)
+            os.replace(tmp_path, os.path.join(directory, name))
+        return table.num_rows
+
+    def close(self) -> None:
+        """Stop the writer thread and write what is still buffered."""
+        with self._wakeup:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> dict:
+        return {"buffered": self._rows, "written": self.written_rows, "dropped": self.dropped_rows}
+
+
+_lock = threading.Lock()
+_event_log = None
+
+
+def get_assignment_log() -> Optional[AssignmentEventLog]:
+    """Process-wide event log under ASSIGNMENT_LOG_DIR; None when logging is disabled (empty dir)."""
+    global _event_log
+    if _event_log is None and ASSIGNMENT_LOG_DIR:
+        with _lock:
+            if _event_log is None:
+                _event_log = AssignmentEventLog(ASSIGNMENT_LOG_DIR)
+    return _event_log
+
+
+def query_assignments(root: str = ASSIGNMENT_LOG_DIR, since: Optional[float] = None, until: Optional[float] = None,
+                      cam_ids: Optional[List[str]] = None, global_ids: Optional[List[int]] = None,
+                      columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Assignment events with timestamp in [since, until], on `cam_ids`, of `global_ids`.
+
+    Hour partitions outside the time range are never opened; the remaining
+    filters are pushed down to the Parquet row-group statistics.
+    """
+    if not os.path.isdir(root):
+        return ASSIGNMENT_SCHEMA.empty_table().select(columns or ASSIGNMENT_SCHEMA.names)
+    dataset = ds.dataset(root, format="parquet", schema=ASSIGNMENT_SCHEMA.append(pa.field("hour", pa.string())),
+                         partitioning=PARTITIONING)
+    conditions = []
+    if since is not None:
+        conditions += [ds.field("hour") >= hour_partition(since), ds.field("timestamp") >= since]
+    if until is not None:
+        conditions += [ds.field("hour") <= hour_partition(until), ds.field("timestamp") <= until]
+    if cam_ids:
+        conditions.append(ds.field("cam_id").isin(list(cam_ids)))
+    if global_ids:
+        conditions.append(ds.field("global_id").isin([int(global_id) for global_id in global_ids]))
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+    table = dataset.to_table(columns=columns or ASSIGNMENT_SCHEMA.names, filter=condition)
+    if "timestamp" in table.column_names:
+        table = table.take(pc.sort_indices(table, [("timestamp", "ascending")]))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the Parquet assignment event log.")
+    parser.add_argument("--root", type=str, default=ASSIGNMENT_LOG_DIR, help="Event log directory")
+    parser.add_argument("--since", type=float, default=None, help="Epoch seconds (inclusive)")
+    parser.add_argument("--until", type=float, default=None, help="Epoch seconds (inclusive)")
+    parser.add_argument("--cam", action="append", default=None, help="Camera ID (repeatable)")
+    parser.add_argument("--global-id", type=int, action="append", default=None, help="Global ID (repeatable)")
+    parser.add_argument("--limit", type=int, default=50, help="Rows to print")
+    args = parser.parse_args()
+
+    if not args.root:
+        parser.error("--root is required when ASSIGNMENT_LOG_DIR is not set")
+    start = time.perf_counter()
+    table = query_assignments(args.root, args.since, args.until, args.cam, args.global_id)
+    elapsed = time.perf_counter() - start
+    print(table.slice(0, args.limit).to_pandas().to_string(index=False))
+    print(f"{table.num_rows} events in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
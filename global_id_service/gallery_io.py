@@ -0,0 +1,330 @@
+"""
+Gallery Import/Export - gallery_io.py
+
+Bulk export, import and re-index of the Qdrant embedding gallery
+(QDRANT_COLLECTION), e.g. after changing QDRANT_VECTOR_SIZE, the distance
+metric or the ReID model, without replaying traffic.
+
+- export  : scroll the collection (vectors + payload) into chunk files plus a
+            manifest.json. Writing a chunk overlaps with scrolling the next.
+- import  : stream the chunks back with upload_points (batched, `--workers`
+            parallel uploaders), optionally transforming the vectors.
+- reindex : scroll one collection straight into another, same transforms,
+            no files in between.
+
+Chunk formats:
+    parquet : chunk-NNNNNN.parquet with id, vector (fixed-size list) and payload (JSON)
+    npy     : chunk-NNNNNN.ids.npy, chunk-NNNNNN.vectors.npy (float32) and chunk-NNNNNN.payload.jsonl
+
+Transforms run per chunk in NumPy: `--projection P.npy` multiplies by a
+(old_dim, new_dim) matrix, `--normalize` re-normalizes to unit length
+(after the projection). Indexing is switched off during the upload and
+restored afterwards, so Qdrant builds the HNSW graph once instead of
+continuously.
+
+Run:
+    python -m global_id_service.gallery_io export --out /data/gallery --format npy
+    python -m global_id_service.gallery_io import --src /data/gallery --collection embeddings_v2 --recreate --workers 8
+    python -m global_id_service.gallery_io reindex --collection embeddings_v2 --projection pca_512_256.npy --normalize
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qmodels
+
+from global_id_service.config import QDRANT_HOST, QDRANT_PORT, QDRANT_COLLECTION, QDRANT_VECTOR_SIZE
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+FORMATS = ("parquet", "npy")
+
+# (ids, vectors, payloads) of one chunk
+Chunk = Tuple[np.ndarray, np.ndarray, List[dict]]
+
+
+def chunk_name(index: int) -> str:
+    return f"chunk-{index:06d}"
+
+
+# ─── Reading the collection ────────────────────────────────────
+def collection_params(client: QdrantClient, collection: str) -> Tuple[int, str]:
+    """(vector size, distance name) of a collection with a single unnamed vector."""
+    vectors = client.get_collection(collection).config.params.vectors
+    if not isinstance(vectors, qmodels.VectorParams):
+        raise ValueError(f"Collection {collection} uses named vectors, which gallery_io does not support")
+    return vectors.size, vectors.distance.value
+
+
+def scroll_chunks(client: QdrantClient, collection: str, chunk_size: int, page_size: int = 1000) -> Iterator[Chunk]:
+    """The whole collection as chunks of `chunk_size` points, in point ID order."""
+    ids, vectors, payloads = [], [], []
+    offset = None
+    while True:
+        points, offset = client.scroll(collection, limit=page_size, offset=offset,
+                                       with_payload=True, with_vectors=True)
+        for point in points:
+            ids.append(point.id)
+            vectors.append(point.vector)
+            payloads.append(point.payload or {})
+        while len(ids) >= chunk_size or (offset is None and ids):
+            yield (np.asarray(ids[:chunk_size], dtype=np.int64), np.asarray(vectors[:chunk_size], dtype=np.float32),
+                   payloads[:chunk_size])
+            del ids[:chunk_size], vectors[:chunk_size], payloads[:chunk_size]
+        if offset is None:
+            return
+
+
+# ─── Chunk files ───────────────────────────────────────────────
+def write_chunk(directory: str, index: int, chunk: Chunk, fmt: str) -> dict:
+    ids, vectors, payloads = chunk
+    name = chunk_name(index)
+    if fmt == "parquet":
+        table = pa.table({
+            "id": pa.array(ids, pa.int64()),
+            "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel(), pa.float32()), vectors.shape[1]),
+            "payload": pa.array([json.dumps(payload) for payload in payloads], pa.string()),
+        })
+        pq.write_table(table, os.path.join(directory, f"{name}.parquet"), compression="zstd")
+    else:
+        np.save(os.path.join(directory, f"{name}.ids.npy"), ids)
+        np.save(os.path.join(directory, f"{name}.vectors.npy"), vectors)
+        with open(os.path.join(directory, f"{name}.payload.jsonl"), "w") as f:
+            f.writelines(json.dumps(payload) + "\n" for payload in payloads)
+    return {"name": name, "count": len(ids)}
+
+
+def read_chunk(directory: str, name: str, fmt: str) -> Chunk:
+    if fmt == "parquet":
+        table = pq.read_table(os.path.join(directory, f"{name}.parquet"))
+        vector_column = table.column("vector").combine_chunks()
+        vectors = vector_column.flatten().to_numpy().reshape(len(vector_column), vector_column.type.list_size)
+        payloads = [json.loads(payload) for payload in table.column("payload").to_pylist()]
+        return table.column("id").to_numpy(), vectors, payloads
+    ids = np.load(os.path.join(directory, f"{name}.ids.npy"))
+    vectors = np.load(os.path.join(directory, f"{name}.vectors.npy"))
+    with open(os.path.join(directory, f"{name}.payload.jsonl")) as f:
+        payloads = [json.loads(line) for line in f]
+    return ids, vectors, payloads
+
+
+def read_manifest(directory: str) -> dict:
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def read_chunks(directory: str, manifest: dict) -> Iterator[Chunk]:
+    """Chunks of an export, the next one read while the current one is uploaded."""
+    names = [chunk["name"] for chunk in manifest["chunks"]]
+    if not names:
+        return
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="gallery-read") as pool:
+        pending = pool.submit(read_chunk, directory, names[0], manifest["format"])
+        for next_name in names[1:] + [None]:
+            chunk = pending.result()
+            pending = pool.submit(read_chunk, directory, next_name, manifest["format"]) if next_name else None
+            yield chunk
+
+
+# ─── Transforms ────────────────────────────────────────────────
+def transform_vectors(vectors: np.ndarray, projection: Optional[np.ndarray] = None,
+                      normalize: bool = False) -> np.ndarray:
+    """Project by a (old_dim, new_dim) matrix, then optionally scale every row to unit length."""
+    if projection is not None:
+        vectors = vectors @ projection
+    if normalize:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+    return vectors.astype(np.float32, copy=False)
+
+
+def load_projection(path: Optional[str], source_dim: int) -> Optional[np.ndarray]:
+    if not path:
+        return None
+    projection = np.load(path).astype(np.float32)
+    if projection.ndim != 2 or projection.shape[0] != source_dim:
+        raise ValueError(f"Projection {path} has shape {projection.shape}, expected ({source_dim}, new_dim)")
+    return projection
+
+
+# ─── Export / import ───────────────────────────────────────────
+def export_gallery(client: QdrantClient, collection: str, out_dir: str, chunk_size: int = 100000,
+                   fmt: str = "parquet", page_size: int = 1000) -> dict:
+    """Write every point of `collection` to chunk files in `out_dir`; returns the manifest."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt} (use {', '.join(FORMATS)})")
+    size, distance = collection_params(client, collection)
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    chunks, pending = [], None
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="gallery-write") as pool:
+        for index, chunk in enumerate(scroll_chunks(client, collection, chunk_size, page_size)):
+            # At most one chunk waits for the disk, so memory stays bounded by two chunks
+            if pending is not None:
+                chunks.append(pending.result())
+            pending = pool.submit(write_chunk, out_dir, index, chunk, fmt)
+        if pending is not None:
+            chunks.append(pending.result())
+    manifest = {
+        "collection": collection,
+        "vector_size": size,
+        "distance": distance,
+        "format": fmt,
+        "count": sum(chunk["count"] for chunk in chunks),
+        "chunks": chunks,
+        "exported_at": time.time(),
+    }
+    # Written last: a directory with a manifest is a complete export
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"[GALLERY] Exported {manifest['count']} points of {collection} in "
+                f"{time.perf_counter() - start:.1f}s → {out_dir}")
+    return manifest
+
+
+def prepare_collection(client: QdrantClient, collection: str, size: int, distance: str,
+                       recreate: bool = False) -> None:
+    """Create `collection` (dropping it first with `recreate`) or check an existing one fits `size`."""
+    if recreate and client.collection_exists(collection):
+        client.delete_collection(collection)
+    if not client.collection_exists(collection):
+        logger.info(f"[GALLERY] Creating collection {collection} ({size}-d, {distance})")
+        client.create_collection(collection, vectors_config=qmodels.VectorParams(
+            size=size, distance=qmodels.Distance(distance)))
+        return
+    existing_size, _ = collection_params(client, collection)
+    if existing_size != size:
+        raise ValueError(f"Collection {collection} holds {existing_size}-d vectors, the import is {size}-d "
+                         f"(use --recreate or another --collection)")
+
+
+def upload_chunks(client: QdrantClient, collection: str, chunks: Iterator[Chunk], batch_size: int = 256,
+                  workers: int = 4, projection: Optional[np.ndarray] = None, normalize: bool = False,
+                  defer_indexing: bool = True) -> int:
+    """
+    Upload chunks with upload_points (`workers` parallel uploaders); returns the point count.
+
+    With `defer_indexing` the HNSW index is only built once, after the upload.
+    """
+    uploaded = 0
+
+    def points():
+        nonlocal uploaded
+        for ids, vectors, payloads in chunks:
+            vectors = transform_vectors(vectors, projection, normalize)
+            uploaded += len(ids)
+            for point_id, vector, payload in zip(ids.tolist(), vectors.tolist(), payloads):
+                yield qmodels.PointStruct(id=point_id, vector=vector, payload=payload)
+
+    indexing_threshold = client.get_collection(collection).config.optimizer_config.indexing_threshold
+    if defer_indexing:
+        client.update_collection(collection, optimizer_config=qmodels.OptimizersConfigDiff(indexing_threshold=0))
+    try:
+        client.upload_points(collection, points(), batch_size=batch_size, parallel=workers, wait=True)
+    finally:
+        if defer_indexing:
+            client.update_collection(collection, optimizer_config=qmodels.OptimizersConfigDiff(
+                indexing_threshold=indexing_threshold))
+    return uploaded
+
+
+def import_gallery(client: QdrantClient, collection: str, src_dir: str, batch_size: int = 256, workers: int = 4,
+                   projection_path: Optional[str] = None, normalize: bool = False, distance: Optional[str] = None,
+                   recreate: bool = False, defer_indexing: bool = True) -> int:
+    """Upload an export into `collection`; returns the number of points uploaded."""
+    manifest = read_manifest(src_dir)
+    projection = load_projection(projection_path, manifest["vector_size"])
+    size = projection.shape[1] if projection is not None else manifest["vector_size"]
+    prepare_collection(client, collection, size, distance or manifest["distance"], recreate)
+    start = time.perf_counter()
+    uploaded = upload_chunks(client, collection, read_chunks(src_dir, manifest), batch_size, workers,
+                             projection, normalize, defer_indexing)
+    _log_upload(uploaded, collection, size, start)
+    return uploaded
+
+
+def reindex_gallery(client: QdrantClient, source: str, collection: str, chunk_size: int = 10000,
+                    batch_size: int = 256, workers: int = 4, projection_path: Optional[str] = None,
+                    normalize: bool = False, distance: Optional[str] = None, recreate: bool = False,
+                    defer_indexing: bool = True) -> int:
+    """Copy `source` into `collection` through the same transforms, without chunk files."""
+    if source == collection:
+        raise ValueError("Re-indexing needs a target collection other than the source")
+    source_size, source_distance = collection_params(client, source)
+    projection = load_projection(projection_path, source_size)
+    size = projection.shape[1] if projection is not None else source_size
+    prepare_collection(client, collection, size, distance or source_distance, recreate)
+    start = time.perf_counter()
+    uploaded = upload_chunks(client, collection, scroll_chunks(client, source, chunk_size), batch_size, workers,
+                             projection, normalize, defer_indexing)
+    _log_upload(uploaded, collection, size, start)
+    return uploaded
+
+
+def _log_upload(uploaded: int, collection: str, size: int, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    logger.info(f"[GALLERY] Uploaded {uploaded} points into {collection} in {elapsed:.1f}s "
+                f"({uploaded / max(elapsed, 1e-9):.0f} points/s)")
+    if size != QDRANT_VECTOR_SIZE:
+        logger.warning(f"[GALLERY] {collection} is {size}-d but QDRANT_VECTOR_SIZE={QDRANT_VECTOR_SIZE}; "
+                       f"update the service config before pointing it at this collection")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, import or re-index the Qdrant embedding gallery.")
+    parser.add_argument("--host", type=str, default=QDRANT_HOST)
+    parser.add_argument("--port", type=int, default=QDRANT_PORT)
+    parser.add_argument("--grpc", action="store_true", help="Use gRPC (faster for bulk transfers)")
+    parser.add_argument("--timeout", type=int, default=120, help="Request timeout in seconds")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Collection → chunk files")
+    export.add_argument("--collection", type=str, default=QDRANT_COLLECTION)
+    export.add_argument("--out", type=str, required=True, help="Output directory")
+    export.add_argument("--format", type=str, default="parquet", choices=FORMATS)
+    export.add_argument("--chunk-size", type=int, default=100000, help="Points per chunk file")
+    export.add_argument("--page-size", type=int, default=1000, help="Points per scroll request")
+
+    for name, help_text in (("import", "Chunk files → collection"), ("reindex", "Collection → collection")):
+        command = commands.add_parser(name, help=help_text)
+        if name == "import":
+            command.add_argument("--src", type=str, required=True, help="Export directory")
+            command.add_argument("--collection", type=str, default=QDRANT_COLLECTION, help="Target collection")
+        else:
+            command.add_argument("--source", type=str, default=QDRANT_COLLECTION, help="Source collection")
+            command.add_argument("--collection", type=str, required=True, help="Target collection")
+            command.add_argument("--chunk-size", type=int, default=10000, help="Points transformed at once")
+        command.add_argument("--batch-size", type=int, default=256, help="Points per upload request")
+        command.add_argument("--workers", type=int, default=4, help="Parallel upload workers")
+        command.add_argument("--projection", type=str, default=None, help=".npy (old_dim, new_dim) matrix")
+        command.add_argument("--normalize", action="store_true", help="Re-normalize vectors to unit length")
+        command.add_argument("--distance", type=str, default=None, choices=[d.value for d in qmodels.Distance],
+                             help="Distance of a created collection (default: the source's)")
+        command.add_argument("--recreate", action="store_true", help="Drop the target collection first")
+        command.add_argument("--keep-indexing", action="store_true", help="Index while uploading")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    client = QdrantClient(host=args.host, port=args.port, prefer_grpc=args.grpc, timeout=args.timeout)
+    if args.command == "export":
+        export_gallery(client, args.collection, args.out, args.chunk_size, args.format, args.page_size)
+    elif args.command == "import":
+        import_gallery(client, args.collection, args.src, args.batch_size, args.workers, args.projection,
+                       args.normalize, args.distance, args.recreate, not args.keep_indexing)
+    else:
+        reindex_gallery(client, args.source, args.collection, args.chunk_size, args.batch_size, args.workers,
+                        args.projection, args.normalize, args.distance, args.recreate, not args.keep_indexing)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Local ID Cache - local_cache.py
+
+Bounded in-process LRU of (cam_id, track_id) → global_id.
+
+Lets a zone process answer repeat lookups for a live track without a Redis
+round trip. Entries are invalidated through the Redis pub/sub channel on which
+ID merges and reassignments are broadcast (see GlobalIDManager).
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, Optional
+
+
+class LocalIDCache:
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            global_id = self._entries.get(key)
+            if global_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return global_id
+
+    def put(self, key: Hashable, global_id: int) -> None:
+        with self._lock:
+            self._entries[key] = global_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def remap(self, old_global_id: int, new_global_id: int) -> int:
+        """Point every entry of `old_global_id` to `new_global_id`. Returns the number of entries changed."""
+        with self._lock:
+            keys = [key for key, gid in self._entries.items() if gid == old_global_id]
+            for key in keys:
+                self._entries[key] = new_global_id
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,151 @@
+"""
+Mapping Migration - migrate_mappings.py
+
+One-shot conversion of the legacy per-track mapping strings
+`global_id:{cam}:{track}` (plain integer or JSON document) into the
+per-camera hashes of packed (global_id, first_seen) values the ID service
+now reads (see redis_backend.track_map_key).
+
+For every legacy key the track is also indexed in `active_tracks:{cam}`
+(last seen, or the legacy assignment time) so the mapping sweep expires it,
+ended tracks are scheduled in `ended_tracks:{cam}` with their remaining
+TTL, and the legacy key is unlinked. Keys are scanned in batches; the
+migration can be re-run and is safe while the ID service is running (new
+mappings are only written in the new layout).
+
+Run:
+    python -m global_id_service.migrate_mappings --dry-run
+    python -m global_id_service.migrate_mappings --drop-track-lists
+"""
+
+import argparse
+import json
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from global_id_service.clients import get_redis_cache
+from global_id_service.config import CACHE_TTL_SECONDS, TRACK_ENDED_TTL_SECONDS
+from global_id_service.redis_backend import TRACKED_CAMERAS_KEY
+
+logger = logging.getLogger(__name__)
+
+LEGACY_MAPPING_PATTERN = "global_id:*"
+LEGACY_TRACK_LIST_PATTERN = "track_ids:*"  # per-ID track lists replaced by the track histories
+
+
+def parse_legacy_mapping(value: str, now: float) -> Optional[Tuple[int, float, float, bool]]:
+    """(global_id, first_seen, last_seen, ended) of a legacy int/JSON value; None when unreadable."""
+    try:
+        if value.isdigit():
+            return int(value), now, now, False
+        record = json.loads(value)
+        first_seen = float(record.get("first_seen", record.get("timestamp", now)))
+        last_seen = float(record.get("last_seen", first_seen))
+        return int(record["global_id"]), first_seen, last_seen, bool(record.get("ended"))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def migrate_batch(cache, keys: List[str], now: float, dry_run: bool = False, keep: bool = False) -> Tuple[int, int]:
+    """Convert one batch of legacy keys (two pipelined round trips); returns (migrated, skipped)."""
+    with cache.pipeline() as pipe:
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+        replies = pipe.execute()
+
+    mappings, migrated_keys, touches, ended, skipped = [], [], {}, {}, 0
+    for i, key in enumerate(keys):
+        value, ttl = replies[2 * i], replies[2 * i + 1]
+        _, _, rest = key.partition(":")
+        cam_id, _, track_id = rest.rpartition(":")
+        parsed = parse_legacy_mapping(value, now) if value is not None and cam_id else None
+        if parsed is None:
+            if value is not None:
+                logger.warning(f"[MIGRATE] Skipping unreadable mapping {key}={value!r}")
+            skipped += 1
+            continue
+        global_id, first_seen, last_seen, is_ended = parsed
+        mappings.append((cam_id, track_id, global_id, first_seen))
+        migrated_keys.append(key)
+        touches[(cam_id, track_id)] = last_seen
+        if is_ended:
+            # Backdated so the sweep drops it when the legacy key would have expired
+            remaining = ttl if ttl and ttl > 0 else TRACK_ENDED_TTL_SECONDS
+            ended[(cam_id, track_id)] = now - TRACK_ENDED_TTL_SECONDS + min(remaining, TRACK_ENDED_TTL_SECONDS)
+    if dry_run or not mappings:
+        return len(mappings), skipped
+
+    with cache.pipeline() as pipe:
+        cache.write_mappings(pipe, mappings, ttl=CACHE_TTL_SECONDS)
+        cache.index_touches(pipe, touches, ttl=CACHE_TTL_SECONDS)
+        cache.end_tracks(pipe, ended, ttl=CACHE_TTL_SECONDS)
+        pipe.sadd(TRACKED_CAMERAS_KEY, *{cam_id for cam_id, _, _, _ in mappings})
+        if not keep:
+            pipe.unlink(*migrated_keys)  # unreadable keys stay for inspection
+        pipe.execute()
+    return len(mappings), skipped
+
+
+def drop_keys(cache, pattern: str, batch_size: int, dry_run: bool = False) -> int:
+    dropped = 0
+    batch = []
+    for key in cache.redis.scan_iter(match=pattern, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            dropped += len(batch)
+            if not dry_run:
+                cache.redis.unlink(*batch)
+            batch = []
+    if batch:
+        dropped += len(batch)
+        if not dry_run:
+            cache.redis.unlink(*batch)
+    return dropped
+
+
+def migrate(batch_size: int = 1000, dry_run: bool = False, keep: bool = False,
+            drop_track_lists: bool = False) -> dict:
+    """Migrate every legacy mapping key; returns counts and Redis memory before/after."""
+    cache = get_redis_cache()
+    now = time.time()
+    memory_before = cache.redis.info("memory").get("used_memory")
+    migrated = skipped = 0
+    batch = []
+    for key in cache.redis.scan_iter(match=LEGACY_MAPPING_PATTERN, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            done, bad = migrate_batch(cache, batch, now, dry_run, keep)
+            migrated, skipped = migrated + done, skipped + bad
+            batch = []
+            logger.info(f"[MIGRATE] {migrated} mappings converted so far")
+    if batch:
+        done, bad = migrate_batch(cache, batch, now, dry_run, keep)
+        migrated, skipped = migrated + done, skipped + bad
+    track_lists = drop_keys(cache, LEGACY_TRACK_LIST_PATTERN, batch_size, dry_run) if drop_track_lists else 0
+    return {
+        "migrated": migrated,
+        "skipped": skipped,
+        "track_lists_dropped": track_lists,
+        "used_memory_before": memory_before,
+        "used_memory_after": cache.redis.info("memory").get("used_memory"),
+        "dry_run": dry_run,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert legacy global_id:{cam}:{track} mappings to packed per-camera hashes.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Keys per SCAN/pipeline batch")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be converted")
+    parser.add_argument("--keep", action="store_true", help="Keep the legacy keys after converting them")
+    parser.add_argument("--drop-track-lists", action="store_true", help="Also unlink the legacy track_ids:* lists")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    report = migrate(args.batch_size, args.dry_run, args.keep, args.drop_track_lists)
+    logger.info(f"[MIGRATE] {report}")
+
+
+if __name__ == "__main__":
+    main()
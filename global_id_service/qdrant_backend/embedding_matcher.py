@@ -10,7 +10,7 @@ Used by GlobalIDManager to assign consistent IDs.
 """
 
 from typing import List, Optional, Tuple
-from global_id_service.qdrant_backend.qdrant_client import QdrantClientWrapper
+from global_id_service.clients import get_qdrant
 from global_id_service.config import EMBEDDING_MATCH_THRESHOLD
 import logging
 
@@ -18,8 +18,9 @@ logger = logging.getLogger(__name__)
 
 
 class EmbeddingMatcher:
-    def __init__(self):
-        self.qdrant = QdrantClientWrapper()
+    def __init__(self, qdrant=None):
+        # Default to the process-wide client, so a process holds one Qdrant connection.
+        self.qdrant = qdrant or get_qdrant()
     
     
     def find_best_match(
@@ -65,6 +66,33 @@ class EmbeddingMatcher:
             logger.debug(f"✘ No match above threshold (best={score:.4f})")
             return None, None
 
+    def find_best_matches(
+        self,
+        embeddings: List[List[float]],
+        zone_filters: List[Optional[str]],
+        cam_ids: List[Optional[str]]
+    ) -> List[Tuple[Optional[int], Optional[float]]]:
+        """
+        Batched find_best_match: one Qdrant request for many embeddings.
+        """
+        filters = []
+        for zone_filter, cam_id in zip(zone_filters, cam_ids):
+            query_filter = {}
+            if zone_filter:
+                query_filter["zone"] = zone_filter
+            if cam_id:
+                query_filter["cam_id"] = cam_id
+            filters.append(query_filter or None)
+
+        matches = []
+        for results in self.qdrant.search_similar_batch(embeddings=embeddings, top_k=5, filters=filters):
+            if results and results[0].score >= EMBEDDING_MATCH_THRESHOLD:
+                logger.debug(f"✔ Match found: global_id={results[0].id} with score={results[0].score:.4f}")
+                matches.append((results[0].id, results[0].score))
+            else:
+                matches.append((None, results[0].score if results else None))
+        return matches
+
     # def find_best_match(
     #     self,
     #     embedding: List[float],
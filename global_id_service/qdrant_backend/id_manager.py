@@ -4,101 +4,400 @@ Global ID Manager - id_manager.py
 Core logic to:
 - Match incoming embeddings using Qdrant
 - Assign new global IDs when needed
-- Cache track_id ↔ global_id in Redis
+- Cache track_id ↔ global_id in Redis as per-camera hashes of packed
+  (global_id, first_seen) values, with a capped per-ID track history
+- Expire the mappings of stale and ended tracks with a periodic index-driven sweep
+- Release tracks once DeepStream reports them ended
+- Keep a local (cam_id, track_id) → global_id LRU, invalidated over Redis pub/sub
+- Maintain the per-camera active-track indexes and counters the dashboard reads
+- Record camera-to-camera transitions whenever an ID shows up on a new camera
+- Fill in the zone of callers that send none from the shared camera topology
+- Log every assignment decision to the Parquet event log (when ASSIGNMENT_LOG_DIR is set)
 """
 
-from typing import List, Optional
+from collections import defaultdict
+from typing import Dict, List, Optional
 import logging
-import json
+import time
 
 from global_id_service.qdrant_backend.embedding_matcher import EmbeddingMatcher
-from global_id_service.qdrant_backend.qdrant_client import QdrantClientWrapper
 # from global_id_service.redis_backend import RedisCache
-from global_id_service.cache_instance import redis_cache
-from global_id_service.config import CACHE_TTL_SECONDS
+from global_id_service.clients import get_qdrant, get_redis_cache, warmup as warmup_clients
+from global_id_service.local_cache import LocalIDCache
+from global_id_service.redis_backend import active_tracks_key
+from global_id_service import transitions
+from global_id_service.config import (
+    CACHE_TTL_SECONDS,
+    TRACK_ENDED_TTL_SECONDS,
+    LOCAL_ID_CACHE_SIZE,
+    ACTIVE_INDEX_FLUSH_SECONDS,
+    MAPPING_SWEEP_SECONDS,
+    ASSIGNMENT_LOG_DIR,
+    CAMERA_CONFIG_PATH,
+)
 
 logger = logging.getLogger(__name__)
 
-
 class GlobalIDManager:
     def __init__(self):
-        self.qdrant = QdrantClientWrapper()
-        self.matcher = EmbeddingMatcher()
-        self.cache = redis_cache#RedisCache()
-        # self.cache.connect()
+        # Shared, lazily connected clients: constructing the manager does no I/O.
+        self.qdrant = get_qdrant()
+        self.matcher = EmbeddingMatcher(qdrant=self.qdrant)
+        self.cache = get_redis_cache()
+        self.cache.register_script("record_transition", transitions.RECORD_TRANSITION_LUA)
+        self.cache.register_script("touch_last_cameras", transitions.TOUCH_LAST_CAMERAS_LUA)
+        # (cam_id, track_id) → {"first_seen", "last_seen", "detections"} for live tracks, persisted on end
+        self.track_stats: Dict[tuple, dict] = {}
+        self.local_ids = LocalIDCache(LOCAL_ID_CACHE_SIZE)
+        # (cam_id, track_id) → last seen, written to the active-track indexes every ACTIVE_INDEX_FLUSH_SECONDS
+        self._touches: Dict[tuple, float] = {}
+        # global_id → (cam_id, last_seen), flushed with the touches for transition travel times
+        self._global_id_seen: Dict[int, tuple] = {}
+        # global_id → {(cam_id, track_id): last_seen}, flushed with the touches into the track histories
+        self._history_touches: Dict[int, Dict[tuple, float]] = {}
+        # (cam_id, track_id) → end time, flushed with the touches
+        self._ended: Dict[tuple, float] = {}
+        # (cam_id, track_id) → (global_id or None, final stats) of ended tracks, flushed into the track histories
+        self._finished: Dict[tuple, tuple] = {}
+        self._last_touch_flush = time.monotonic()
+        # Cameras this process wrote to; their mappings are swept every MAPPING_SWEEP_SECONDS
+        self._cameras = set()
+        self._last_sweep = time.monotonic()
+        self._id_events = None
+        self._subscribed = False
+        self.events = None
+        if ASSIGNMENT_LOG_DIR:
+            # pyarrow is a heavy import; only pay for it when the event log is enabled.
+            from global_id_service.event_log import get_assignment_log
+            self.events = get_assignment_log()
+
+    def warmup(self) -> dict:
+        """
+        Connect Redis and Qdrant concurrently, load Lua scripts, preload the hot
+        gallery and subscribe to ID events. Returns per-step timings in seconds.
+        """
+        timings = warmup_clients()
+        self._ensure_subscribed()
+        return timings
+
+    def _ensure_subscribed(self) -> None:
+        if self._subscribed:
+            return
+        self._subscribed = True
+        try:
+            self._id_events = self.cache.subscribe_id_events(self._on_id_event)
+        except Exception as e:
+            # Without invalidation the local cache could serve merged IDs; disable it.
+            logger.warning(f"[ID EVENTS] Subscribe failed, local ID cache disabled: {e}")
+            self.local_ids.max_size = 0
+            self.local_ids.clear()
+
+    def _zone_of(self, cam_id: str) -> str:
+        """Zone of a camera in the shared topology; "unknown" without a readable camera config."""
+        try:
+            from app.topology import get_topology
+            return get_topology(CAMERA_CONFIG_PATH).zone_of(cam_id) or "unknown"
+        except Exception as e:
+            logger.debug(f"[TOPOLOGY] No zone for {cam_id}: {e}")
+            return "unknown"
 
     def assign_global_id(self, cam_id: str, track_id: str, embedding: List[float], timestamp: float, zone: Optional[str] = None) -> int:
         try:
-            # cache_key = f"{cam_id}:{track_id}"
-            cache_key = f"global_id:{cam_id}:{track_id}"
-            # print("cache_key:", cache_key)
-            
-            # STEP 0: Inspect Qdrant database
-            # self.qdrant.debug_print_all_ids()
-
-            # Step 1: Check cache
-            # cached_id = self.cache.get(cache_key)
-            # # print("[CHECK] Redis Cache Hit:", cached_id)
-            # if cached_id is not None:
-            #     logger.debug(f"Found cached global_id={cached_id} for {cache_key}")
-            #     return int(cached_id)
-            cached_value = self.cache.get(cache_key)
-            if cached_value is not None:
-                try:
-                    # Case 1: direct int from Redis (old cache)
-                    if isinstance(cached_value, int):
-                        logger.debug(f"[REDIS HIT] Found legacy int global_id={cached_value} for {cache_key}")
-                        return cached_value
-                    # Case 2: valid JSON
-                    if isinstance(cached_value, str) and cached_value.startswith("{"):
-                        parsed = json.loads(cached_value)
-                        global_id = parsed.get("global_id")
-                        if global_id is not None:
-                            logger.debug(f"[REDIS HIT] Found global_id={global_id} for {cache_key}")
-                            return int(global_id)
-                    logger.warning(f"[REDIS WARNING] Unexpected format for cached value: {cached_value}")
-                except Exception as e:
-                    logger.warning(f"[REDIS ERROR] Failed to parse cached value for {cache_key}: {e}")
-
-            global_id = None
-            # Step 2: Qdrant match
-            global_id, score = self.matcher.find_best_match(
-                embedding=embedding,
-                zone_filter=zone,
-                cam_id=cam_id
-            )
-            # print("[QDRANT MATCH] ID:", global_id, "Score:", score)
+            return self.assign_global_ids([{
+                "cam_id": cam_id,
+                "track_id": track_id,
+                "embedding": embedding,
+                "timestamp": timestamp,
+                "zone": zone,
+            }])[0]
+        except Exception as e:
+            print("🔥 ERROR in assign_global_id:", e)
+
+    def assign_global_ids(self, items: List[Dict]) -> List[int]:
+        """
+        Assign global IDs to a batch of detections.
+
+        Each item holds cam_id, track_id, embedding, timestamp and optional zone.
+        The batch costs at most one Redis read, one Qdrant batch search, one
+        Qdrant upsert and one Redis pipeline, whatever its size. Detections of
+        the same (cam_id, track_id) inside a batch share one assignment.
+
+        Returns:
+            Global IDs in the order of `items`.
+        """
+        self._ensure_subscribed()
+        results = self._assign_batch(items)
+        self._flush_touches()
+        return results
+
+    def _assign_batch(self, items: List[Dict]) -> List[int]:
+        results: List[Optional[int]] = [None] * len(items)
+        pending: Dict[tuple, List[int]] = {}
 
-            # Step 3: Assign if needed
+        # Step 0: Local LRU (no I/O)
+        for i, item in enumerate(items):
+            local_key = (item["cam_id"], str(item["track_id"]))
+            self._update_track_stats(local_key, item["timestamp"])
+            local_id = self.local_ids.get(local_key)
+            if local_id is not None:
+                results[i] = local_id
+                self._touch(local_key, item["timestamp"], local_id)
+            else:
+                pending.setdefault(local_key, []).append(i)
+        if not pending:
+            return results
+
+        # Step 1: Check Redis cache
+        misses = []
+        for local_key, mapping in zip(pending, self.cache.get_mappings(list(pending))):
+            if mapping is None:
+                misses.append(local_key)
+                continue
+            global_id = mapping[0]
+            self.local_ids.put(local_key, global_id)
+            for i in pending[local_key]:
+                results[i] = global_id
+                self._touch(local_key, items[i]["timestamp"], global_id)
+        if not misses:
+            return results
+
+        # Step 2: Qdrant match
+        firsts = [items[pending[local_key][0]] for local_key in misses]
+        matches = self.matcher.find_best_matches(
+            embeddings=[item["embedding"] for item in firsts],
+            zone_filters=[item.get("zone") for item in firsts],
+            cam_ids=[item["cam_id"] for item in firsts]
+        )
+
+        # Step 3: Assign new IDs for unmatched detections
+        new_count = sum(1 for global_id, _ in matches if global_id is None)
+        next_new_id = self.cache.increment_global_id(new_count) - new_count + 1 if new_count else None
+        assigned = []
+        for global_id, _ in matches:
             if global_id is None:
-                global_id = self.cache.increment_global_id()
+                global_id = next_new_id
+                next_new_id += 1
                 logger.info(f"[NEW ID] Assigned new global_id={global_id} for person")
-            # print(f"[REDIS SET] Setting new ID: {cache_key} → {global_id}")
-            # Step 4: Qdrant upsert
-            metadata = {
-                "cam_id": cam_id,
-                "track_id": track_id,
-                "zone": zone or "unknown",
-                "timestamp": timestamp
-            }
-            self.qdrant.upsert_embedding(global_id, embedding, metadata)
-            # print("[QDRANT UPSERT] Done for global_id:", global_id)
-
-            # Step 5: Save to Redis
-            # self.cache.set(cache_key, global_id, ttl=CACHE_TTL_SECONDS)
-            self.cache.set(cache_key, json.dumps({
-            "global_id": global_id,
-            "camera_id": cam_id,
-            "track_id": track_id,
-            "zone": zone or "unknown",
-            "timestamp": timestamp
-            }), ttl=CACHE_TTL_SECONDS)
-            # print("[REDIS SET] cache_key:", cache_key, "→", global_id)
-            # NEW: Append this track ID to the global_id's history list
-            self.cache.push_track_id(global_id, cam_id, track_id)
-            logger.debug(f"[REDIS LOG] Added {cam_id}:{track_id} to history for global_id={global_id}")
-
-            return int(global_id)
+            assigned.append(int(global_id))
 
+        # Step 4: Qdrant upsert
+        zones = [item.get("zone") or self._zone_of(item["cam_id"]) for item in firsts]
+        self.qdrant.upsert_embeddings([
+            (global_id, item["embedding"], {
+                "cam_id": item["cam_id"],
+                "track_id": item["track_id"],
+                "zone": zone,
+                "timestamp": item["timestamp"]
+            })
+            for global_id, item, zone in zip(assigned, firsts, zones)
+        ])
+
+        # Step 5: Save mappings and track history to Redis
+        with self.cache.pipeline() as pipe:
+            self.cache.write_mappings(pipe, [
+                (item["cam_id"], item["track_id"], global_id, item["timestamp"])
+                for global_id, item in zip(assigned, firsts)
+            ], ttl=CACHE_TTL_SECONDS)
+            self.cache.record_track_history([
+                (global_id, item["cam_id"], item["track_id"], item["timestamp"], item["timestamp"])
+                for global_id, item in zip(assigned, firsts)
+            ], ttl=CACHE_TTL_SECONDS, client=pipe)
+            self.cache.index_new_tracks(pipe, [
+                (item["cam_id"], item["track_id"], item["timestamp"], global_id is None)
+                for (global_id, _), item in zip(matches, firsts)
+            ])
+            # Unflushed sightings of these IDs go first so travel times start from the true last sighting
+            arrivals = [(global_id, item["cam_id"], item["timestamp"]) for global_id, item in zip(assigned, firsts)]
+            transitions.touch_last_cameras(self.cache, pipe, {
+                global_id: self._global_id_seen.pop(global_id)
+                for global_id, _, _ in arrivals if global_id in self._global_id_seen
+            }, last_camera_ttl=CACHE_TTL_SECONDS)
+            transitions.record_arrivals(self.cache, pipe, arrivals, last_camera_ttl=CACHE_TTL_SECONDS)
+            pipe.execute()
+
+        # Step 6: Log the decisions
+        if self.events is not None:
+            self.events.record(
+                (item["timestamp"], item["cam_id"], item["track_id"], global_id, score,
+                 "new" if matched_id is None else "matched", zone)
+                for global_id, (matched_id, score), item, zone in zip(assigned, matches, firsts, zones)
+            )
+
+        for local_key, global_id in zip(misses, assigned):
+            self.local_ids.put(local_key, global_id)
+            for i in pending[local_key]:
+                results[i] = global_id
+        return results
+
+    def _touch(self, local_key: tuple, timestamp: float, global_id: Optional[int] = None) -> None:
+        if timestamp > self._touches.get(local_key, float("-inf")):
+            self._touches[local_key] = timestamp
+        if global_id is None:
+            return
+        if timestamp > self._global_id_seen.get(global_id, (None, float("-inf")))[1]:
+            self._global_id_seen[global_id] = (local_key[0], timestamp)
+        members = self._history_touches.setdefault(global_id, {})
+        if timestamp > members.get(local_key, float("-inf")):
+            members[local_key] = timestamp
+
+    def _flush_touches(self, force: bool = False) -> None:
+        """Write batched last-seen times and track ends to Redis (one pipeline per interval)."""
+        now = time.monotonic()
+        if not (self._touches or self._ended) or (not force and now - self._last_touch_flush < ACTIVE_INDEX_FLUSH_SECONDS):
+            return
+        touches, self._touches = self._touches, {}
+        seen, self._global_id_seen = self._global_id_seen, {}
+        history, self._history_touches = self._history_touches, {}
+        ended, self._ended = self._ended, {}
+        finished, self._finished = self._finished, {}
+        self._last_touch_flush = now
+        self._cameras.update(cam_id for cam_id, _ in touches)
+        try:
+            aggregates = self._resolve_finished(finished)
+            with self.cache.pipeline() as pipe:
+                self.cache.index_touches(pipe, touches, ttl=CACHE_TTL_SECONDS)
+                transitions.touch_last_cameras(self.cache, pipe, seen, last_camera_ttl=CACHE_TTL_SECONDS)
+                self.cache.touch_track_history(pipe, {
+                    global_id: {f"{cam_id}:{track_id}": ts for (cam_id, track_id), ts in members.items()}
+                    for global_id, members in history.items()
+                }, ttl=CACHE_TTL_SECONDS)
+                self.cache.end_tracks(pipe, ended, ttl=CACHE_TTL_SECONDS)
+                # Final aggregates of ended tracks; first/last seen merge with what is already recorded
+                self.cache.record_track_history([
+                    (global_id, cam_id, track_id, stats["first_seen"], stats["last_seen"])
+                    for global_id, cam_id, track_id, stats in aggregates
+                ], ttl=CACHE_TTL_SECONDS, client=pipe)
+                detections = defaultdict(dict)
+                for global_id, cam_id, track_id, stats in aggregates:
+                    detections[global_id][f"{cam_id}:{track_id}"] = stats["detections"]
+                self.cache.record_track_detections(pipe, detections, ttl=CACHE_TTL_SECONDS)
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"[INDEX] Failed to flush {len(touches)} track touches, {len(ended)} ends: {e}")
+        self._sweep_mappings()
+
+    def _sweep_mappings(self) -> None:
+        """Drop mappings unseen for CACHE_TTL_SECONDS or ended TRACK_ENDED_TTL_SECONDS ago (rate-limited)."""
+        now = time.monotonic()
+        if not self._cameras or now - self._last_sweep < MAPPING_SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        try:
+            removed = self.cache.sweep_mappings(self._cameras, CACHE_TTL_SECONDS, TRACK_ENDED_TTL_SECONDS)
+            if removed:
+                logger.debug(f"[SWEEP] Expired {removed} track mappings on {len(self._cameras)} cameras")
         except Exception as e:
-            print("🔥 ERROR in assign_global_id:", e)
\ No newline at end of file
+            logger.warning(f"[SWEEP] Failed to expire track mappings: {e}")
+
+    def _resolve_finished(self, finished: Dict[tuple, tuple]) -> List[tuple]:
+        """(global_id, cam_id, track_id, stats) of ended tracks; IDs evicted from the local cache are read from Redis."""
+        unknown = [local_key for local_key, (global_id, _) in finished.items() if global_id is None]
+        mappings = dict(zip(unknown, self.cache.get_mappings(unknown))) if unknown else {}
+        aggregates = []
+        for (cam_id, track_id), (global_id, stats) in finished.items():
+            if global_id is None:
+                mapping = mappings.get((cam_id, track_id))
+                if mapping is None:
+                    continue  # never assigned or already expired
+                global_id = mapping[0]
+            aggregates.append((global_id, cam_id, track_id, stats))
+        return aggregates
+
+    def _update_track_stats(self, local_key: tuple, timestamp: float) -> None:
+        stats = self.track_stats.get(local_key)
+        if stats is None:
+            self.track_stats[local_key] = {"first_seen": timestamp, "last_seen": timestamp, "detections": 1}
+        else:
+            stats["first_seen"] = min(stats["first_seen"], timestamp)
+            stats["last_seen"] = max(stats["last_seen"], timestamp)
+            stats["detections"] += 1
+
+    def end_track(self, cam_id: str, track_id: str, last_seen: Optional[float] = None) -> None:
+        """
+        Finalize a track that DeepStream no longer reports.
+
+        Marks the track ended in Redis with the next flush, so the sweep drops
+        its mapping TRACK_ENDED_TTL_SECONDS later, writes its first/last seen
+        and detection count into the ID's track history, and drops the local
+        state kept for the track.
+        """
+        local_key = (cam_id, str(track_id))
+        stats = self.track_stats.pop(local_key, None)
+        global_id = self.local_ids.pop(local_key)
+        if last_seen is not None:
+            self._touch(local_key, last_seen, global_id)
+            if stats is not None:
+                stats["last_seen"] = max(stats["last_seen"], last_seen)
+        if stats is not None:
+            self._finished[local_key] = (global_id, stats)
+        self._ended[local_key] = time.time()
+        logger.debug(f"[TRACK END] {cam_id}:{track_id} ended, mapping kept {TRACK_ENDED_TTL_SECONDS}s")
+        self._flush_touches()
+
+    def reassign_track(self, cam_id: str, track_id: str, global_id: int) -> None:
+        """Point an existing (cam_id, track_id) mapping to another global ID and broadcast it."""
+        now = time.time()
+        mapping = self.cache.get_mapping(cam_id, track_id)
+        first_seen = mapping[1] if mapping else now
+        last_seen = self.cache.redis.zscore(active_tracks_key(cam_id), str(track_id)) or now
+        with self.cache.pipeline() as pipe:
+            self.cache.write_mappings(pipe, [(cam_id, track_id, global_id, first_seen)], ttl=CACHE_TTL_SECONDS)
+            # Unindexed tracks get an index entry, so the sweep expires them too
+            self.cache.index_touches(pipe, {(cam_id, track_id): last_seen}, ttl=CACHE_TTL_SECONDS)
+            self.cache.record_track_history([(global_id, cam_id, track_id, first_seen, last_seen)],
+                                            ttl=CACHE_TTL_SECONDS, client=pipe)
+            pipe.execute()
+        self._cameras.add(cam_id)
+        if self.events is not None:
+            self.events.record([(now, cam_id, track_id, global_id, None, "reassigned", self._zone_of(cam_id))])
+        self.local_ids.put((cam_id, str(track_id)), global_id)
+        self.cache.publish_id_event({"type": "reassign", "cam_id": cam_id, "track_id": str(track_id), "global_id": global_id})
+
+    def merge_global_ids(self, from_id: int, to_id: int) -> None:
+        """
+        Merge identity `from_id` into `to_id`.
+
+        Rewrites the Redis mappings of every track in `from_id`'s history,
+        moves the history to `to_id`, drops `from_id`'s Qdrant vector and
+        broadcasts the merge so other processes remap their local caches.
+        """
+        history = self.cache.get_track_history(from_id)
+        mappings = self.cache.get_mappings([(cam_id, track_id) for cam_id, track_id, *_ in history])
+        with self.cache.pipeline() as pipe:
+            # Only live mappings still pointing to from_id; expired ones stay expired
+            self.cache.write_mappings(pipe, [
+                (cam_id, track_id, to_id, mapping[1])
+                for (cam_id, track_id, *_), mapping in zip(history, mappings)
+                if mapping is not None and mapping[0] == from_id
+            ], ttl=CACHE_TTL_SECONDS)
+            self.cache.record_track_history([
+                (to_id, cam_id, track_id, first_seen if first_seen is not None else last_seen, last_seen)
+                for cam_id, track_id, first_seen, last_seen, _ in history
+            ], ttl=CACHE_TTL_SECONDS, client=pipe)
+            self.cache.record_track_detections(pipe, {to_id: {
+                f"{cam_id}:{track_id}": detections
+                for cam_id, track_id, _, _, detections in history if detections is not None
+            }}, ttl=CACHE_TTL_SECONDS)
+            pipe.execute()
+        self.cache.delete_track_history(from_id)
+        self.qdrant.delete_embedding(from_id)
+        self.local_ids.remap(from_id, to_id)
+        self.cache.publish_id_event({"type": "merge", "from_id": from_id, "to_id": to_id})
+        logger.info(f"[MERGE] global_id={from_id} merged into {to_id}")
+
+    def _on_id_event(self, event: dict) -> None:
+        """Apply a merge/reassignment broadcast to the local ID cache."""
+        if event.get("type") == "merge":
+            self.local_ids.remap(int(event["from_id"]), int(event["to_id"]))
+        elif event.get("type") == "reassign":
+            self.local_ids.put((event["cam_id"], str(event["track_id"])), int(event["global_id"]))
+
+    def get_stats(self) -> dict:
+        """Local cache and track counters for this process."""
+        stats = {
+            "local_id_cache": self.local_ids.stats(),
+            "live_tracks": len(self.track_stats),
+        }
+        if self.events is not None:
+            stats["event_log"] = self.events.stats()
+        return stats
@@ -10,10 +10,11 @@ This module wraps qdrant-client with async interface.
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
 from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 import uuid
 import logging
+import threading
 
 from global_id_service.config import (
     QDRANT_HOST,
@@ -35,16 +36,47 @@ DISTANCE_MAP = {
 }
 
 
+def _as_list(embedding) -> List[float]:
+    """Qdrant models want plain lists; pipelines hand over NumPy arrays."""
+    return embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+
+
 class QdrantClientWrapper:
     def __init__(self):
-        """Initialize Qdrant client and connect."""
+        """Initialize Qdrant client; the collection check runs on first use (see connect())."""
         self.client = QdrantClient(host="localhost", port=6333)#QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
         self.collection_name = QDRANT_COLLECTION
         self.vector_size = QDRANT_VECTOR_SIZE
         self.distance = DISTANCE_MAP.get(QDRANT_DISTANCE, Distance.COSINE)
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def connect(self) -> None:
+        """Round trip to Qdrant and make sure the collection exists. Safe to call repeatedly."""
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            logger.info(f"Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
+            self._ensure_collection()
+            self._ready = True
+
+    def warmup(self, hot_points: int = 1000) -> int:
+        """
+        Touch the most useful parts of the gallery before traffic arrives:
+        one search (loads the index) and a scroll over `hot_points` payloads.
 
-        logger.info(f"Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
-        self._ensure_collection()
+        Returns the number of points scrolled.
+        """
+        self.connect()
+        self.client.search(
+            collection_name=self.collection_name,
+            query_vector=[0.0] * (self.vector_size - 1) + [1.0],
+            limit=1,
+        )
+        points, _ = self.client.scroll(collection_name=self.collection_name, limit=hot_points, with_vectors=False)
+        return len(points)
 
     def _ensure_collection(self):
         """Create collection if not exists with required parameters."""
@@ -66,6 +98,7 @@ class QdrantClientWrapper:
         metadata: Dict
     ) -> None:
         """Insert or update a vector with associated metadata."""
+        self.connect()
         point = PointStruct(
             id=global_id,
             vector=embedding,
@@ -74,6 +107,27 @@ class QdrantClientWrapper:
         self.client.upsert(collection_name=self.collection_name, points=[point])
         logger.debug(f"Upserted embedding for ID {global_id} with metadata: {metadata}")
 
+    def upsert_embeddings(self, entries: List[Tuple[int, List[float], Dict]]) -> None:
+        """Insert or update several (global_id, embedding, metadata) entries in one request."""
+        self.connect()
+        if not entries:
+            return
+        points = [
+            PointStruct(id=global_id, vector=_as_list(embedding), payload=metadata)
+            for global_id, embedding, metadata in entries
+        ]
+        self.client.upsert(collection_name=self.collection_name, points=points)
+        logger.debug(f"Upserted {len(points)} embeddings")
+
+    def delete_embedding(self, global_id: int) -> None:
+        """Remove the vector stored for a global ID."""
+        self.connect()
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=qmodels.PointIdsList(points=[global_id])
+        )
+        logger.debug(f"Deleted embedding for ID {global_id}")
+
     def search_similar(
         self,
         embedding: List[float],
@@ -88,6 +142,7 @@ class QdrantClientWrapper:
         :param filters: Optional metadata filters (Qdrant filter DSL)
         :return: List of ScoredPoint results
         """
+        self.connect()
         query_filter = self._build_filter(filters) if filters else None
 
         results = self.client.search(
@@ -100,6 +155,33 @@ class QdrantClientWrapper:
         )
         return results
 
+    def search_similar_batch(
+        self,
+        embeddings: List[List[float]],
+        top_k: int = 5,
+        filters: Optional[List[Optional[Dict]]] = None
+    ) -> List[List[qmodels.ScoredPoint]]:
+        """
+        Batched search_similar: one request for many query vectors.
+
+        :param embeddings: Query vectors
+        :param top_k: Number of results per query
+        :param filters: Optional per-query metadata filters
+        :return: One list of ScoredPoint results per query
+        """
+        self.connect()
+        filters = filters or [None] * len(embeddings)
+        requests = [
+            qmodels.SearchRequest(
+                vector=_as_list(embedding),
+                limit=top_k,
+                with_payload=True,
+                filter=self._build_filter(query_filter) if query_filter else None
+            )
+            for embedding, query_filter in zip(embeddings, filters)
+        ]
+        return self.client.search_batch(collection_name=self.collection_name, requests=requests)
+
     def _build_filter(self, metadata: Dict) -> qmodels.Filter:
         """
         Build a Qdrant filter object from metadata dict.
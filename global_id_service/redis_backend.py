@@ -1,64 +1,544 @@
 # global_id_service/redis_backend.py
 
 import redis
+import redis.asyncio as aioredis
+import json
 import logging
-from global_id_service.config import REDIS_URL
+import struct
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from global_id_service.config import REDIS_URL, ID_EVENTS_CHANNEL, TRACK_HISTORY_MAX
 
 logger = logging.getLogger(__name__)
 
+TRACKED_CAMERAS_KEY = "tracked_cameras"
+CAMERA_HEARTBEATS_KEY = "camera_heartbeats"  # camera → JSON {last_frame, fps, zone, time}
+
+
+def active_tracks_key(cam_id: str) -> str:
+    """Sorted set of the camera's track IDs scored by last-seen time."""
+    return f"active_tracks:{cam_id}"
+
+
+def camera_counters_key(cam_id: str) -> str:
+    """Hash of per-camera counters (tracks, new_ids, matched_ids)."""
+    return f"camera_counters:{cam_id}"
+
+
+def track_map_key(cam_id: str) -> str:
+    """Hash of the camera's track IDs → packed (global_id, first_seen) mapping."""
+    return f"track_map:{cam_id}"
+
+
+def ended_tracks_key(cam_id: str) -> str:
+    """Sorted set of the camera's ended track IDs scored by end time."""
+    return f"ended_tracks:{cam_id}"
+
+
+# (global_id, first_seen) in 16 bytes; last_seen lives in the active-track index
+MAPPING_STRUCT = struct.Struct("<Qd")
+
+
+def pack_mapping(global_id: int, first_seen: float) -> bytes:
+    return MAPPING_STRUCT.pack(int(global_id), float(first_seen))
+
+
+def unpack_mapping(value: Optional[bytes]) -> Optional[Tuple[int, float]]:
+    """(global_id, first_seen) of a packed mapping; None when missing or malformed."""
+    if value is None or len(value) != MAPPING_STRUCT.size:
+        return None
+    return MAPPING_STRUCT.unpack(value)
+
+
+def track_history_key(global_id: int) -> str:
+    """Sorted set of the ID's "cam:track" members scored by last-seen time."""
+    return f"track_history:{global_id}"
+
+
+def track_first_seen_key(global_id: int) -> str:
+    """Hash of the ID's "cam:track" members → first-seen time."""
+    return f"track_first_seen:{global_id}"
+
+
+def track_detections_key(global_id: int) -> str:
+    """Hash of the ID's ended "cam:track" members → detection count."""
+    return f"track_detections:{global_id}"
+
+
+# Lua's unpack() fails past ~8000 values (LUAI_MAXCSTACK): variadic deletes go out in chunks.
+LUA_CHUNKED_CALL = """
+local function call_chunked(command, key, members)
+    for i = 1, #members, 1000 do
+        redis.call(command, key, unpack(members, i, math.min(i + 999, #members)))
+    end
+end
+"""
+
+# KEYS: history zset, first-seen hash, detections hash.  ARGV: max entries, ttl, then (member, first_seen, last_seen) triples.
+# Each (cam, track) is stored once; the oldest entries beyond max are dropped from all keys.
+RECORD_TRACK_HISTORY_LUA = LUA_CHUNKED_CALL + """
+for i = 3, #ARGV, 3 do
+    local member = ARGV[i]
+    redis.call('ZADD', KEYS[1], 'GT', ARGV[i + 2], member)
+    local known = redis.call('HGET', KEYS[2], member)
+    if not known or tonumber(ARGV[i + 1]) < tonumber(known) then
+        redis.call('HSET', KEYS[2], member, ARGV[i + 1])
+    end
+end
+local excess = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[1])
+if excess > 0 then
+    local dropped = redis.call('ZRANGE', KEYS[1], 0, excess - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, excess - 1)
+    call_chunked('HDEL', KEYS[2], dropped)
+    call_chunked('HDEL', KEYS[3], dropped)
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+redis.call('EXPIRE', KEYS[3], tonumber(ARGV[2]))
+return math.max(excess, 0)
+"""
+
+# KEYS: active-track index, ended-track zset, mapping hash.  ARGV: live cutoff, ended cutoff, max tracks.
+# Drops tracks last seen before the live cutoff or ended before the ended cutoff from all three keys.
+SWEEP_MAPPINGS_LUA = LUA_CHUNKED_CALL + """
+local removed = 0
+local function drop(tracks)
+    if #tracks == 0 then
+        return
+    end
+    call_chunked('HDEL', KEYS[3], tracks)
+    call_chunked('ZREM', KEYS[1], tracks)
+    call_chunked('ZREM', KEYS[2], tracks)
+    removed = removed + #tracks
+end
+drop(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1], 'LIMIT', 0, tonumber(ARGV[3])))
+drop(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[2], 'LIMIT', 0, tonumber(ARGV[3])))
+return removed
+"""
+
+
 class RedisCache:
     def __init__(self):
         self.redis_url = REDIS_URL
-        self.redis = None
+        self._redis = None
+        self._binary = None
+        self._connect_lock = threading.Lock()
         self.id_counter_key = "global_id_counter"
+        self.script_sources = {}
+        self._scripts = {}
+        self.register_script("record_track_history", RECORD_TRACK_HISTORY_LUA)
+        self.register_script("sweep_mappings", SWEEP_MAPPINGS_LUA)
+
+    @property
+    def redis(self):
+        """Client connected on first use, so importing the cache costs no I/O."""
+        if self._redis is None:
+            self.connect()
+        return self._redis
 
     def connect(self):
-        self.redis = redis.Redis.from_url(self.redis_url, decode_responses=True)
+        with self._connect_lock:
+            if self._redis is not None:
+                return
+            client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+            client.ping()
+            self._redis = client
         logger.info("Connected to Redis")
 
+    @property
+    def binary(self):
+        """Client without response decoding, for reading packed mappings."""
+        if self._binary is None:
+            with self._connect_lock:
+                if self._binary is None:
+                    self._binary = redis.Redis.from_url(self.redis_url)
+        return self._binary
+
     def disconnect(self):
-        if self.redis:
-            self.redis.close()
+        if self._binary:
+            self._binary.close()
+            self._binary = None
+        if self._redis:
+            self._redis.close()
+            self._redis = None
             logger.info("Redis connection closed")
 
-    # def get(self, key: str):
-    #     val = self.redis.get(key)
-    #     # print(f"[REDIS GET] {key} → {val}")
-    #     return int(val) if val else None
-    
-    def get(self, key: str):
-        val = self.redis.get(key)
-        if val is None:
-            return None
-        try:
-            # If it's an integer string (legacy format), return as int
-            if val.isdigit():
-                return int(val)
-            # Otherwise, assume it's a JSON string
-            return val  # leave parsing to calling function
-        except Exception as e:
-            logger.warning(f"[REDIS GET ERROR] key={key} val={val} error={e}")
-            return None
-
-    # def set(self, key: str, value, ttl: int = 3600):
-    #     # print(f"[REDIS SET] {key} → {value} (TTL={ttl}s)")
-    #     self.redis.set(key, value, ex=ttl)
-    
+    def register_script(self, name: str, source: str) -> None:
+        """Declare a Lua script; it is loaded lazily or by load_scripts() during warmup."""
+        self.script_sources[name] = source
+
+    def load_scripts(self) -> None:
+        """SCRIPT LOAD every registered script so the first EVALSHA does not pay for it."""
+        for name, source in self.script_sources.items():
+            self._scripts[name] = self.redis.register_script(source)
+            self.redis.script_load(source)
+
+    def run_script(self, name: str, keys: list, args: list, client=None):
+        """EVALSHA a registered script; pass a pipeline as `client` to queue it there."""
+        script = self._scripts.get(name)
+        if script is None:
+            script = self._scripts[name] = self.redis.register_script(self.script_sources[name])
+        return script(keys=keys, args=args, client=client)
+
     def set(self, key: str, value, ttl: int = 3600):
         if isinstance(value, dict):
             value = json.dumps(value)
         self.redis.set(key, value, ex=ttl)
-    
-    def push_track_id(self, global_id: int, cam_id: str, track_id: str):
-        key = f"track_ids:{global_id}"
-        value = f"{cam_id}:{track_id}"
-        self.redis.rpush(key, value)
-    
-    def get_all_track_ids(self, global_id: int) -> list:
-        key = f"track_ids:{global_id}"
-        return self.redis.lrange(key, 0, -1)
-
-    def increment_global_id(self) -> int:
-        new_id = self.redis.incr(self.id_counter_key)
+
+    def pipeline(self):
+        """Non-transactional pipeline for batched writes."""
+        return self.redis.pipeline(transaction=False)
+
+    # ─── Track → global ID mappings (per-camera hash of packed values) ───
+    def get_mappings(self, pairs: List[Tuple[str, str]]) -> List[Optional[Tuple[int, float]]]:
+        """(global_id, first_seen) of each (cam_id, track_id), in order; one HMGET per camera, one round trip."""
+        by_camera = defaultdict(list)
+        for i, (cam_id, track_id) in enumerate(pairs):
+            by_camera[cam_id].append((i, str(track_id)))
+        if not by_camera:
+            return []
+        with self.binary.pipeline(transaction=False) as pipe:
+            for cam_id, tracks in by_camera.items():
+                pipe.hmget(track_map_key(cam_id), [track_id for _, track_id in tracks])
+            replies = pipe.execute()
+        mappings = [None] * len(pairs)
+        for tracks, values in zip(by_camera.values(), replies):
+            for (i, _), value in zip(tracks, values):
+                mappings[i] = unpack_mapping(value)
+        return mappings
+
+    def get_mapping(self, cam_id: str, track_id: str) -> Optional[Tuple[int, float]]:
+        return self.get_mappings([(cam_id, track_id)])[0]
+
+    def write_mappings(self, pipe, mappings: Iterable[Tuple[str, str, int, float]], ttl: int) -> None:
+        """
+        Queue (cam_id, track_id, global_id, first_seen) mappings on `pipe`.
+
+        Fields are expired by sweep_mappings(); the hash TTL only reclaims
+        cameras that stopped reporting altogether.
+        """
+        by_camera = defaultdict(dict)
+        for cam_id, track_id, global_id, first_seen in mappings:
+            by_camera[cam_id][str(track_id)] = pack_mapping(global_id, first_seen)
+        for cam_id, fields in by_camera.items():
+            pipe.hset(track_map_key(cam_id), mapping=fields)
+            pipe.expire(track_map_key(cam_id), ttl)
+
+    def end_tracks(self, pipe, ended: Dict[Tuple[str, str], float], ttl: int) -> None:
+        """
+        Queue {(cam_id, track_id): end_time} on `pipe`.
+
+        sweep_mappings() drops the tracks once their `ended_ttl` has passed;
+        `ttl` only bounds the life of the ended set itself.
+        """
+        by_camera = defaultdict(dict)
+        for (cam_id, track_id), end_time in ended.items():
+            by_camera[cam_id][str(track_id)] = end_time
+        for cam_id, members in by_camera.items():
+            pipe.zadd(ended_tracks_key(cam_id), members)
+            pipe.expire(ended_tracks_key(cam_id), ttl)
+
+    def sweep_mappings(self, cam_ids: Iterable[str], live_ttl: int, ended_ttl: int,
+                       max_tracks: int = 10000, now: Optional[float] = None) -> int:
+        """
+        Expire the mappings of tracks unseen for `live_ttl` or ended `ended_ttl` ago.
+
+        One EVALSHA per camera in a single pipeline; each camera drops at most
+        `max_tracks` tracks per kind, the rest go on the next sweep.
+        Returns the number of tracks removed.
+        """
+        now = now or time.time()
+        cam_ids = list(cam_ids)
+        with self.pipeline() as pipe:
+            for cam_id in cam_ids:
+                self.run_script(
+                    "sweep_mappings",
+                    keys=[active_tracks_key(cam_id), ended_tracks_key(cam_id), track_map_key(cam_id)],
+                    args=[now - live_ttl, now - ended_ttl, max_tracks],
+                    client=pipe,
+                )
+            return sum(pipe.execute()) if cam_ids else 0
+
+    # ─── Track history (one entry per (cam, track), capped, expiring with the ID) ───
+    def record_track_history(self, entries: Iterable[Tuple[int, str, str, float, float]], ttl: int,
+                             max_entries: int = TRACK_HISTORY_MAX, client=None) -> None:
+        """
+        Add (global_id, cam_id, track_id, first_seen, last_seen) entries; one EVALSHA per global ID.
+
+        Known entries keep their earliest first_seen and latest last_seen.
+        Pass a pipeline as `client` to queue the writes there.
+        """
+        by_id = defaultdict(list)
+        for global_id, cam_id, track_id, first_seen, last_seen in entries:
+            by_id[global_id].extend((f"{cam_id}:{track_id}", first_seen, last_seen))
+        for global_id, args in by_id.items():
+            self.run_script(
+                "record_track_history",
+                keys=[track_history_key(global_id), track_first_seen_key(global_id), track_detections_key(global_id)],
+                args=[max_entries, ttl, *args],
+                client=client,
+            )
+
+    def touch_track_history(self, pipe, seen: Dict[int, Dict[str, float]], ttl: int) -> None:
+        """Queue last-seen updates {global_id: {"cam:track": last_seen}} of recorded entries on `pipe`."""
+        for global_id, members in seen.items():
+            pipe.zadd(track_history_key(global_id), members, xx=True, gt=True)
+            pipe.expire(track_history_key(global_id), ttl)
+            pipe.expire(track_first_seen_key(global_id), ttl)
+            pipe.expire(track_detections_key(global_id), ttl)
+
+    def record_track_detections(self, pipe, detections: Dict[int, Dict[str, int]], ttl: int) -> None:
+        """
+        Queue detection counts {global_id: {"cam:track": detections}} of ended tracks on `pipe`.
+
+        Counts are added, so processes that each saw part of a track sum up.
+        """
+        for global_id, members in detections.items():
+            for member, count in members.items():
+                pipe.hincrby(track_detections_key(global_id), member, count)
+            pipe.expire(track_detections_key(global_id), ttl)
+
+    def get_track_history(self, global_id: int) -> List[Tuple[str, str, Optional[float], float, Optional[int]]]:
+        """
+        Every (cam_id, track_id, first_seen, last_seen, detections) of an ID, oldest last-seen first.
+
+        detections is None until the track has ended.
+        """
+        with self.pipeline() as pipe:
+            pipe.zrange(track_history_key(global_id), 0, -1, withscores=True)
+            pipe.hgetall(track_first_seen_key(global_id))
+            pipe.hgetall(track_detections_key(global_id))
+            members, first_seen, detections = pipe.execute()
+        history = []
+        for member, last_seen in members:
+            cam_id, _, track_id = member.rpartition(":")
+            first, count = first_seen.get(member), detections.get(member)
+            history.append((cam_id, track_id, float(first) if first is not None else None, last_seen,
+                            int(count) if count is not None else None))
+        return history
+
+    def delete_track_history(self, global_id: int) -> None:
+        self.redis.delete(track_history_key(global_id), track_first_seen_key(global_id), track_detections_key(global_id))
+
+    def publish_id_event(self, event: dict) -> None:
+        """Broadcast an ID merge/reassignment to every process holding a local ID cache."""
+        self.redis.publish(ID_EVENTS_CHANNEL, json.dumps(event))
+
+    def subscribe_id_events(self, handler):
+        """
+        Call `handler(event: dict)` for every message on the ID events channel.
+
+        Runs in a daemon thread; returns the thread so callers can stop() it.
+        """
+        def on_message(message):
+            try:
+                handler(json.loads(message["data"]))
+            except Exception as e:
+                logger.warning(f"[REDIS PUBSUB] Bad ID event {message.get('data')}: {e}")
+
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{ID_EVENTS_CHANNEL: on_message})
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def increment_global_id(self, count: int = 1) -> int:
+        """Reserve `count` consecutive IDs; returns the last one."""
+        new_id = self.redis.incr(self.id_counter_key, count)
         # print(f"[REDIS INCR] New global_id: {new_id}")
         return new_id
+
+    def publish_camera_heartbeats(self, heartbeats: Dict[str, dict]) -> None:
+        """Write the latest heartbeat of every camera in `heartbeats` (one pipelined HSET)."""
+        if not heartbeats:
+            return
+        with self.pipeline() as pipe:
+            pipe.hset(CAMERA_HEARTBEATS_KEY, mapping={cam_id: json.dumps(beat) for cam_id, beat in heartbeats.items()})
+            pipe.execute()
+
+    # ─── Dashboard indexes (maintained on the write path, read by the API) ───
+    def index_new_tracks(self, pipe, tracks: Iterable[Tuple[str, str, float, bool]]) -> None:
+        """Queue index updates for newly mapped (cam_id, track_id, timestamp, is_new_id) on `pipe`."""
+        for cam_id, track_id, timestamp, is_new_id in tracks:
+            pipe.zadd(active_tracks_key(cam_id), {str(track_id): timestamp}, gt=True)
+            pipe.hincrby(camera_counters_key(cam_id), "tracks", 1)
+            pipe.hincrby(camera_counters_key(cam_id), "new_ids" if is_new_id else "matched_ids", 1)
+            pipe.sadd(TRACKED_CAMERAS_KEY, cam_id)
+
+    def index_touches(self, pipe, touches: Dict[Tuple[str, str], float], ttl: Optional[int] = None) -> None:
+        """
+        Queue last-seen updates for known tracks on `pipe`; scores only move forward.
+
+        The index is also the expiry schedule of the camera's mappings (see
+        sweep_mappings()), so it is never trimmed here; `ttl` keeps the index
+        and mapping hash of a camera with live tracks from expiring.
+        """
+        by_camera = defaultdict(dict)
+        for (cam_id, track_id), timestamp in touches.items():
+            by_camera[cam_id][str(track_id)] = timestamp
+        for cam_id, members in by_camera.items():
+            pipe.zadd(active_tracks_key(cam_id), members, gt=True)
+            if ttl is not None:
+                pipe.expire(active_tracks_key(cam_id), ttl)
+                pipe.expire(track_map_key(cam_id), ttl)
+
+
+class AsyncRedisCache:
+    """
+    asyncio client for the dashboard API's reads.
+
+    Only reads the mappings and the indexes the ID service maintains; all
+    writes go through RedisCache.
+    """
+
+    def __init__(self):
+        self.redis_url = REDIS_URL
+        self._redis = None
+        self._binary = None
+
+    @property
+    def redis(self):
+        """Connection pool created on first use; connections are opened per command."""
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    @property
+    def binary(self):
+        """Pool without response decoding, for reading packed mappings."""
+        if self._binary is None:
+            self._binary = aioredis.from_url(self.redis_url)
+        return self._binary
+
+    async def close(self) -> None:
+        for client in (self._redis, self._binary):
+            if client is not None:
+                await client.aclose()
+        self._redis = self._binary = None
+
+    async def get_mappings(self, pairs: List[Tuple[str, str]]) -> List[Optional[Tuple[int, float]]]:
+        """(global_id, first_seen) of each (cam_id, track_id), in order; one round trip."""
+        by_camera = defaultdict(list)
+        for i, (cam_id, track_id) in enumerate(pairs):
+            by_camera[cam_id].append((i, str(track_id)))
+        if not by_camera:
+            return []
+        pipe = self.binary.pipeline(transaction=False)
+        for cam_id, tracks in by_camera.items():
+            pipe.hmget(track_map_key(cam_id), [track_id for _, track_id in tracks])
+        replies = await pipe.execute()
+        mappings = [None] * len(pairs)
+        for tracks, values in zip(by_camera.values(), replies):
+            for (i, _), value in zip(tracks, values):
+                mappings[i] = unpack_mapping(value)
+        return mappings
+
+    async def track_history(self, global_id: int, limit: Optional[int] = None, since: Optional[float] = None,
+                            until: Optional[float] = None, after: Optional[Tuple[float, str]] = None
+                            ) -> List[Tuple[float, str, str, Optional[float], Optional[int]]]:
+        """
+        (last_seen, cam_id, track_id, first_seen, detections) of an ID's history in [since, until], newest first.
+
+        Order is Redis' reverse order (last_seen desc, "cam:track" desc);
+        `after` is a (last_seen, "cam:track") position in it.
+        """
+        key = track_history_key(global_id)
+        low = "-inf" if since is None else since
+        high = "+inf" if until is None else until
+        page = {} if limit is None else {"start": 0, "num": limit}
+        if after is None:
+            members = await self.redis.zrevrangebyscore(key, high, low, withscores=True, **page)
+        else:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrangebyscore(key, after[0], after[0], withscores=True)
+            pipe.zrevrangebyscore(key, f"({after[0]}", low, withscores=True, **page)
+            ties, older = await pipe.execute()
+            ties = sorted(((member, score) for member, score in ties if member < after[1]), reverse=True)
+            members = (ties + older)[:limit] if limit is not None else ties + older
+        if not members:
+            return []
+        fields = [member for member, _ in members]
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hmget(track_first_seen_key(global_id), fields)
+        pipe.hmget(track_detections_key(global_id), fields)
+        first_seen, detections = await pipe.execute()
+        history = []
+        for (member, last_seen), first, count in zip(members, first_seen, detections):
+            cam_id, _, track_id = member.rpartition(":")
+            history.append((last_seen, cam_id, track_id, float(first) if first is not None else None,
+                            int(count) if count is not None else None))
+        return history
+
+    async def tracked_cameras(self) -> List[str]:
+        return sorted(await self.redis.smembers(TRACKED_CAMERAS_KEY))
+
+    async def recent_tracks(self, cam_ids: List[str], limit: int, since: Optional[float] = None,
+                            until: Optional[float] = None, after: Optional[Tuple[float, str, str]] = None
+                            ) -> List[Tuple[float, str, str]]:
+        """
+        Up to `limit` (last_seen, cam_id, track_id) per camera, newest first, one round trip.
+
+        `after` is a (last_seen, cam_id, track_id) position in the order
+        (last_seen desc, cam_id, track_id): only entries past it are returned.
+        """
+        low = "-inf" if since is None else since
+        high = "+inf" if until is None else until
+        pipe = self.redis.pipeline(transaction=False)
+        for cam_id in cam_ids:
+            if after is None:
+                pipe.zrevrangebyscore(active_tracks_key(cam_id), high, low, start=0, num=limit, withscores=True)
+            else:
+                # Entries sharing the cursor's score, then strictly older ones
+                pipe.zrangebyscore(active_tracks_key(cam_id), after[0], after[0], withscores=True)
+                pipe.zrevrangebyscore(active_tracks_key(cam_id), f"({after[0]}", low, start=0, num=limit, withscores=True)
+        replies = await pipe.execute() if cam_ids else []
+
+        entries = []
+        if after is None:
+            for cam_id, members in zip(cam_ids, replies):
+                entries.extend((score, cam_id, track_id) for track_id, score in members)
+            return entries
+        for i, cam_id in enumerate(cam_ids):
+            ties, older = replies[2 * i], replies[2 * i + 1]
+            entries.extend(
+                (score, cam_id, track_id) for track_id, score in ties
+                if (cam_id, track_id) > (after[1], after[2])
+            )
+            entries.extend((score, cam_id, track_id) for track_id, score in older)
+        return entries
+
+    async def hgetall_many(self, keys: List[str]) -> List[Dict[str, str]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        return await pipe.execute() if keys else []
+
+    async def camera_heartbeats(self) -> Dict[str, dict]:
+        heartbeats = {}
+        for cam_id, value in (await self.redis.hgetall(CAMERA_HEARTBEATS_KEY)).items():
+            try:
+                heartbeats[cam_id] = json.loads(value)
+            except ValueError:
+                logger.warning(f"[REDIS] Bad heartbeat for {cam_id}: {value}")
+        return heartbeats
+
+    async def delete_camera_heartbeats(self, cam_ids: List[str]) -> None:
+        if cam_ids:
+            await self.redis.hdel(CAMERA_HEARTBEATS_KEY, *cam_ids)
+
+    async def camera_summaries(self, cam_ids: List[str], active_since: float) -> Dict[str, dict]:
+        """Active/indexed track counts and counters per camera, one round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for cam_id in cam_ids:
+            pipe.zcount(active_tracks_key(cam_id), active_since, "+inf")
+            pipe.zcard(active_tracks_key(cam_id))
+            pipe.hgetall(camera_counters_key(cam_id))
+        replies = await pipe.execute() if cam_ids else []
+        return {
+            cam_id: {
+                "active_tracks": replies[3 * i],
+                "indexed_tracks": replies[3 * i + 1],
+                "counters": {field: int(value) for field, value in replies[3 * i + 2].items()},
+            }
+            for i, cam_id in enumerate(cam_ids)
+        }
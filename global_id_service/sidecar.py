@@ -0,0 +1,305 @@
+"""
+Assignment Sidecar - sidecar.py
+
+One process per host that owns the Redis and Qdrant connections, the local
+ID cache and the request batching for every zone process on that host.
+
+Zone processes talk to it over a Unix domain socket through SidecarIDClient,
+which exposes the same assign_global_id(s) / end_track / get_stats methods as
+GlobalIDManager. Assignments already queued when the worker picks one up,
+from any zone, are resolved together by GlobalIDManager.assign_global_ids;
+a lone request is never held back waiting for company.
+
+Wire format (both directions): struct "!II" (header length, body length),
+a UTF-8 JSON header, then the body. For "assign" requests the body is the
+embedding as raw float32, for "assign_batch" the embeddings of all its
+items back to back; every other message has an empty body.
+
+Run:
+    python -m global_id_service.sidecar --socket /tmp/mct_id_sidecar.sock
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from global_id_service.config import (
+    ID_SIDECAR_SOCKET,
+    SIDECAR_MAX_BATCH,
+)
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct("!II")
+
+
+# ─────────────────────────────────────────────────────────────
+# Framing
+# ─────────────────────────────────────────────────────────────
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Sidecar connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_frame(sock: socket.socket, header: dict, body: bytes = b"") -> None:
+    raw_header = json.dumps(header).encode()
+    sock.sendall(_FRAME.pack(len(raw_header), len(body)) + raw_header + body)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[dict, bytes]:
+    header_len, body_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len))
+    body = _recv_exact(sock, body_len) if body_len else b""
+    return header, body
+
+
+# ─────────────────────────────────────────────────────────────
+# Server side
+# ─────────────────────────────────────────────────────────────
+class _Batcher:
+    """
+    Single worker thread that owns the GlobalIDManager.
+
+    Consecutive "assign" requests already in the queue are drained into one
+    batch; every other operation runs on its own, in arrival order.
+    """
+
+    def __init__(self, manager, max_batch: int = SIDECAR_MAX_BATCH):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.queue: "queue.Queue[Tuple[str, dict, Future]]" = queue.Queue()
+        self.batches = 0
+        self.batched_items = 0
+        self._carry = None
+        threading.Thread(target=self._run, name="sidecar-batcher", daemon=True).start()
+
+    def submit(self, op: str, payload: dict) -> Future:
+        future = Future()
+        self.queue.put((op, payload, future))
+        return future
+
+    def _next(self, block: bool = True):
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            return request
+        return self.queue.get(block=block)
+
+    def _run(self) -> None:
+        while True:
+            op, payload, future = self._next()
+            if op != "assign":
+                self._run_single(op, payload, future)
+                continue
+
+            batch = [(payload, future)]
+            while len(batch) < self.max_batch:
+                try:
+                    request = self._next(block=False)
+                except queue.Empty:
+                    break
+                if request[0] != "assign":
+                    self._carry = request
+                    break
+                batch.append((request[1], request[2]))
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[dict, Future]]) -> None:
+        self.batches += 1
+        self.batched_items += len(batch)
+        try:
+            global_ids = self.manager.assign_global_ids([payload for payload, _ in batch])
+            for (_, future), global_id in zip(batch, global_ids):
+                future.set_result({"global_id": global_id})
+        except Exception as e:
+            logger.exception("[SIDECAR] Batch assignment failed")
+            for _, future in batch:
+                future.set_exception(e)
+
+    def _run_single(self, op: str, payload: dict, future: Future) -> None:
+        try:
+            if op == "end_track":
+                self.manager.end_track(payload["cam_id"], payload["track_id"], payload.get("last_seen"))
+                future.set_result({})
+            elif op == "stats":
+                stats = self.manager.get_stats()
+                stats["sidecar"] = {
+                    "batches": self.batches,
+                    "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+                    "queued": self.queue.qsize(),
+                }
+                future.set_result({"stats": stats})
+            else:
+                raise ValueError(f"Unknown sidecar op '{op}'")
+        except Exception as e:
+            future.set_exception(e)
+
+
+class _SidecarHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        batcher: _Batcher = self.server.batcher
+        while True:
+            try:
+                header, body = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            op = header.pop("op", None)
+            try:
+                if op == "assign_batch":
+                    # Queued back to back, so the batcher resolves them together
+                    items = header["items"]
+                    embeddings = np.frombuffer(body, dtype=np.float32).reshape(len(items), -1) if items else []
+                    futures = [batcher.submit("assign", {**item, "embedding": embedding})
+                               for item, embedding in zip(items, embeddings)]
+                    response = {"global_ids": [future.result()["global_id"] for future in futures]}
+                else:
+                    if op == "assign":
+                        header["embedding"] = np.frombuffer(body, dtype=np.float32)
+                    response = batcher.submit(op, header).result()
+            except Exception as e:
+                response = {"error": str(e)}
+            try:
+                send_frame(self.request, response)
+            except (ConnectionError, OSError):
+                return  # client gave up (timeout) and closed its socket
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, manager):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _SidecarHandler)
+        self.batcher = _Batcher(manager)
+
+
+# ─────────────────────────────────────────────────────────────
+# Client side (used by zone processes)
+# ─────────────────────────────────────────────────────────────
+class SidecarIDClient:
+    """Drop-in replacement for GlobalIDManager that forwards calls to the host sidecar."""
+
+    def __init__(self, socket_path: str = ID_SIDECAR_SOCKET, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _call(self, header: dict, body: bytes = b"") -> dict:
+        """
+        Send one request and wait for its response.
+
+        A failed connect or send (e.g. the sidecar restarted and the pooled
+        socket is dead) is retried once on a fresh socket. Once the request
+        went out it is never resent: the sidecar may already be processing
+        it, so a timeout or disconnect while waiting for the response raises.
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                    send_frame(self._sock, header, body)
+                    break
+                except (ConnectionError, OSError):
+                    self._drop_socket()
+                    if attempt:
+                        raise
+            try:
+                response, _ = recv_frame(self._sock)
+            except (ConnectionError, OSError):
+                # A late response would otherwise be read as the answer to the next request
+                self._drop_socket()
+                raise
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def _drop_socket(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def assign_global_id(self, cam_id: str, track_id: str, embedding, timestamp: float, zone: Optional[str] = None) -> int:
+        """Global ID of the detection; raises when the sidecar is unreachable or the assignment failed."""
+        body = np.asarray(embedding, dtype=np.float32).tobytes()
+        header = {"op": "assign", "cam_id": cam_id, "track_id": track_id, "timestamp": timestamp, "zone": zone}
+        return self._call(header, body)["global_id"]
+
+    def assign_global_ids(self, items: List[dict]) -> List[int]:
+        """Global IDs of a batch of detections (same item dicts as GlobalIDManager) in one round trip."""
+        if not items:
+            return []
+        body = np.stack([np.asarray(item["embedding"], dtype=np.float32).ravel() for item in items]).tobytes()
+        header = {"op": "assign_batch", "items": [
+            {"cam_id": item["cam_id"], "track_id": item["track_id"], "timestamp": item["timestamp"],
+             "zone": item.get("zone")}
+            for item in items
+        ]}
+        return self._call(header, body)["global_ids"]
+
+    def end_track(self, cam_id: str, track_id: str, last_seen: Optional[float] = None) -> None:
+        self._call({"op": "end_track", "cam_id": cam_id, "track_id": track_id, "last_seen": last_seen})
+
+    def get_stats(self) -> dict:
+        return self._call({"op": "stats"})["stats"]
+
+    def warmup(self) -> dict:
+        """Open the socket ahead of the first frame; the sidecar itself keeps the backends warm."""
+        began = time.perf_counter()
+        self._call({"op": "stats"})
+        return {"connect_sidecar": time.perf_counter() - began}
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop_socket()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-host global ID assignment sidecar.")
+    parser.add_argument("--socket", type=str, default=ID_SIDECAR_SOCKET or "/tmp/mct_id_sidecar.sock",
+                        help="Unix domain socket to listen on")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    from global_id_service.qdrant_backend.id_manager import GlobalIDManager
+
+    manager = GlobalIDManager()
+    manager.warmup()
+    server = SidecarServer(args.socket, manager)
+    logger.info(f"🚀 ID sidecar listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 ID sidecar shutting down")
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Transition Learner - transition_learner.py
+
+Periodically fits the TransitionModel from the hourly transition hashes the
+ID service maintains (see transitions.py): per-pair counts give the
+transition probabilities, and the log-moments give log-normal travel-time
+parameters. Cameras are ordered by the camera config first, then by any
+extra camera seen in the data.
+
+Run:
+    python -m global_id_service.transition_learner --interval 3600
+"""
+
+import argparse
+import logging
+import math
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from global_id_service.clients import get_redis_cache
+from global_id_service.config import TRANSITION_LEARN_DAYS, TRANSITION_MODEL_PATH
+from global_id_service.transition_model import TransitionModel
+from global_id_service import transitions
+
+logger = logging.getLogger(__name__)
+
+
+def fit_transition_model(days: float = TRANSITION_LEARN_DAYS, cameras: Optional[List[str]] = None,
+                         now: Optional[float] = None) -> TransitionModel:
+    """Fit a model from the last `days` of hourly transition hashes (one pipelined read)."""
+    now = now or time.time()
+    hours = range(int((now - days * 86400) // 3600), int(now // 3600) + 1)
+    cache = get_redis_cache()
+    with cache.pipeline() as pipe:
+        for hour in hours:
+            pipe.hgetall(transitions.transitions_key(hour))
+        pairs = transitions.merge_hours(pipe.execute())
+
+    edges = [(transitions.split_pair(pair), stats) for pair, stats in pairs.items()]
+    edges = [(cams, stats) for cams, stats in edges if cams is not None and stats.get("n", 0) > 0]
+    ordered = list(dict.fromkeys([*(cameras or []), *sorted({cam for cams, _ in edges for cam in cams})]))
+    ordinal = {cam: i for i, cam in enumerate(ordered)}
+
+    size = len(ordered)
+    counts = np.zeros((size, size), dtype=np.int64)
+    mu = np.full((size, size), np.nan)
+    sigma = np.full((size, size), np.nan)
+    for (src, dst), stats in edges:
+        i, j = ordinal[src], ordinal[dst]
+        n = stats["n"]
+        counts[i, j] = int(n)
+        mu[i, j] = stats.get("sum_log", 0.0) / n
+        sigma[i, j] = math.sqrt(max(0.0, stats.get("sum_log2", 0.0) / n - mu[i, j] ** 2))
+    return TransitionModel(ordered, counts, mu, sigma, fitted_at=now, window_days=days)
+
+
+def learn_once(model_path: str = TRANSITION_MODEL_PATH, days: float = TRANSITION_LEARN_DAYS,
+               config_path: Optional[str] = None) -> TransitionModel:
+    cameras = None
+    if config_path:
+        from app.transition_graph import MultiZoneCameraConfig
+        # Only the camera order is needed; skip loading the model being replaced
+        cameras = MultiZoneCameraConfig(config_path, transition_model_path=None).get_all_cameras()
+    model = fit_transition_model(days, cameras)
+    model.save(model_path)
+    logger.info(f"[LEARNER] Transition model v{model.version}: {len(model.cameras)} cameras, "
+                f"{int(model.counts.sum())} transitions over {days} days → {model_path}")
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit camera transition probabilities and travel times.")
+    parser.add_argument("--model", type=str, default=TRANSITION_MODEL_PATH, help="Output .npz path")
+    parser.add_argument("--days", type=float, default=TRANSITION_LEARN_DAYS, help="Days of history to fit on")
+    parser.add_argument("--config", type=str, default=None, help="Camera config YAML (fixes camera ordinals)")
+    parser.add_argument("--interval", type=float, default=0, help="Refit every N seconds (0: run once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    while True:
+        try:
+            learn_once(args.model, args.days, args.config)
+        except Exception as e:
+            logger.error(f"[LEARNER] Fit failed: {e}")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
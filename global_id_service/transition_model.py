@@ -0,0 +1,129 @@
+"""
+Transition Model - transition_model.py
+
+Learned camera-to-camera transition probabilities and travel-time
+distributions, stored as a compact versioned .npz.
+
+Arrays (indexed by camera ordinal, `cameras[i]` is the camera of row/column i):
+    cameras      (C,)    camera IDs
+    counts       (C, C)  observed transitions src → dst
+    probability  (C, C)  counts normalized per source row
+    mu, sigma    (C, C)  log-normal travel-time parameters (log seconds); NaN without data
+    version, fitted_at, window_days
+
+Written by transition_learner.py, read by MultiZoneCameraConfig and the ID service.
+"""
+
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from global_id_service.config import TRANSITION_MODEL_PATH, TRANSITION_MIN_SAMPLES
+
+
+class TransitionModel:
+    def __init__(self, cameras: List[str], counts: np.ndarray, mu: np.ndarray, sigma: np.ndarray,
+                 version: int = 0, fitted_at: float = 0.0, window_days: float = 0.0):
+        self.cameras = list(cameras)
+        self.ordinal = {cam: i for i, cam in enumerate(self.cameras)}
+        self.counts = counts.astype(np.int64)
+        totals = self.counts.sum(axis=1, keepdims=True)
+        self.probability = np.divide(self.counts, totals, out=np.zeros(self.counts.shape), where=totals > 0)
+        self.mu = mu.astype(np.float64)
+        self.sigma = sigma.astype(np.float64)
+        self.version = version
+        self.fitted_at = fitted_at
+        self.window_days = window_days
+
+    # ─── Persistence ───────────────────────────────────────────
+    def save(self, path: str = TRANSITION_MODEL_PATH, keep: int = 3) -> str:
+        """
+        Write the model as the next version of `path`.
+
+        `path` always holds the newest model (replaced atomically); the last
+        `keep` versions are also kept as `{stem}.v{N}.npz`.
+        """
+        previous = TransitionModel.load(path)
+        self.version = (previous.version if previous else 0) + 1
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        stem = path[:-4] if path.endswith(".npz") else path
+        versioned = f"{stem}.v{self.version}.npz"
+        np.savez_compressed(
+            versioned,
+            cameras=np.array(self.cameras, dtype=str),
+            counts=self.counts,
+            probability=self.probability,
+            mu=self.mu,
+            sigma=self.sigma,
+            version=self.version,
+            fitted_at=self.fitted_at,
+            window_days=self.window_days,
+        )
+        tmp_path = f"{stem}.tmp.npz"
+        with open(versioned, "rb") as src, open(tmp_path, "wb") as dst:
+            dst.write(src.read())
+        os.replace(tmp_path, path)
+        stale = f"{stem}.v{self.version - keep}.npz"
+        if keep > 0 and os.path.exists(stale):
+            os.remove(stale)
+        return path
+
+    @classmethod
+    def load(cls, path: str = TRANSITION_MODEL_PATH) -> Optional["TransitionModel"]:
+        """The model stored at `path`, or None when there is none (or it is unreadable)."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(
+                    cameras=[str(cam) for cam in data["cameras"]],
+                    counts=data["counts"],
+                    mu=data["mu"],
+                    sigma=data["sigma"],
+                    version=int(data["version"]),
+                    fitted_at=float(data["fitted_at"]),
+                    window_days=float(data["window_days"]),
+                )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Could not load transition model {path}: {e}")
+            return None
+
+    # ─── Queries ───────────────────────────────────────────────
+    def source_samples(self, cam_id: str) -> int:
+        i = self.ordinal.get(cam_id)
+        return int(self.counts[i].sum()) if i is not None else 0
+
+    def is_confident(self, cam_id: str, min_samples: int = TRANSITION_MIN_SAMPLES) -> bool:
+        """Enough departures from `cam_id` were observed to trust its learned row."""
+        return self.source_samples(cam_id) >= min_samples
+
+    def transitions_from(self, cam_id: str) -> List[Dict[str, float]]:
+        """Learned edges of a camera as [{"to", "weight", "travel_mu", "travel_sigma", "count"}]."""
+        i = self.ordinal.get(cam_id)
+        if i is None:
+            return []
+        edges = []
+        for j in np.flatnonzero(self.counts[i]):
+            edges.append({
+                "to": self.cameras[j],
+                "weight": round(float(self.probability[i, j]), 4),
+                "travel_mu": None if math.isnan(self.mu[i, j]) else float(self.mu[i, j]),
+                "travel_sigma": None if math.isnan(self.sigma[i, j]) else float(self.sigma[i, j]),
+                "count": int(self.counts[i, j]),
+            })
+        return edges
+
+    def travel_time_likelihood(self, src: str, dst: str, seconds: float) -> Optional[float]:
+        """Log-normal density of a `seconds` travel time on src → dst; None when the edge is unknown."""
+        i, j = self.ordinal.get(src), self.ordinal.get(dst)
+        if i is None or j is None or math.isnan(self.mu[i, j]) or seconds <= 0:
+            return None
+        sigma = max(self.sigma[i, j], 1e-3)
+        z = (math.log(seconds) - self.mu[i, j]) / sigma
+        return math.exp(-0.5 * z * z) / (seconds * sigma * math.sqrt(2 * math.pi))
+
+    def age_seconds(self) -> float:
+        return time.time() - self.fitted_at
@@ -0,0 +1,151 @@
+"""
+Camera Transitions - transitions.py
+
+Incremental camera-to-camera transition statistics, maintained on the
+assignment write path.
+
+Redis layout:
+- global_id_last_camera:{gid}  "cam|last_seen" of the camera the ID was last seen on (expires with the mappings)
+- transitions:{hour}           hash per hour of arrival (hour = epoch seconds // 3600), fields per "src>dst" pair:
+      n, sum, sum_log, sum_log2   count and travel-time moments (seconds, natural log)
+      h{i}                        travel-time histogram bucket i (TRANSITION_HISTOGRAM_BOUNDS)
+
+When an ID gets a new track on camera B while its last camera was A, the
+RECORD_TRANSITION_LUA script updates the A>B fields atomically. Both the
+arrival script and the batched last-seen touches (TOUCH_LAST_CAMERAS_LUA)
+only move the last camera forward in time, so zones flushing out of order
+cannot overwrite a newer sighting. Everything
+is one pipelined EVALSHA per new mapping, so the endpoint never has to scan
+track histories.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from global_id_service.config import TRANSITION_MAX_GAP_SECONDS, TRANSITION_RETENTION_DAYS
+
+TRANSITION_HISTOGRAM_BOUNDS = [5, 10, 30, 60, 120, 300, 600, 1800]  # seconds; last bucket: beyond 1800 s
+MIN_TRAVEL_SECONDS = 0.1  # floor before taking logs (overlapping views give ~0 s gaps)
+
+
+def last_camera_key(global_id: int) -> str:
+    return f"global_id_last_camera:{global_id}"
+
+
+def transitions_key(hour: int) -> str:
+    return f"transitions:{hour}"
+
+
+# KEYS: last-camera key, hour hash.  ARGV: camera, timestamp, last-camera ttl, max gap, hash ttl, histogram bounds...
+# An arrival older than the stored sighting (another zone flushed a newer one) changes nothing.
+RECORD_TRANSITION_LUA = """
+local previous = redis.call('GET', KEYS[1])
+if not previous then
+    redis.call('SET', KEYS[1], ARGV[1] .. '|' .. ARGV[2], 'EX', tonumber(ARGV[3]))
+    return 0
+end
+local sep = string.find(previous, '|', 1, true)
+local previous_camera = string.sub(previous, 1, sep - 1)
+local gap = tonumber(ARGV[2]) - tonumber(string.sub(previous, sep + 1))
+if gap < 0 then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1] .. '|' .. ARGV[2], 'EX', tonumber(ARGV[3]))
+if previous_camera == ARGV[1] or gap > tonumber(ARGV[4]) then
+    return 0
+end
+local travel = math.max(gap, %(min_travel)s)
+local bucket = #ARGV - 5
+for i = 6, #ARGV do
+    if travel <= tonumber(ARGV[i]) then
+        bucket = i - 6
+        break
+    end
+end
+local pair = previous_camera .. '>' .. ARGV[1]
+local log_travel = math.log(travel)
+redis.call('HINCRBY', KEYS[2], pair .. ':n', 1)
+redis.call('HINCRBYFLOAT', KEYS[2], pair .. ':sum', travel)
+redis.call('HINCRBYFLOAT', KEYS[2], pair .. ':sum_log', log_travel)
+redis.call('HINCRBYFLOAT', KEYS[2], pair .. ':sum_log2', log_travel * log_travel)
+redis.call('HINCRBY', KEYS[2], pair .. ':h' .. bucket, 1)
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[5]))
+return 1
+""" % {"min_travel": MIN_TRAVEL_SECONDS}
+
+
+# KEYS: last-camera keys.  ARGV: ttl, then (camera, timestamp) per key.
+# Each value only moves forward in time, whichever process flushes last.
+TOUCH_LAST_CAMERAS_LUA = """
+local updated = 0
+for i = 1, #KEYS do
+    local camera, timestamp = ARGV[2 * i], tonumber(ARGV[2 * i + 1])
+    local previous = redis.call('GET', KEYS[i])
+    local sep = previous and string.find(previous, '|', 1, true)
+    if not sep or timestamp > tonumber(string.sub(previous, sep + 1)) then
+        redis.call('SET', KEYS[i], camera .. '|' .. ARGV[2 * i + 1], 'EX', tonumber(ARGV[1]))
+        updated = updated + 1
+    else
+        redis.call('EXPIRE', KEYS[i], tonumber(ARGV[1]))
+    end
+end
+return updated
+"""
+
+
+def record_arrivals(cache, pipe, arrivals, last_camera_ttl: int) -> None:
+    """Queue RECORD_TRANSITION_LUA on `pipe` for each (global_id, cam_id, timestamp) new mapping."""
+    for global_id, cam_id, timestamp in arrivals:
+        cache.run_script(
+            "record_transition",
+            keys=[last_camera_key(global_id), transitions_key(int(timestamp // 3600))],
+            args=[cam_id, timestamp, last_camera_ttl, TRANSITION_MAX_GAP_SECONDS,
+                  TRANSITION_RETENTION_DAYS * 86400, *TRANSITION_HISTOGRAM_BOUNDS],
+            client=pipe,
+        )
+
+
+def touch_last_cameras(cache, pipe, seen: Dict[int, tuple], last_camera_ttl: int) -> None:
+    """Queue last-camera updates for {global_id: (cam_id, last_seen)} on `pipe`; older sightings are ignored."""
+    if not seen:
+        return
+    args = [last_camera_ttl]
+    for cam_id, last_seen in seen.values():
+        args.extend((cam_id, repr(float(last_seen))))
+    cache.run_script("touch_last_cameras", keys=[last_camera_key(global_id) for global_id in seen],
+                     args=args, client=pipe)
+
+
+# ─────────────────────────────────────────────────────────────
+# Read side (dashboard API, transition learner)
+# ─────────────────────────────────────────────────────────────
+def merge_hours(hashes: List[Dict[str, str]]) -> Dict[str, Dict[str, float]]:
+    """Sum the per-hour hashes into {"src>dst": {"n", "sum", "sum_log", "sum_log2", "h0".."hN"}}."""
+    pairs: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for fields in hashes:
+        for field, value in fields.items():
+            pair, _, stat = field.rpartition(":")
+            pairs[pair][stat] += float(value)
+    return pairs
+
+
+def pair_statistics(stats: Dict[str, float]) -> Dict[str, object]:
+    """Count, travel-time moments and log-normal fit of one camera pair."""
+    n = stats.get("n", 0.0)
+    mu = stats.get("sum_log", 0.0) / n if n else None
+    variance = max(0.0, stats.get("sum_log2", 0.0) / n - mu * mu) if n else None
+    histogram = [int(stats.get(f"h{i}", 0)) for i in range(len(TRANSITION_HISTOGRAM_BOUNDS) + 1)]
+    return {
+        "count": int(n),
+        "mean_travel_s": round(stats.get("sum", 0.0) / n, 2) if n else None,
+        "median_travel_s": round(math.exp(mu), 2) if n else None,  # log-normal median = geometric mean
+        "lognormal_mu": round(mu, 4) if n else None,
+        "lognormal_sigma": round(math.sqrt(variance), 4) if n else None,
+        "histogram": histogram,
+    }
+
+
+def split_pair(pair: str) -> Optional[tuple]:
+    src, sep, dst = pair.partition(">")
+    return (src, dst) if sep else None